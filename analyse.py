@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Analyse des items : difficulté et discrimination de chaque champ d'un quiz.
+
+Difficulté : part des soumissions où le champ est juste. Discrimination :
+corrélation point-bisériale entre le champ (juste = 1, faux = 0) et le
+score des autres champs (score total moins ce champ, qui compte pour un
+point) ; proche de 0 ou négative, le champ ne distingue pas les étudiants
+qui réussissent des autres. Avec le score total, le champ se corrélerait
+avec lui-même, ce qui gonfle la valeur sur les quiz courts.
+
+Les sommes par champ (n, Σx, Σy, Σxy, Σy²) sont accumulées dans la table
+analyse_champs à partir de la table reponses. analyse_curseurs retient le
+dernier id de resultats pris en compte : une mise à jour ne lit que les
+soumissions arrivées depuis. Recorriger un quiz ou remplir la table
+reponses invalide ses sommes, recalculées à la lecture suivante.
+
+Même analyse que /admin/analyse/<quiz_id>. En ligne de commande, la base
+n'est que lue : les sommes en table sont complétées en mémoire par les
+soumissions arrivées depuis le curseur. --enregistrer met la table à jour,
+comme le fait la page d'administration.
+
+    python3 analyse.py binaire
+    python3 analyse.py reseau --tri discrimination
+    python3 analyse.py binaire --enregistrer
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+
+from db import DB_PATH, get_db, message_schema, schema_manquant
+
+# En dessous, un champ est signalé comme peu discriminant.
+SEUIL_DISCRIMINATION = 0.2
+
+TRIS = ("champ", "difficulte", "discrimination")
+
+
+def _cle_champ(champ):
+    """ex1_bin_10 après ex1_bin_9 : les nombres sont comparés comme nombres."""
+    return [int(p) if p.isdigit() else p for p in re.split(r"(\d+)", champ)]
+
+
+# ---------------------------------------------------------------------------
+# Accumulateurs
+# ---------------------------------------------------------------------------
+
+def invalider(conn, quiz_id):
+    """Oublie (sans commit) les sommes d'un quiz dont des soumissions ont changé."""
+    conn.execute("DELETE FROM analyse_champs WHERE quiz_id=?", (quiz_id,))
+    conn.execute("DELETE FROM analyse_curseurs WHERE quiz_id=?", (quiz_id,))
+
+
+# Sommes par champ des soumissions d'un quiz dont l'id est dans ]debut, fin].
+SOMMES_CHAMPS = (
+    "SELECT r.quiz_id, p.champ, COUNT(*), SUM(p.correct), "
+    "SUM(r.score_total_correct), SUM(p.correct * r.score_total_correct), "
+    "SUM(r.score_total_correct * r.score_total_correct) "
+    "FROM resultats r JOIN reponses p ON p.resultat_id = r.id "
+    "WHERE r.quiz_id=? AND r.id > ? AND r.id <= ? "
+    "AND r.score_total_correct IS NOT NULL "
+    "GROUP BY p.champ"
+)
+
+
+def mettre_a_jour(conn, quiz_id):
+    """Ajoute aux sommes les soumissions postérieures au curseur. Retourne leur nombre.
+
+    Les id de resultats ne font que croître d'un commit à l'autre : toute
+    soumission encore invisible aura un id supérieur au maximum lu ici.
+    """
+    row = conn.execute(
+        "SELECT (SELECT dernier_id FROM analyse_curseurs WHERE quiz_id=?), "
+        "(SELECT MAX(id) FROM resultats WHERE quiz_id=?)",
+        (quiz_id, quiz_id),
+    ).fetchone()
+    if row[1] is None or row[0] == row[1]:
+        return 0
+
+    # Deux workers peuvent rafraîchir en même temps : le second relit le
+    # curseur une fois le verrou d'écriture obtenu.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        dernier = conn.execute(
+            "SELECT dernier_id FROM analyse_curseurs WHERE quiz_id=?", (quiz_id,)
+        ).fetchone()
+        dernier = dernier[0] if dernier else 0
+        maximum, nouvelles = conn.execute(
+            "SELECT MAX(id), COUNT(*) FROM resultats WHERE quiz_id=? AND id > ?",
+            (quiz_id, dernier),
+        ).fetchone()
+        if nouvelles:
+            conn.execute(
+                "INSERT INTO analyse_champs (quiz_id, champ, n, sx, sy, sxy, syy) "
+                + SOMMES_CHAMPS +
+                " ON CONFLICT(quiz_id, champ) DO UPDATE SET "
+                "n = n + excluded.n, sx = sx + excluded.sx, sy = sy + excluded.sy, "
+                "sxy = sxy + excluded.sxy, syy = syy + excluded.syy",
+                (quiz_id, dernier, maximum),
+            )
+            conn.execute(
+                "INSERT INTO analyse_curseurs (quiz_id, dernier_id) VALUES (?, ?) "
+                "ON CONFLICT(quiz_id) DO UPDATE SET dernier_id=excluded.dernier_id",
+                (quiz_id, maximum),
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return nouvelles
+
+
+def lire_sommes(conn, quiz_id, cache=True):
+    """Sommes par champ (champ, n, sx, sy, sxy, syy) sans rien écrire.
+
+    Part des sommes en table (si cache) et y ajoute en mémoire les
+    soumissions postérieures au curseur ; sans cache, tout est relu.
+    """
+    sommes = {}
+    dernier = 0
+    if cache:
+        row = conn.execute(
+            "SELECT dernier_id FROM analyse_curseurs WHERE quiz_id=?", (quiz_id,)
+        ).fetchone()
+        if row:
+            dernier = row[0]
+            for champ, *valeurs in conn.execute(
+                "SELECT champ, n, sx, sy, sxy, syy FROM analyse_champs WHERE quiz_id=?",
+                (quiz_id,),
+            ):
+                sommes[champ] = valeurs
+    # 2**63 - 1 : plus grand id SQLite, pas de borne haute.
+    for _, champ, *valeurs in conn.execute(SOMMES_CHAMPS, (quiz_id, dernier, 2 ** 63 - 1)):
+        anciennes = sommes.get(champ)
+        sommes[champ] = valeurs if anciennes is None else [a + b for a, b in zip(anciennes, valeurs)]
+    return [(champ, *valeurs) for champ, valeurs in sommes.items()]
+
+
+# ---------------------------------------------------------------------------
+# Statistiques
+# ---------------------------------------------------------------------------
+
+def _discrimination(n, sx, sy, sxy, syy):
+    """Corrélation point-bisériale avec le reste du score (y - x), ou None si constant.
+
+    Les sommes portent sur le score total y ; celles du reste s'en déduisent,
+    x valant 0 ou 1 (Σx² = Σx) : Σ(y-x) = Σy - Σx, Σx(y-x) = Σxy - Σx,
+    Σ(y-x)² = Σy² - 2Σxy + Σx.
+    """
+    sr = sy - sx
+    sxr = sxy - sx
+    srr = syy - 2 * sxy + sx
+    variance_x = n * sx - sx * sx
+    variance_r = n * srr - sr * sr
+    if variance_x <= 0 or variance_r <= 0:
+        return None
+    return (n * sxr - sx * sr) / math.sqrt(variance_x * variance_r)
+
+
+def statistiques(quiz_id, tri="champ", enregistrer=True, cache=True):
+    """Retourne (liste de champs, soumissions analysées).
+
+    Chaque champ est un dict : champ, n, difficulte (0-1), discrimination
+    (-1 à 1, ou None). enregistrer=False ne modifie pas la base : les
+    sommes sont complétées en mémoire (lire_sommes). cache=False ignore
+    les tables analyse_* (base sans ces tables).
+    """
+    conn = get_db()
+    try:
+        if not enregistrer:
+            rows = lire_sommes(conn, quiz_id, cache)
+        else:
+            mettre_a_jour(conn, quiz_id)
+            rows = conn.execute(
+                "SELECT champ, n, sx, sy, sxy, syy FROM analyse_champs WHERE quiz_id=?",
+                (quiz_id,),
+            ).fetchall()
+    finally:
+        conn.close()
+
+    champs = [{
+        "champ": champ,
+        "n": n,
+        "difficulte": sx / n,
+        "discrimination": _discrimination(n, sx, sy, sxy, syy),
+    } for champ, n, sx, sy, sxy, syy in rows]
+
+    if tri == "difficulte":
+        champs.sort(key=lambda c: (c["difficulte"], _cle_champ(c["champ"])))
+    elif tri == "discrimination":
+        # Les champs sans discrimination calculable en dernier.
+        champs.sort(key=lambda c: (c["discrimination"] is None, c["discrimination"] or 0,
+                                   _cle_champ(c["champ"])))
+    else:
+        champs.sort(key=lambda c: _cle_champ(c["champ"]))
+    return champs, max((c["n"] for c in champs), default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("quiz", help="Identifiant du quiz (binaire, reseau, ...)")
+    parser.add_argument("--tri", choices=TRIS, default="champ",
+                        help="Ordre des champs (par défaut : champ)")
+    parser.add_argument("--enregistrer", action="store_true",
+                        help="Met à jour les sommes en base (sinon lecture seule)")
+    args = parser.parse_args()
+
+    if not os.path.exists(DB_PATH):
+        print(f"Base introuvable : {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+    manquants = schema_manquant(("reponses",))
+    if manquants:
+        print(message_schema(manquants), file=sys.stderr)
+        sys.exit(1)
+    cache = not schema_manquant(("analyse_champs", "analyse_curseurs"))
+    if args.enregistrer and not cache:
+        print(message_schema(schema_manquant(("analyse_champs", "analyse_curseurs"))),
+              file=sys.stderr)
+        sys.exit(1)
+
+    champs, total = statistiques(args.quiz, args.tri, enregistrer=args.enregistrer, cache=cache)
+    if not champs:
+        print(f"  Aucune réponse détaillée pour le quiz {args.quiz}.")
+        return
+    print(f"  {'Champ':<24} {'Réussite':>9} {'Discrim.':>9}")
+    print(f"  {'─' * 24} {'─' * 9} {'─' * 9}")
+    for c in champs:
+        discrimination = "—" if c["discrimination"] is None else f"{c['discrimination']:+.2f}"
+        faible = c["discrimination"] is not None and c["discrimination"] < SEUIL_DISCRIMINATION
+        print(f"  {c['champ']:<24} {c['difficulte']:>8.0%} {discrimination:>9}"
+              f"{'  ←' if faible else ''}")
+    print(f"\n  {len(champs)} champ(s), {total} soumission(s)")
+
+
+if __name__ == "__main__":
+    main()
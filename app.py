@@ -1,20 +1,65 @@
+import os
+
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 
 import config
-from db import init_db
+import db
+from cache_http import installer as installer_cache_http
+from compression import installer as installer_compression
+from db import init_db, liberer_db, vider_pool
+from ecriture import vider_file
+from metriques import installer as installer_metriques
+from profilage import installer as installer_profilage
 from routes import main_bp, admin_bp
+from sessions import InterfaceSessionServeur, init_sessions
 from quizzes import register_all
 
 
+def prechauffer_gabarits(application):
+    """Compile tous les gabarits (application et blueprints) avant la première requête.
+
+    Les quiz chargés à la demande compilent les leurs en se chargeant
+    (quizzes.charger). Avec le cache de bytecode, seul le premier worker
+    après un déploiement compile vraiment ; les suivants relisent data/jinja/.
+    """
+    dossier = os.path.join(db.DATA_DIR, "jinja")
+    os.makedirs(dossier, exist_ok=True)
+    env = application.jinja_env
+    env.bytecode_cache = FileSystemBytecodeCache(dossier)
+    for nom in env.list_templates(extensions=("html",)):
+        env.get_template(nom)
+
+
 def create_app():
     application = Flask(__name__)
     application.secret_key = config.SECRET_KEY
 
     init_db()
+    # Soumissions restées en file après un arrêt brutal ou un retour au mode direct.
+    vider_file()
+    if config.SESSIONS_SERVEUR:
+        init_sessions()
+        application.session_interface = InterfaceSessionServeur()
 
     application.register_blueprint(main_bp)
     application.register_blueprint(admin_bp, url_prefix="/admin")
     register_all(application)
+    application.teardown_appcontext(liberer_db)
+    installer_cache_http(application)
+    if config.METRIQUES:
+        installer_metriques(application)
+    if config.PROFILAGE:
+        installer_profilage(application)
+    # Enregistrée en dernier, donc exécutée avant les autres after_request :
+    # les métriques comptent le temps de compression.
+    if config.COMPRESSION:
+        installer_compression(application)
+    if config.GABARITS_CACHE:
+        prechauffer_gabarits(application)
+
+    # Le processus maître ne garde aucune connexion ouverte avant le fork.
+    vider_pool()
 
     return application
 
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Analyse des items sur N soumissions : calcul complet contre mise à jour incrémentale.
+
+Après le premier calcul, un rafraîchissement ne lit que les soumissions
+d'id supérieur au curseur : on mesure un rafraîchissement sans nouveauté,
+puis après l'arrivée d'une classe de 30.
+
+Vérifie d'abord la discrimination sur une petite classe synthétique où un
+champ va à contre-sens des autres : elle doit être négative et égale à la
+corrélation avec le reste du score.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from commun import base_temporaire, peupler_binaire
+
+base_temporaire()
+
+import analyse  # noqa: E402
+import db  # noqa: E402
+from quizzes.binaire.logic import detailler_donnees  # noqa: E402
+from remplir_reponses import remplir  # noqa: E402
+
+CLASSE = 30
+
+
+def chrono(libelle, fonction):
+    debut = time.perf_counter()
+    resultat = fonction()
+    print(f"  {libelle:<40} {(time.perf_counter() - debut) * 1000:9.2f} ms")
+    return resultat
+
+
+def verifier_discrimination():
+    """Classe de 40 : 4 champs suivent le niveau, le 5e va à contre-sens."""
+    rng = random.Random(7)
+    copies = []
+    for _ in range(40):
+        niveau = rng.random()
+        champs = [int(rng.random() < niveau) for _ in range(4)]
+        champs.append(int(rng.random() > niveau))
+        copies.append(champs)
+    for i in range(5):
+        x = [c[i] for c in copies]
+        y = [sum(c) for c in copies]
+        reste = [t - v for t, v in zip(y, x)]
+        calcule = analyse._discrimination(
+            len(x), sum(x), sum(y), sum(a * b for a, b in zip(x, y)), sum(b * b for b in y)
+        )
+        attendu = statistics.correlation(x, reste)
+        if abs(calcule - attendu) > 1e-9:
+            raise SystemExit(f"Champ {i + 1} : discrimination {calcule:.4f}, attendu {attendu:.4f}")
+    if calcule >= 0:
+        raise SystemExit(f"Champ à contre-sens : discrimination {calcule:+.2f}, attendue négative")
+    print(f"  discrimination du champ à contre-sens : {calcule:+.2f} (reste du score)")
+
+
+def nouvelle_classe(conn, n):
+    """Recopie CLASSE soumissions sous de nouveaux codes, réponses dans la même transaction."""
+    lignes = [dict(row) for row in conn.execute(
+        f"SELECT {', '.join(db.COLONNES_RESULTATS)} FROM resultats LIMIT ?", (CLASSE,)
+    )]
+    for i, ligne in enumerate(lignes):
+        ligne["code"] = f"{n + i:06d}"
+        ligne["reponses"] = detailler_donnees(json.loads(ligne["donnees"]))
+    db.inserer_resultats(conn, lignes)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=20_000)
+    args = parser.parse_args()
+
+    verifier_discrimination()
+    db.init_db()
+    db.vider_pool()
+    print(f"  insertion de {args.n} soumissions...")
+    peupler_binaire(args.n, 42)
+    conn = db.connecter()
+    remplir(conn)
+
+    champs, total = chrono("premier calcul (toutes les soumissions)",
+                           lambda: analyse.statistiques("binaire"))
+    print(f"    {len(champs)} champs, {total} soumissions")
+    chrono("rafraîchissement sans nouvelle soumission", lambda: analyse.statistiques("binaire"))
+    nouvelle_classe(conn, args.n)
+    champs, total = chrono(f"rafraîchissement après {CLASSE} soumissions",
+                           lambda: analyse.statistiques("binaire"))
+    print(f"    {total} soumissions")
+
+    analyse.invalider(conn, "binaire")
+    conn.commit()
+    chrono("recalcul complet équivalent", lambda: analyse.statistiques("binaire"))
+    conn.fermer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Visites répétées : octets et temps serveur, sans cache contre navigateur qui revalide.
+
+Un étudiant revient N fois sur l'accueil général puis l'accueil de chaque
+quiz, avec les fichiers statiques de ces pages. Le client « sans cache »
+retélécharge tout ; le client « navigateur » garde les réponses, renvoie
+If-None-Match et ne redemande pas un fichier immutable encore frais.
+"""
+
+import argparse
+import re
+import time
+
+from commun import base_temporaire
+
+base_temporaire()
+
+from app import create_app  # noqa: E402
+
+RESSOURCE = re.compile(r'(?:href|src)="(/[^"]+\.(?:css|js)[^"]*)"')
+
+
+class Navigateur:
+    """Client de test avec un cache HTTP minimal (ETag, immutable)."""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+        self.etags = {}
+        self.immuables = {}
+        self.octets = 0
+        self.requetes = 0
+
+    def get(self, url):
+        if url in self.immuables:
+            return self.immuables[url]
+        headers = {}
+        if self.cache and url in self.etags:
+            headers["If-None-Match"] = self.etags[url][0]
+        reponse = self.client.get(url, headers=headers)
+        corps = reponse.get_data(as_text=True)
+        reponse.close()
+        self.requetes += 1
+        self.octets += len(corps.encode())
+        if reponse.status_code == 304:
+            return self.etags[url][1]
+        if self.cache and "immutable" in reponse.headers.get("Cache-Control", ""):
+            self.immuables[url] = corps
+        elif self.cache and reponse.headers.get("ETag"):
+            self.etags[url] = (reponse.headers["ETag"], corps)
+        return corps
+
+    def page(self, url):
+        for ressource in RESSOURCE.findall(self.get(url)):
+            self.get(ressource)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=200, help="Visites par client")
+    args = parser.parse_args()
+
+    app = create_app()
+    for libelle, cache in (("sans cache", False), ("navigateur", True)):
+        navigateur = Navigateur(app.test_client(), cache)
+        debut = time.perf_counter()
+        for _ in range(args.n):
+            for url in ("/", "/binaire/", "/reseau/"):
+                navigateur.page(url)
+        duree = time.perf_counter() - debut
+        print(f"  {libelle:<11} {navigateur.octets / args.n:8.0f} octets "
+              f"et {navigateur.requetes / args.n:4.1f} requêtes par visite, "
+              f"{duree / args.n * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Compression par route : taux et temps CPU de gzip et brotli à plusieurs niveaux.
+
+Les pages sont rendues une fois sans compression (exercices des deux
+quiz, /resultats avec 50 soumissions, tableau de bord, JSON), puis chaque
+corps est compressé à chaque niveau : meilleur temps sur --passes
+répétitions. Sert à choisir COMPRESSION_NIVEAU_GZIP / _BROTLI ; les
+niveaux par défaut sont marqués d'une étoile.
+"""
+
+import argparse
+import time
+
+from commun import base_temporaire, peupler_binaire
+
+base_temporaire()
+
+import config  # noqa: E402
+from app import create_app  # noqa: E402
+from compression import brotli, compresser  # noqa: E402
+
+NIVEAUX = [("gzip", n) for n in (1, 6, 9)] + (
+    [("br", n) for n in (1, 4, 6, 11)] if brotli is not None else []
+)
+
+
+def corps(app):
+    """{route: corps non compressé} des pages mesurées."""
+    etudiant = app.test_client()
+    admin = app.test_client()
+    admin.post("/admin/login", data={"password": config.ADMIN_PASSWORD})
+    pages = {}
+
+    def lire(client, url, libelle=None):
+        reponse = client.get(url)
+        pages[libelle or url] = reponse.get_data()
+        reponse.close()
+
+    for quiz_id, total in (("binaire", 3), ("reseau", 2)):
+        etudiant.post(f"/{quiz_id}/start", data={"nom": "Bench", "prenom": "Etudiant"})
+        for n in range(1, total + 1):
+            lire(etudiant, f"/{quiz_id}/exercice/{n}")
+    lire(etudiant, "/binaire/resultats")
+    lire(etudiant, "/binaire/attente/status")
+    lire(admin, "/admin/", "/admin/ (tableau de bord)")
+    lire(admin, "/admin/resumes")
+    return pages
+
+
+def mesurer(donnees, encodage, niveau, passes):
+    meilleure = float("inf")
+    for _ in range(passes):
+        debut = time.perf_counter()
+        compresse = compresser(donnees, encodage, niveau)
+        meilleure = min(meilleure, time.perf_counter() - debut)
+    return len(compresse), meilleure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--passes", type=int, default=20)
+    args = parser.parse_args()
+
+    peupler_binaire(50, 42)
+    config.COMPRESSION = False
+    pages = corps(create_app())
+    defauts = {("gzip", config.COMPRESSION_NIVEAU_GZIP), ("br", config.COMPRESSION_NIVEAU_BROTLI)}
+
+    entetes = "".join(
+        f"{encodage + ' ' + str(niveau) + ('*' if (encodage, niveau) in defauts else ''):>15}"
+        for encodage, niveau in NIVEAUX
+    )
+    print(f"  {'route':<30} {'octets':>7}{entetes}")
+    print(f"  {'':<30} {'':>7}{'  taux / µs':>15}")
+    for route, donnees in pages.items():
+        colonnes = []
+        for encodage, niveau in NIVEAUX:
+            taille, duree = mesurer(donnees, encodage, niveau, args.passes)
+            colonnes.append(f"{len(donnees) / taille:>7.1f}x{duree * 1e6:>6.0f}")
+        trop_petit = "  (sous le seuil)" if len(donnees) < config.COMPRESSION_SEUIL else ""
+        print(f"  {route:<30} {len(donnees):>7}{''.join(f'{c:>15}' for c in colonnes)}{trop_petit}")
+    if brotli is None:
+        print("  module brotli absent : gzip seulement")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""consulter.py : une classe de 30 en 30 processus contre un seul lot.
+
+Mesure aussi le rendu seul (dans ce processus) avec et sans couleurs ANSI,
+puis le mode lot avec pool sur N soumissions.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from commun import RACINE, base_temporaire, peupler_binaire
+
+base_temporaire()
+
+import db  # noqa: E402
+import consulter  # noqa: E402
+
+CLASSE = 30
+
+
+def lancer(*args):
+    """Lance consulter.py sur la base temporaire, sortie dans /dev/null."""
+    code = (f"import db; db.DATA_DIR = {db.DATA_DIR!r}; db.DB_PATH = {db.DB_PATH!r}\n"
+            f"import sys, consulter; sys.argv = ['consulter.py', *{list(args)!r}]\n"
+            "consulter.main()")
+    with open(os.devnull, "w") as sortie:
+        subprocess.run([sys.executable, "-c", code], cwd=RACINE, stdout=sortie, check=True)
+
+
+def chrono(libelle, fonction, *args):
+    debut = time.perf_counter()
+    fonction(*args)
+    duree = time.perf_counter() - debut
+    print(f"  {libelle:<44} {duree:6.2f} s")
+    return duree
+
+
+def rendu_local(rows):
+    for code, donnees in rows:
+        consulter._rendre_ligne(("binaire", code, donnees))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=2000)
+    parser.add_argument("-p", "--processus", type=int, default=4)
+    args = parser.parse_args()
+
+    db.init_db()
+    db.vider_pool()
+    print(f"  insertion de {args.n} soumissions...")
+    peupler_binaire(args.n, 42)
+    codes = [f"{i:06d}" for i in range(CLASSE)]
+
+    print(f"Classe de {CLASSE} :")
+    chrono(f"{CLASSE} processus, un code chacun", lambda: [lancer("binaire", c) for c in codes])
+    chrono("un lot, sans pool", lancer, "binaire", *codes, "-p", "0")
+
+    conn = db.connecter()
+    conn.row_factory = None
+    rows = conn.execute("SELECT code, donnees FROM resultats").fetchall()
+    conn.fermer()
+    print(f"Rendu seul de {len(rows)} rapports :")
+    avec = chrono("couleurs ANSI (regex dans pad)", rendu_local, rows)
+    consulter.desactiver_couleurs()
+    sans = chrono("--sans-couleurs (len direct)", rendu_local, rows)
+    print(f"  {'gain':<44} {avec / sans:6.2f}x")
+
+    print("Lot complet (--all --sans-couleurs --document) :")
+    document = os.path.join(db.DATA_DIR, "rapports.txt")
+    for processus in (0, args.processus):
+        chrono(f"pool={processus}", lancer, "binaire", "--all", "--sans-couleurs",
+               "--document", document, "-p", str(processus))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Connexions inactives tenues par un worker : gunicorn sync contre gevent.
+
+Un gunicorn à un seul worker sert la salle d'attente en flux SSE
+(ATTENTE_PUSH=1), le quiz réseau étant en mode test fermé : chaque flux
+reste ouvert sans rien faire, comme un étudiant qui attend l'ouverture.
+On ouvre K flux, on compte ceux qui ont reçu leur premier octet, puis on
+chronomètre une requête ordinaire (GET /) envoyée pendant ce temps.
+Un gunicorn neuf par mesure : un worker sync occupé ne se libère qu'à la
+fin de son flux.
+"""
+
+import argparse
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from charge_classe import ClientHTTP, Mesures, basculer, lancer_gunicorn
+
+import config  # noqa: E402
+
+REQUETE_FLUX = b"GET /reseau/attente/flux HTTP/1.1\r\nHost: bench\r\n\r\n"
+
+
+def ouvrir_flux(adresse, nombre, delai):
+    """Ouvre nombre flux SSE. Retourne (sockets, nombre de flux qui ont répondu)."""
+    selecteur = selectors.DefaultSelector()
+    sockets = []
+    for _ in range(nombre):
+        s = socket.create_connection(adresse)
+        s.sendall(REQUETE_FLUX)
+        s.setblocking(False)
+        selecteur.register(s, selectors.EVENT_READ)
+        sockets.append(s)
+    servis = 0
+    fin = time.monotonic() + delai
+    while servis < nombre and time.monotonic() < fin:
+        for cle, _ in selecteur.select(timeout=max(0, fin - time.monotonic())):
+            if cle.fileobj.recv(4096):
+                servis += 1
+            selecteur.unregister(cle.fileobj)
+    selecteur.close()
+    return sockets, servis
+
+
+def sonder(adresse, delai):
+    """Durée (s) d'un GET / pendant que les flux sont ouverts, ou None au-delà de delai."""
+    debut = time.perf_counter()
+    try:
+        with socket.create_connection(adresse, timeout=delai) as s:
+            s.sendall(b"GET / HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+            if not s.recv(4096):
+                return None
+    except socket.timeout:
+        return None
+    return time.perf_counter() - debut
+
+
+def mesurer(classe, nombre, delai):
+    data_dir = tempfile.mkdtemp(prefix="quiz-bench-")
+    processus, url, journal = lancer_gunicorn(
+        data_dir, 1, classe, {"ATTENTE_PUSH": "1", "ATTENTE_FLUX_DUREE": "120"}
+    )
+    sockets = []
+    try:
+        admin, mesures = ClientHTTP(url), Mesures()
+        mesures.requete(admin, "POST", "/admin/login", {"password": config.ADMIN_PASSWORD})
+        basculer(admin, mesures, "reseau", "test")
+        partie = urlsplit(url)
+        adresse = (partie.hostname, partie.port)
+        sockets, servis = ouvrir_flux(adresse, nombre, delai)
+        return servis, sonder(adresse, delai)
+    finally:
+        for s in sockets:
+            s.close()
+        processus.send_signal(signal.SIGTERM)
+        try:
+            processus.wait(10)
+        except subprocess.TimeoutExpired:
+            # Un worker sync ne s'arrête qu'à la fin de son flux.
+            processus.kill()
+        journal.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Flux ouverts en même temps (par défaut : 10 100 1000)")
+    parser.add_argument("--delai", type=float, default=5.0,
+                        help="Attente maximale des réponses, en secondes")
+    args = parser.parse_args()
+
+    print(f"  {'worker':<8} {'flux':>6} {'servis':>8} {'GET / pendant ce temps':>24}")
+    for classe in ("sync", "gevent"):
+        for nombre in args.n:
+            servis, sonde = mesurer(classe, nombre, args.delai)
+            duree = f"{sonde * 1000:.1f} ms" if sonde is not None else f"> {args.delai:g} s"
+            print(f"  {classe:<8} {nombre:>6} {servis:>8} {duree:>24}")
+
+
+if __name__ == "__main__":
+    main()
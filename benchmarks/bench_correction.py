@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks des fonctions de correction, comparés à une référence enregistrée.
+
+Chaque fonction pure du chemin de /confirmation est appelée sur des
+feuilles de réponses aléatoires (graine fixe), par passes répétées : on
+retient la meilleure passe, moins sensible au bruit de la machine. Les
+durées par appel, rapportées à celle d'un travail étalon mesuré en même
+temps, sont comparées à reference_correction.json ; le script échoue
+(code 1) si une fonction reste plus lente que sa référence de plus de
+--seuil % après une seconde mesure.
+
+    python3 benchmarks/bench_correction.py                # comparer
+    python3 benchmarks/bench_correction.py --enregistrer  # nouvelle référence
+
+La référence n'a de sens que sur la machine qui l'a produite : l'enregistrer
+à nouveau après un changement de machine ou de version de Python.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from commun import feuille_binaire, feuille_reseau
+
+from quizzes.binaire import logic as binaire  # noqa: E402
+from quizzes.reseau import logic as reseau  # noqa: E402
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "reference_correction.json")
+# Mesuré avec les autres à chaque passe : les écarts sont calculés relativement
+# à lui, ce qui annule un ralentissement de toute la machine (CPU partagé,
+# fréquence variable).
+ETALON = "étalon"
+
+
+def _etalon(i):
+    """Travail Python fixe, sans rapport avec le code testé."""
+    d = {}
+    for k in range(40):
+        d[f"champ_{k}"] = str(k * i).strip()
+    return sum(len(v) for v in d.values())
+
+
+def cas(n, graine):
+    """{nom: (fonction, liste d'arguments)} sur n feuilles de chaque quiz."""
+    rng = random.Random(graine)
+    binaires = [feuille_binaire(rng) for _ in range(n)]
+    reseaux = [feuille_reseau(rng) for _ in range(n)]
+
+    structures, normalisations = [], []
+    for reponses, ex2_data, ex3_operands in binaires:
+        scores, total_c, total_q = binaire.corriger(reponses, ex2_data, ex3_operands)
+        enonce = {"ex2_data": ex2_data, "ex3_operands": ex3_operands}
+        structures.append((enonce, reponses, scores, total_c, total_q))
+        corrections = binaire.construire_corrections(ex2_data, ex3_operands)
+        champ = rng.choice(sorted(reponses))
+        normalisations.append((reponses[champ], corrections[champ][0]))
+    ips = [(r[f"ex1_reseau_{m['id']}"],) for r in reseaux for m in reseau.MACHINES
+           if f"ex1_reseau_{m['id']}" in r][:n]
+
+    return {
+        ETALON: (_etalon, [(i,) for i in range(n)]),
+        "binaire.corriger": (binaire.corriger, binaires),
+        "binaire.construire_corrections": (binaire.construire_corrections,
+                                           [(e2, e3) for _, e2, e3 in binaires]),
+        "binaire.structurer_resultat": (binaire.structurer_resultat, structures),
+        "binaire.normaliser": (binaire.normaliser, normalisations),
+        "reseau.corriger_ex1": (reseau.corriger_ex1, [(r,) for r in reseaux]),
+        "reseau.corriger_ex2": (reseau.corriger_ex2, [(r,) for r in reseaux]),
+        "reseau.calculer_communications": (reseau.calculer_communications, [()] * n),
+        "reseau.normaliser_ip": (reseau.normaliser_ip, ips),
+    }
+
+
+def mesurer(cas_choisis, passes):
+    """{nom: durée par appel (µs)} de la meilleure passe sur tous les arguments.
+
+    Les fonctions sont alternées à chaque passe : un ralentissement passager
+    de la machine les touche toutes, au lieu de fausser une seule mesure.
+    """
+    meilleures = dict.fromkeys(cas_choisis, float("inf"))
+    for _ in range(passes):
+        for nom, (fonction, arguments) in cas_choisis.items():
+            debut = time.perf_counter()
+            for args in arguments:
+                fonction(*args)
+            meilleures[nom] = min(meilleures[nom], time.perf_counter() - debut)
+    return {nom: meilleures[nom] / len(cas_choisis[nom][1]) * 1e6 for nom in cas_choisis}
+
+
+def machine():
+    return {"python": platform.python_version(), "processeur": platform.processor()
+            or platform.machine(), "systeme": platform.system()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=2000, help="Feuilles par quiz")
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--passes", type=int, default=9)
+    parser.add_argument("--seuil", type=float, default=20.0,
+                        help="Ralentissement toléré en %% (par défaut : 20)")
+    parser.add_argument("--enregistrer", action="store_true",
+                        help=f"Écrire les mesures dans {os.path.basename(REFERENCE)}")
+    args = parser.parse_args()
+
+    tous = cas(args.n, args.graine)
+    # Référence mesurée plus longuement : elle sert à toutes les comparaisons.
+    mesures = mesurer(tous, 3 * args.passes if args.enregistrer else args.passes)
+
+    if args.enregistrer:
+        with open(REFERENCE, "w") as f:
+            json.dump({"machine": machine(), "n": args.n, "graine": args.graine,
+                       "mesures": {nom: round(us, 3) for nom, us in mesures.items()}},
+                      f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        for nom, us in mesures.items():
+            print(f"  {nom:<34} {us:9.2f} µs")
+        print(f"  référence écrite dans {os.path.relpath(REFERENCE)}")
+        return
+
+    try:
+        with open(REFERENCE) as f:
+            reference = json.load(f)
+    except FileNotFoundError:
+        sys.exit(f"Pas de référence : lancer d'abord avec --enregistrer ({REFERENCE})")
+    if reference["machine"] != machine():
+        print(f"  attention : référence mesurée sur {reference['machine']}")
+
+    def ecart(nom):
+        relatif = mesures[nom] / mesures[ETALON]
+        return (relatif / (reference["mesures"][nom] / reference["mesures"][ETALON]) - 1) * 100
+
+    connus = [nom for nom in mesures if nom in reference["mesures"] and nom != ETALON]
+    # Un dépassement est confirmé par une seconde mesure, plus longue, avant
+    # de faire échouer le script.
+    suspects = [nom for nom in connus if ecart(nom) > args.seuil]
+    if suspects:
+        mesures.update(mesurer({nom: tous[nom] for nom in [ETALON, *suspects]},
+                               2 * args.passes))
+    lents = [nom for nom in suspects if ecart(nom) > args.seuil]
+
+    print(f"  {'fonction':<34} {'réf. µs':>9} {'µs':>9} {'écart':>8}")
+    print(f"  {ETALON:<34} {reference['mesures'][ETALON]:9.2f} {mesures[ETALON]:9.2f}")
+    for nom, us in mesures.items():
+        if nom == ETALON:
+            continue
+        if nom not in reference["mesures"]:
+            print(f"  {nom:<34} {'—':>9} {us:9.2f}")
+            continue
+        print(f"  {nom:<34} {reference['mesures'][nom]:9.2f} {us:9.2f} {ecart(nom):+7.1f}%"
+              f"{'  ← trop lent' if nom in lents else ''}")
+
+    if lents:
+        print(f"  {len(lents)} fonction(s) ralentie(s) de plus de {args.seuil:g} % : "
+              f"{', '.join(lents)}")
+        sys.exit(1)
+    print(f"  aucune fonction ralentie de plus de {args.seuil:g} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Corrections binaire par seconde : ancien corriger() vs plan précompilé.
+
+L'ancienne implémentation (reconstruction complète des corrections et
+normaliser() par champ) est recopiée ici comme référence ; les deux doivent
+donner exactement les mêmes scores.
+"""
+
+import argparse
+import random
+import time
+
+from commun import feuille_binaire
+
+from quizzes.binaire.logic import corriger, dec_to_bcd  # noqa: E402
+
+
+# --- Implémentation d'origine ----------------------------------------------
+
+def ancien_construire_corrections(ex2_data, ex3_operands):
+    c = {}
+    for i in range(16):
+        c[f"ex1_bin_{i}"] = ("bin", i)
+        c[f"ex1_hex_{i}"] = ("hex", i)
+        if i < 10:
+            c[f"ex1_bcd_{i}"] = ("bcd", dec_to_bcd(i))
+    for row, given_col, dec_val in ex2_data:
+        if given_col != "dec":
+            c[f"ex2_dec_{row}"] = ("dec", dec_val)
+        if given_col != "bin":
+            c[f"ex2_bin_{row}"] = ("bin", dec_val)
+        if given_col != "hex":
+            c[f"ex2_hex_{row}"] = ("hex", dec_val)
+        if given_col != "bcd":
+            c[f"ex2_bcd_{row}"] = ("bcd", dec_to_bcd(dec_val))
+    tt = {
+        "not": {"0": "1", "1": "0"},
+        "and":  {"00": "0", "01": "0", "10": "0", "11": "1"},
+        "or":   {"00": "0", "01": "1", "10": "1", "11": "1"},
+        "xor":  {"00": "0", "01": "1", "10": "1", "11": "0"},
+        "nand": {"00": "1", "01": "1", "10": "1", "11": "0"},
+        "nor":  {"00": "1", "01": "0", "10": "0", "11": "0"},
+    }
+    for op, table in tt.items():
+        for inputs, output in table.items():
+            c[f"ex3_tt_{op}_{inputs}"] = ("bit", output)
+    for op in ("and", "or", "xor", "nand", "nor"):
+        for inputs, output in tt[op].items():
+            c[f"ex3_kn_{op}_{inputs}"] = ("bit", output)
+    a = ex3_operands["a"]
+    b = ex3_operands["b"]
+    c["ex3_bw_not"] = ("bw", f"{(~b & 0xFF):08b}")
+    c["ex3_bw_and"] = ("bw", f"{(a & b):08b}")
+    c["ex3_bw_or"] = ("bw", f"{(a | b):08b}")
+    c["ex3_bw_xor"] = ("bw", f"{(a ^ b):08b}")
+    c["ex3_bw_nand"] = ("bw", f"{(~(a & b) & 0xFF):08b}")
+    c["ex3_bw_nor"] = ("bw", f"{(~(a | b) & 0xFF):08b}")
+    return c
+
+
+def ancien_normaliser(valeur, type_champ):
+    s = valeur.strip().replace(" ", "")
+    if not s:
+        return None
+    try:
+        if type_champ == "dec":
+            return int(s)
+        elif type_champ == "hex":
+            return int(s, 16)
+        elif type_champ == "bin":
+            return int(s, 2)
+        elif type_champ in ("bcd", "bw", "bit"):
+            return s
+    except ValueError:
+        return None
+    return None
+
+
+def ancien_corriger(reponses, ex2_data, ex3_operands):
+    corrections = ancien_construire_corrections(ex2_data, ex3_operands)
+    scores = {1: [0, 0], 2: [0, 0], 3: [0, 0]}
+    for champ, (type_champ, valeur_correcte) in corrections.items():
+        exo = int(champ[2])
+        scores[exo][1] += 1
+        norm = ancien_normaliser(reponses.get(champ, ""), type_champ)
+        if norm is not None and norm == valeur_correcte:
+            scores[exo][0] += 1
+    total_c = sum(s[0] for s in scores.values())
+    total_q = sum(s[1] for s in scores.values())
+    return scores, total_c, total_q
+
+
+# ---------------------------------------------------------------------------
+
+def chronometrer(fonction, feuilles):
+    debut = time.perf_counter()
+    resultats = [fonction(*f) for f in feuilles]
+    return time.perf_counter() - debut, resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=10_000, help="Nombre de feuilles")
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.graine)
+    feuilles = [feuille_binaire(rng) for _ in range(args.n)]
+
+    t_ancien, r_ancien = chronometrer(ancien_corriger, feuilles)
+    t_plan, r_plan = chronometrer(corriger, feuilles)
+    if r_ancien != r_plan:
+        raise SystemExit("Les deux corrections ne donnent pas les mêmes scores")
+
+    for libelle, t in (("ancien corriger", t_ancien), ("plan précompilé", t_plan)):
+        print(f"  {libelle:<16} {args.n / t:10.0f} corrections/s")
+    print(f"  gain : x{t_ancien / t_plan:.1f} (scores identiques sur {args.n} feuilles)")
+
+
+if __name__ == "__main__":
+    main()
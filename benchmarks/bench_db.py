@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Ouverture d'une connexion par appel vs connexions du pool de db.get_db."""
+
+import argparse
+import sqlite3
+import time
+
+from commun import base_temporaire
+
+base_temporaire()
+
+import db  # noqa: E402
+
+REQUETE = "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?"
+
+
+def ancien_get_db():
+    """get_db() d'origine : connexion neuve et PRAGMA à chaque appel."""
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def chronometrer(ouvrir, n):
+    debut = time.perf_counter()
+    for _ in range(n):
+        conn = ouvrir()
+        conn.execute(REQUETE, ("binaire",)).fetchone()
+        conn.close()
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=5000, help="Nombre d'appels")
+    args = parser.parse_args()
+
+    db.init_db()
+    conn = db.get_db()
+    conn.execute("INSERT OR IGNORE INTO quiz_config (quiz_id) VALUES ('binaire')")
+    conn.commit()
+    conn.close()
+
+    t_ancien = chronometrer(ancien_get_db, args.n)
+    t_pool = chronometrer(db.get_db, args.n)
+
+    for libelle, t in (("connexion par appel", t_ancien), ("pool", t_pool)):
+        print(f"  {libelle:<20} {t * 1e6 / args.n:8.1f} µs / appel")
+    print(f"  gain : x{t_ancien / t_pool:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Démarrage d'un worker : quiz chargés au démarrage ou à la première requête.
+
+Chaque mesure lance un processus Python neuf (comme un worker gunicorn)
+qui crée l'application, puis relève sa mémoire (VmRSS), la durée de la
+première requête sur un quiz et la mémoire une fois tous les quiz visités.
+Avec les 2 quiz du dépôt, puis avec 20 quiz synthétiques de plus : des
+copies de quizzes/reseau/ renommées, écrites dans un dossier temporaire
+ajouté à quizzes.__path__.
+
+    au démarrage     QUIZ_PARESSEUX=0
+    à la demande     QUIZ_PARESSEUX=1 (par défaut)
+"""
+
+import argparse
+import compileall
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from commun import RACINE
+
+MODELE = "reseau"
+
+
+def memoire():
+    """Mémoire résidente du processus, en Mo (Linux)."""
+    with open("/proc/self/status") as f:
+        for ligne in f:
+            if ligne.startswith("VmRSS:"):
+                return int(ligne.split()[1]) / 1024
+    return 0.0
+
+
+def synthetiser(dossier, nombre):
+    """Écrit nombre copies de quizzes/reseau/ (synth01, synth02...) dans dossier."""
+    source = os.path.join(RACINE, "quizzes", MODELE)
+    for n in range(1, nombre + 1):
+        quiz_id = f"synth{n:02d}"
+        cible = os.path.join(dossier, quiz_id)
+        shutil.copytree(source, cible, ignore=shutil.ignore_patterns("__pycache__", "*.gz", "*.br"))
+        os.rename(os.path.join(cible, "templates", MODELE), os.path.join(cible, "templates", quiz_id))
+        for racine, _, fichiers in os.walk(cible):
+            for fichier in fichiers:
+                if not fichier.endswith((".py", ".html", ".css", ".js")):
+                    continue
+                chemin = os.path.join(racine, fichier)
+                with open(chemin, encoding="utf-8") as f:
+                    texte = f.read()
+                with open(chemin, "w", encoding="utf-8") as f:
+                    f.write(texte.replace(MODELE, quiz_id))
+        with open(os.path.join(cible, "quiz.json"), "w", encoding="utf-8") as f:
+            json.dump({"titre": f"Quiz synthétique {n}", "description": "Copie de réseau"}, f)
+    compileall.compile_dir(dossier, quiet=1)
+
+
+def enfant(data_dir, synthetiques):
+    """Processus mesuré : imprime démarrage (ms), mémoire (Mo) et première requête (ms)."""
+    import db
+    import quizzes
+
+    db.DATA_DIR = data_dir
+    db.DB_PATH = os.path.join(data_dir, "resultats.db")
+    db.CONFIG_VERSION_PATH = os.path.join(data_dir, "quiz_config.version")
+    if synthetiques:
+        quizzes.__path__.append(synthetiques)
+
+    debut = time.perf_counter()
+    from app import app
+    mesures = {"demarrage": (time.perf_counter() - debut) * 1000, "memoire": memoire()}
+
+    client = app.test_client()
+    client.get("/")
+    debut = time.perf_counter()
+    client.get(f"/{MODELE}/")
+    mesures["premiere"] = (time.perf_counter() - debut) * 1000
+    for quiz_id in quizzes.QUIZ_REGISTRY:
+        client.get(f"/{quiz_id}/")
+    mesures["memoire_tous"] = memoire()
+    mesures["quiz"] = len(quizzes.QUIZ_REGISTRY)
+    print(json.dumps(mesures))
+
+
+def mesurer(data_dir, synthetiques, paresseux):
+    env = dict(os.environ, QUIZ_PARESSEUX="1" if paresseux else "0")
+    commande = [sys.executable, os.path.abspath(__file__), "--enfant", data_dir]
+    if synthetiques:
+        commande += ["--dossier", synthetiques]
+    sortie = subprocess.run(
+        commande, env=env, cwd=RACINE, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(sortie.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-r", "--repetitions", type=int, default=5)
+    parser.add_argument("-s", "--synthetiques", type=int, default=20,
+                        help="Quiz synthétiques ajoutés (par défaut : 20)")
+    parser.add_argument("--enfant", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    parser.add_argument("--dossier", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.enfant:
+        enfant(args.enfant, args.dossier)
+        return
+
+    dossier = tempfile.mkdtemp(prefix="quiz-bench-synth-")
+    data_dir = tempfile.mkdtemp(prefix="quiz-bench-")
+    try:
+        synthetiser(dossier, args.synthetiques)
+        print(f"  médianes sur {args.repetitions} processus")
+        print(f"  {'':<24} {'démarrage':>10} {'mémoire':>9} {'1re requête quiz':>17} "
+              f"{'tous visités':>13}")
+        for synthetiques in (None, dossier):
+            for libelle, paresseux in (("au démarrage", False), ("à la demande", True)):
+                # Un passage à blanc : data/jinja/ et quiz_config déjà écrits.
+                mesurer(data_dir, synthetiques, paresseux)
+                resultats = [mesurer(data_dir, synthetiques, paresseux)
+                             for _ in range(args.repetitions)]
+
+                def mediane(cle):
+                    return statistics.median(m[cle] for m in resultats)
+                nom = f"{resultats[0]['quiz']} quiz, {libelle}"
+                print(f"  {nom:<24} {mediane('demarrage'):>7.1f} ms {mediane('memoire'):>6.1f} Mo "
+                      f"{mediane('premiere'):>14.1f} ms {mediane('memoire_tous'):>10.1f} Mo")
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
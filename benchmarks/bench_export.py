@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""/admin/export sur N soumissions : export par blocs contre export construit en mémoire.
+
+Chaque scénario tourne dans un processus séparé, dont on relève la mémoire
+résidente de pointe (VmHWM). On mesure aussi une synchronisation avec
+If-Modified-Since quand rien n'a changé (réponse 304).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from commun import base_temporaire, peupler_binaire
+
+base_temporaire()
+
+import config  # noqa: E402
+import db  # noqa: E402
+from app import create_app  # noqa: E402
+from export import generer_export  # noqa: E402
+
+
+def client_admin():
+    client = create_app().test_client()
+    client.post("/admin/login", data={"password": config.ADMIN_PASSWORD})
+    return client
+
+
+def par_blocs(format_):
+    """Le worker n'a jamais plus d'un bloc en main."""
+    reponse = client_admin().get(f"/admin/export/binaire?format={format_}", buffered=False)
+    octets = blocs = 0
+    for bloc in reponse.response:
+        octets += len(bloc)
+        blocs += 1
+    reponse.close()
+    return octets, blocs
+
+
+def en_memoire(format_):
+    """Ce qu'on obtiendrait en construisant tout l'export avant de l'envoyer."""
+    contenu = "".join(generer_export("binaire", format_)).encode()
+    return len(contenu), 1
+
+
+SCENARIOS = {
+    "csv par blocs": (par_blocs, "csv"),
+    "csv en mémoire": (en_memoire, "csv"),
+    "ndjson par blocs": (par_blocs, "ndjson"),
+}
+
+
+def mesurer(libelle):
+    fonction, format_ = SCENARIOS[libelle]
+    debut = time.perf_counter()
+    octets, blocs = fonction(format_)
+    duree = time.perf_counter() - debut
+    with open("/proc/self/status") as status:
+        pointe = next(int(l.split()[1]) for l in status if l.startswith("VmHWM")) / 1024
+    print(f"  {libelle:<18} {duree:6.2f} s  {octets / 1e6:7.1f} Mo en {blocs:>5} bloc(s)  "
+          f"RSS de pointe {pointe:7.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=100_000)
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        db.DATA_DIR = args.data
+        db.DB_PATH = os.path.join(args.data, "resultats.db")
+        db.CONFIG_VERSION_PATH = os.path.join(args.data, "quiz_config.version")
+        mesurer(args.scenario)
+        return
+
+    db.init_db()
+    db.vider_pool()
+    print(f"  insertion de {args.n} soumissions...")
+    peupler_binaire(args.n, 42)
+    time.sleep(1)  # Last-Modified n'est envoyé qu'une fois la seconde écoulée
+
+    for libelle in SCENARIOS:
+        subprocess.run([sys.executable, __file__, "--scenario", libelle, "--data", db.DATA_DIR],
+                       check=True)
+
+    client = client_admin()
+    derniere = client.head("/admin/export/binaire").headers["Last-Modified"]
+    debut = time.perf_counter()
+    for _ in range(100):
+        reponse = client.get("/admin/export/binaire", headers={"If-Modified-Since": derniere})
+        assert reponse.status_code == 304
+    print(f"  synchronisation sans changement (304) : "
+          f"{(time.perf_counter() - debut) * 10:.2f} ms par requête")
+
+
+if __name__ == "__main__":
+    main()
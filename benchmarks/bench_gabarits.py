@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Premières pages d'un worker neuf : gabarits compilés à la demande ou au démarrage.
+
+Chaque mesure lance un processus Python neuf (comme un worker gunicorn
+après un déploiement) qui crée l'application puis sert le parcours d'un
+étudiant (accueil, accueil du quiz, chaque exercice, confirmation) deux
+fois : la première fois compile les gabarits à la demande s'ils ne l'ont
+pas été au démarrage, la seconde donne le régime établi.
+
+    sans cache       GABARITS_CACHE=0, compilation à la première requête
+    cache vide       premier démarrage après un déploiement
+    cache rempli     redémarrage d'un worker, data/jinja/ déjà écrit
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from commun import RACINE
+
+
+def parcours(client, quiz_id, total):
+    """Durées (s) des pages d'un étudiant en mode entraînement."""
+    durees = []
+
+    def vue(methode, url, **kwargs):
+        debut = time.perf_counter()
+        getattr(client, methode)(url, **kwargs)
+        durees.append(time.perf_counter() - debut)
+
+    vue("get", "/")
+    vue("get", f"/{quiz_id}/")
+    vue("post", f"/{quiz_id}/start", data={"nom": "Bench", "prenom": "Etudiant"})
+    for n in range(1, total + 1):
+        vue("get", f"/{quiz_id}/exercice/{n}")
+        vue("post", f"/{quiz_id}/exercice/{n}", data={"direction": "next"})
+    vue("get", f"/{quiz_id}/confirmation")
+    return durees
+
+
+def enfant(data_dir):
+    """Processus mesuré : imprime démarrage, premier et second parcours (ms)."""
+    import importlib
+
+    import db
+
+    db.DATA_DIR = data_dir
+    db.DB_PATH = os.path.join(data_dir, "resultats.db")
+    db.CONFIG_VERSION_PATH = os.path.join(data_dir, "quiz_config.version")
+
+    debut = time.perf_counter()
+    from app import app
+    demarrage = time.perf_counter() - debut
+
+    mesures = {"demarrage": demarrage * 1000}
+    for passage in ("premier", "second"):
+        durees = []
+        for quiz_id in ("binaire", "reseau"):
+            total = importlib.import_module(f"quizzes.{quiz_id}").TOTAL_EXERCICES
+            durees += parcours(app.test_client(), quiz_id, total)
+        mesures[passage] = sum(durees) * 1000
+        mesures[f"{passage}_max"] = max(durees) * 1000
+    print(json.dumps(mesures))
+
+
+def mesurer(data_dir, cache):
+    env = dict(os.environ, GABARITS_CACHE="1" if cache else "0")
+    sortie = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--enfant", data_dir],
+        env=env, cwd=RACINE, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(sortie.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-r", "--repetitions", type=int, default=5)
+    parser.add_argument("--enfant", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.enfant:
+        enfant(args.enfant)
+        return
+
+    resultats = {"sans cache": [], "cache vide": [], "cache rempli": []}
+    for _ in range(args.repetitions):
+        data_dir = tempfile.mkdtemp(prefix="quiz-bench-")
+        try:
+            resultats["sans cache"].append(mesurer(data_dir, False))
+            shutil.rmtree(os.path.join(data_dir, "jinja"), ignore_errors=True)
+            resultats["cache vide"].append(mesurer(data_dir, True))
+            resultats["cache rempli"].append(mesurer(data_dir, True))
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"  médianes sur {args.repetitions} processus, en ms")
+    print(f"  {'':<14} {'démarrage':>10} {'1er parcours':>13} {'page max':>9} "
+          f"{'2e parcours':>12}")
+    for libelle, mesures in resultats.items():
+        def mediane(cle):
+            return statistics.median(m[cle] for m in mesures)
+        print(f"  {libelle:<14} {mediane('demarrage'):>10.1f} {mediane('premier'):>13.1f} "
+              f"{mediane('premier_max'):>9.1f} {mediane('second'):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""lister.py sur N soumissions : ancien parcours (fetchall + json.loads) contre curseur.
+
+La sortie est écrite dans /dev/null. Chaque scénario tourne dans un
+processus séparé, dont on relève la mémoire résidente de pointe (VmHWM).
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from commun import base_temporaire, feuille_binaire
+
+base_temporaire()
+
+import db  # noqa: E402
+import lister  # noqa: E402
+from quizzes.binaire.logic import corriger, structurer_resultat  # noqa: E402
+
+NOMS = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand"]
+
+
+def peupler(n, graine):
+    """Insère n soumissions dont le JSON donnees a la taille d'une vraie soumission."""
+    rng = random.Random(graine)
+    reponses, ex2_data, ex3_operands = feuille_binaire(rng)
+    scores, total_c, total_q = corriger(reponses, ex2_data, ex3_operands)
+    enonce = {"ex2_data": ex2_data, "ex3_operands": ex3_operands}
+    modele = structurer_resultat(enonce, reponses, scores, total_c, total_q)
+
+    conn = db.connecter()
+    for debut in range(0, n, 50_000):
+        lignes = []
+        for i in range(debut, min(n, debut + 50_000)):
+            quiz_id = "binaire" if i % 3 else "reseau"
+            nom = rng.choice(NOMS)
+            date = f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T{8 + i % 10:02d}:{i % 60:02d}:00"
+            correct = rng.randrange(total_q + 1)
+            entree = {"code": f"{i:06d}", "nom": nom, "prenom": "Prénom", "date": date}
+            entree.update(modele, score_total={"correct": correct, "total": total_q})
+            lignes.append({
+                "quiz_id": quiz_id, "code": entree["code"], "nom": nom, "prenom": "Prénom",
+                "date": date, "score_total_correct": correct, "score_total_total": total_q,
+                "donnees": json.dumps(entree, ensure_ascii=False),
+            })
+        db.inserer_resultats(conn, lignes)
+        conn.commit()
+    conn.fermer()
+
+
+def ancien(sortie):
+    """L'ancien lister.py, à l'affichage près."""
+    conn = db.connecter()
+    rows = conn.execute(
+        "SELECT quiz_id, donnees FROM resultats ORDER BY quiz_id, date"
+    ).fetchall()
+    conn.fermer()
+    for row in rows:
+        r = json.loads(row["donnees"])
+        sc = r.get("score_total", {})
+        score = f"{sc.get('correct', '?')}/{sc.get('total', '?')}"
+        dt = datetime.fromisoformat(r["date"]).strftime("%d-%m-%Y %H:%M")
+        sortie.write(f"  {row['quiz_id']:<8} {r['nom']:<14} {r['prenom']:<14} "
+                     f"{r['code']:<6} {dt:<16} {score:>7}\n")
+
+
+def nouveau(sortie, format_="table", **filtres):
+    selection, ecrire = lister.FORMATS[format_]
+    sql, params = lister.construire_requete(selection=selection, **filtres)
+    conn = db.connecter()
+    conn.row_factory = None
+    ecrire(conn.execute(sql, params), sortie)
+    conn.fermer()
+
+
+SCENARIOS = {
+    "ancien (fetchall + json.loads)": (ancien, {}),
+    "curseur, table": (nouveau, {}),
+    "curseur, csv": (nouveau, {"format_": "csv"}),
+    "curseur, json": (nouveau, {"format_": "json"}),
+    "--quiz binaire --since/--until": (nouveau, {"quiz": "binaire", "depuis": "2026-03-01",
+                                                 "jusqua": "2026-03-31"}),
+    "--quiz binaire --score-min 40": (nouveau, {"quiz": "binaire", "score_min": 40}),
+    "--nom dub": (nouveau, {"nom": "dub"}),
+}
+
+
+def mesurer(libelle):
+    """Exécuté dans le processus fils : affiche durée et mémoire de pointe."""
+    fonction, kwargs = SCENARIOS[libelle]
+    with open(os.devnull, "w") as sortie:
+        debut = time.perf_counter()
+        fonction(sortie, **kwargs)
+        duree = time.perf_counter() - debut
+    # ru_maxrss survit à exec() et reprendrait la pointe du parent : VmHWM non.
+    with open("/proc/self/status") as status:
+        pointe = next(int(l.split()[1]) for l in status if l.startswith("VmHWM")) / 1024
+    print(f"  {libelle:<32} {duree:6.2f} s   RSS de pointe {pointe:7.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=500_000)
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        db.DATA_DIR = args.data
+        db.DB_PATH = os.path.join(args.data, "resultats.db")
+        mesurer(args.scenario)
+        return
+
+    db.init_db()
+    db.vider_pool()
+    print(f"  insertion de {args.n} soumissions...")
+    peupler(args.n, 42)
+
+    for libelle in SCENARIOS:
+        subprocess.run([sys.executable, __file__, "--scenario", libelle, "--data", db.DATA_DIR],
+                       check=True)
+
+
+if __name__ == "__main__":
+    main()
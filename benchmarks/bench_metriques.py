@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Coût des métriques par requête : même parcours étudiant, collecte active ou non.
+
+Deux applications sur la même base temporaire, l'une avec METRIQUES=1,
+l'autre sans. Les parcours sont alternés et on retient le meilleur de
+chaque côté ; l'écart par requête est le coût de la collecte (chronomètres,
+trace callback, écriture périodique du fichier du worker).
+"""
+
+import argparse
+import time
+
+from commun import base_temporaire
+
+base_temporaire()
+
+import config  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def parcours(client, admin, polls):
+    """Un étudiant en mode test sur le quiz réseau. Retourne le nombre de requêtes."""
+    requetes = 0
+
+    def vue(methode, url, **kwargs):
+        nonlocal requetes
+        getattr(client, methode)(url, **kwargs)
+        requetes += 1
+
+    vue("get", "/reseau/")
+    vue("post", "/reseau/start", data={"nom": "Bench", "prenom": "Etudiant"})
+    vue("get", "/reseau/attente")
+    for _ in range(polls):
+        vue("get", "/reseau/attente/status")
+    admin.post("/admin/toggle/reseau/ouvert")
+    for n in (1, 2):
+        vue("get", f"/reseau/exercice/{n}")
+        vue("post", f"/reseau/exercice/{n}", data={"direction": "next"})
+    vue("get", "/reseau/confirmation")
+    admin.post("/admin/toggle/reseau/ouvert")
+    return requetes
+
+
+def application(metriques):
+    config.METRIQUES = metriques
+    app = create_app()
+    admin = app.test_client()
+    admin.post("/admin/login", data={"password": config.ADMIN_PASSWORD})
+    return app, admin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=50, help="Étudiants par passe")
+    parser.add_argument("--passes", type=int, default=5)
+    parser.add_argument("--polls", type=int, default=20,
+                        help="Nombre de polls /attente/status par étudiant")
+    args = parser.parse_args()
+
+    applications = {"sans": application(False), "avec": application(True)}
+    applications["sans"][1].post("/admin/toggle/reseau/mode")
+
+    meilleures = dict.fromkeys(applications, float("inf"))
+    for _ in range(args.passes):
+        for libelle, (app, admin) in applications.items():
+            requetes = 0
+            debut = time.perf_counter()
+            for _ in range(args.n):
+                requetes += parcours(app.test_client(), admin, args.polls)
+            meilleures[libelle] = min(meilleures[libelle],
+                                      (time.perf_counter() - debut) / requetes)
+
+    for libelle, duree in meilleures.items():
+        print(f"  {libelle + ' métriques':<16} {duree * 1e6:8.1f} µs par requête")
+    ecart = meilleures["avec"] - meilleures["sans"]
+    print(f"  coût            {ecart * 1e6:+8.1f} µs par requête "
+          f"({ecart / meilleures['sans']:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Requêtes SQL par page vue étudiant, avec et sans cache de quiz_config.
+
+Le scénario « sans cache » invalide la version avant chaque requête, ce qui
+reproduit l'ancien comportement (une lecture de quiz_config par requête).
+"""
+
+import argparse
+
+from commun import base_temporaire, CompteurRequetes
+
+base_temporaire()
+
+import db  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def parcours(client, admin, invalider, polls):
+    """Un étudiant complet en mode test. Retourne la liste des pages vues."""
+    pages = []
+
+    def vue(methode, url, **kwargs):
+        if invalider:
+            db.signaler_changement_config()
+        getattr(client, methode)(url, **kwargs)
+        pages.append(url)
+
+    vue("get", "/")
+    vue("get", "/reseau/")
+    vue("post", "/reseau/start", data={"nom": "Bench", "prenom": "Etudiant"})
+    vue("get", "/reseau/attente")
+    for _ in range(polls):
+        vue("get", "/reseau/attente/status")
+    admin.post("/admin/toggle/reseau/ouvert")
+    vue("get", "/reseau/attente/status")
+    vue("get", "/reseau/exercice/1")
+    vue("post", "/reseau/exercice/1", data={"direction": "next"})
+    vue("get", "/reseau/exercice/2")
+    vue("post", "/reseau/exercice/2", data={"direction": "next"})
+    admin.post("/admin/toggle/reseau/ouvert")
+    return pages
+
+
+def mesurer(app, admin, invalider, polls):
+    etudiant = app.test_client()
+    with CompteurRequetes() as compteur:
+        # Les bascules admin sont des écritures légitimes : on ne les compte pas.
+        pages = parcours(etudiant, _SansCompte(admin, compteur), invalider, polls)
+    return compteur.total, len(pages)
+
+
+class _SansCompte:
+    """Client admin dont les requêtes ne sont pas comptabilisées."""
+
+    def __init__(self, client, compteur):
+        self.client = client
+        self.compteur = compteur
+
+    def post(self, *args, **kwargs):
+        avant = self.compteur.total
+        self.client.post(*args, **kwargs)
+        self.compteur.total = avant
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=20,
+                        help="Nombre de polls /attente/status par étudiant")
+    args = parser.parse_args()
+
+    # La collecte des métriques remplace le traceur de CompteurRequetes.
+    config.METRIQUES = False
+    app = create_app()
+    admin = app.test_client()
+    admin.post("/admin/login", data={"password": config.ADMIN_PASSWORD})
+    admin.post("/admin/toggle/reseau/mode")
+
+    for libelle, invalider in (("sans cache", True), ("avec cache", False)):
+        requetes, pages = mesurer(app, admin, invalider, args.polls)
+        print(f"  {libelle:<12} {requetes:>4} requêtes SQL / {pages} pages "
+              f"= {requetes / pages:.2f} par page vue")
+
+
+if __name__ == "__main__":
+    main()
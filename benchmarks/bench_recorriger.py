@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Durée de recorriger.py sur N soumissions binaire synthétiques."""
+
+import argparse
+import time
+
+from commun import base_temporaire, peupler_binaire
+
+base_temporaire()
+
+import db  # noqa: E402
+from recorriger import recorriger_quiz, formater_resume  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100_000)
+    parser.add_argument("-p", "--processus", type=int, nargs="+", default=[0, 4])
+    args = parser.parse_args()
+
+    db.init_db()
+    db.vider_pool()
+    print(f"  insertion de {args.n} soumissions...")
+    peupler_binaire(args.n, 42, fausses=10)
+
+    for processus in args.processus:
+        debut = time.perf_counter()
+        resume = recorriger_quiz("binaire", processus=processus, simulation=True)
+        duree = time.perf_counter() - debut
+        print(f"  pool={processus}  {duree:6.1f} s  ({args.n / duree:,.0f} soumissions/s)")
+    print(formater_resume(resume))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Résumé des scores du tableau de bord : tables resumes_* contre parcours de resultats.
+
+Le parcours calcule les mêmes chiffres (effectif, moyenne, médiane, moyenne
+par exercice via json_extract) directement sur resultats. On mesure aussi
+le surcoût de la mise à jour des résumés dans la transaction d'insertion.
+"""
+
+import argparse
+import json
+import time
+
+from commun import base_temporaire, peupler_binaire
+
+base_temporaire()
+
+import db  # noqa: E402
+
+
+def parcours(conn, quiz_id):
+    """Ce que demanderait le tableau de bord sans résumés matérialisés."""
+    nombre, moyenne = conn.execute(
+        "SELECT COUNT(*), AVG(score_total_correct) FROM resultats WHERE quiz_id=?",
+        (quiz_id,),
+    ).fetchone()
+    milieu = conn.execute(
+        "SELECT AVG(score_total_correct) FROM (SELECT score_total_correct FROM resultats "
+        "WHERE quiz_id=? ORDER BY score_total_correct LIMIT 2 - ? % 2 OFFSET (? - 1) / 2)",
+        (quiz_id, nombre, nombre),
+    ).fetchone()[0]
+    exercices = conn.execute(
+        "SELECT " + ", ".join(
+            f"AVG(json_extract(donnees, '$.exercice{n}.score.correct'))" for n in (1, 2, 3)
+        ) + " FROM resultats WHERE quiz_id=?",
+        (quiz_id,),
+    ).fetchone()
+    return nombre, moyenne, milieu, exercices
+
+
+def chrono(libelle, fonction, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        resultat = fonction()
+    duree = (time.perf_counter() - debut) / repetitions
+    print(f"  {libelle:<36} {duree * 1000:9.3f} ms par lecture")
+    return resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=50_000)
+    args = parser.parse_args()
+
+    db.init_db()
+    db.vider_pool()
+    print(f"  insertion de {args.n} soumissions...")
+    peupler_binaire(args.n, 42)
+
+    conn = db.connecter()
+    print(f"Résumé du quiz binaire ({args.n} soumissions) :")
+    scan = chrono("parcours de resultats", lambda: parcours(conn, "binaire"), 5)
+    resume = chrono("tables resumes_* (lire_resume)", lambda: db.lire_resume("binaire"), 200)
+    print(f"    parcours : {scan[0]} soumissions, moyenne {scan[1]:.2f}, médiane {scan[2]}")
+    print(f"    résumé   : {resume['nombre']} soumissions, moyenne {resume['moyenne']}, "
+          f"médiane {resume['mediane']}")
+
+    # Surcoût par soumission : même transaction avec et sans ajouter_resumes.
+    lignes = [dict(row) for row in conn.execute(
+        "SELECT quiz_id, date, score_total_correct, donnees FROM resultats LIMIT 1000"
+    )]
+    for ligne in lignes:
+        ligne["exercices"] = db.scores_exercices(json.loads(ligne["donnees"]))
+    debut = time.perf_counter()
+    for ligne in lignes:
+        db.ajouter_resumes(conn, [ligne])
+        db.ajouter_resumes(conn, [ligne], signe=-1)
+    conn.rollback()
+    duree = (time.perf_counter() - debut) / (2 * len(lignes))
+    print(f"  mise à jour des résumés à l'insertion    {duree * 1e6:7.1f} µs par soumission")
+    conn.fermer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Octets envoyés par un étudiant : formulaires complets contre sauvegarde auto.
+
+Scénario : l'étudiant remplit chaque exercice puis revient une fois en
+arrière corriger un champ de l'exercice précédent. Avec les formulaires,
+chaque navigation reposte la page entière ; avec autosave.js, chaque champ
+saisi part seul en JSON (un envoi par champ, le pire cas pour le délai de
+regroupement) et la navigation est un GET sans corps.
+"""
+
+import importlib
+import json
+import random
+import re
+from urllib.parse import urlencode
+
+from commun import base_temporaire
+
+base_temporaire()
+
+from app import create_app  # noqa: E402
+
+CHAMP = re.compile(r'<input[^>]*type="(text|checkbox)"[^>]*name="(\w+)"')
+
+
+def champs_exercice(client, quiz_id, n):
+    page = client.get(f"/{quiz_id}/exercice/{n}").get_data(as_text=True)
+    return {nom: "on" if type_ == "checkbox" else format(random.randrange(256), "08b")
+            for type_, nom in CHAMP.findall(page)}
+
+
+def parcours(app, quiz_id, autosave):
+    total = importlib.import_module(f"quizzes.{quiz_id}").TOTAL_EXERCICES
+    client = app.test_client()
+    client.post(f"/{quiz_id}/start", data={"nom": "Bench", "prenom": "Etudiant"})
+    octets = requetes = plus_gros = 0
+    saisies = {}
+    for n in range(1, total + 1):
+        saisies[n] = champs_exercice(client, quiz_id, n)
+    # Ordre de navigation : 1, 2, ..., total, retour à total-1, puis total.
+    ordre = list(range(1, total + 1)) + [total - 1, total]
+    for etape, n in enumerate(ordre):
+        if etape >= total:
+            # Correction d'un seul champ lors du retour.
+            nom = next(iter(saisies[n]))
+            saisies[n][nom] = "11111111"
+            modifies = {nom: saisies[n][nom]}
+        else:
+            modifies = dict(saisies[n])
+        direction = "prev" if etape == total - 1 else "next"
+        if autosave:
+            for nom, valeur in modifies.items():
+                corps = json.dumps({nom: valeur})
+                r = client.post(f"/{quiz_id}/sauvegarde", data=corps,
+                                content_type="application/json")
+                assert r.status_code == 200, r.get_data(as_text=True)
+                octets += len(corps)
+                requetes += 1
+                plus_gros = max(plus_gros, len(corps))
+        else:
+            data = dict(saisies[n], direction=direction)
+            corps = urlencode(data)
+            client.post(f"/{quiz_id}/exercice/{n}", data=data)
+            octets += len(corps)
+            requetes += 1
+            plus_gros = max(plus_gros, len(corps))
+    client.get(f"/{quiz_id}/confirmation")
+    return octets, requetes, plus_gros
+
+
+def main():
+    app = create_app()
+    for quiz_id in ("binaire", "reseau"):
+        print(f"{quiz_id} :")
+        for libelle, autosave in (("formulaires", False), ("autosave", True)):
+            octets, requetes, plus_gros = parcours(app, quiz_id, autosave)
+            print(f"  {libelle:<12} {octets:>6} o de corps en {requetes:>3} POST, "
+                  f"{plus_gros:>5} o au plus par POST")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Octets de cookie échangés par page vue : session cookie contre session serveur.
+
+Parcours complet d'un étudiant en mode test (salle d'attente avec polls,
+tous les champs de chaque exercice remplis, confirmation). On compte, pour
+chaque requête, l'en-tête Cookie envoyé et les en-têtes Set-Cookie reçus.
+"""
+
+import argparse
+import importlib
+import random
+import re
+
+from commun import base_temporaire
+
+base_temporaire()
+
+import config  # noqa: E402
+from app import create_app  # noqa: E402
+from flask.sessions import SecureCookieSessionInterface  # noqa: E402
+from sessions import InterfaceSessionServeur  # noqa: E402
+
+CHAMP = re.compile(r'<input[^>]*type="(text|checkbox)"[^>]*name="(\w+)"')
+
+
+class Mesure:
+    def __init__(self, client):
+        self.client = client
+        self.pages = 0
+        self.envoyes = 0
+        self.recus = 0
+        self.max_cookie = 0
+
+    def vue(self, methode, url, **kwargs):
+        cookie = self.client.get_cookie("session")
+        taille = len("session=") + len(cookie.value) if cookie else 0
+        self.envoyes += taille
+        self.max_cookie = max(self.max_cookie, taille)
+        reponse = getattr(self.client, methode)(url, **kwargs)
+        self.recus += sum(len(v) for v in reponse.headers.getlist("Set-Cookie"))
+        self.pages += 1
+        return reponse
+
+
+def parcours(mesure, admin, quiz_id, polls):
+    total = importlib.import_module(f"quizzes.{quiz_id}").TOTAL_EXERCICES
+    mesure.vue("get", f"/{quiz_id}/")
+    mesure.vue("post", f"/{quiz_id}/start", data={"nom": "Bench", "prenom": "Etudiant"})
+    mesure.vue("get", f"/{quiz_id}/attente")
+    for _ in range(polls):
+        mesure.vue("get", f"/{quiz_id}/attente/status")
+    admin.post(f"/admin/toggle/{quiz_id}/ouvert")
+    for n in range(1, total + 1):
+        page = mesure.vue("get", f"/{quiz_id}/exercice/{n}").get_data(as_text=True)
+        # Réponses de longueur réaliste : un octet en binaire par champ texte.
+        data = {nom: "on" if type_ == "checkbox" else format(random.randrange(256), "08b")
+                for type_, nom in CHAMP.findall(page)}
+        data["direction"] = "next"
+        mesure.vue("post", f"/{quiz_id}/exercice/{n}", data=data)
+    mesure.vue("get", f"/{quiz_id}/confirmation")
+    admin.post(f"/admin/toggle/{quiz_id}/ouvert")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=20,
+                        help="Nombre de polls /attente/status par étudiant")
+    args = parser.parse_args()
+
+    app = create_app()
+    admin = app.test_client()
+    admin.post("/admin/login", data={"password": config.ADMIN_PASSWORD})
+
+    for quiz_id in ("binaire", "reseau"):
+        admin.post(f"/admin/toggle/{quiz_id}/mode")
+        print(f"{quiz_id} :")
+        for libelle, interface in (("cookie", SecureCookieSessionInterface()),
+                                   ("serveur", InterfaceSessionServeur())):
+            # L'admin garde toujours le même type de session que l'étudiant.
+            app.session_interface = interface
+            admin.post("/admin/login", data={"password": config.ADMIN_PASSWORD})
+            mesure = Mesure(app.test_client())
+            parcours(mesure, admin, quiz_id, args.polls)
+            print(f"  {libelle:<8} {mesure.pages} pages, cookie max {mesure.max_cookie:>5} o, "
+                  f"envoyés {mesure.envoyes / mesure.pages:7.1f} o/page, "
+                  f"Set-Cookie {mesure.recus / mesure.pages:6.1f} o/page")
+
+
+if __name__ == "__main__":
+    main()
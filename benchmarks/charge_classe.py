@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Test de charge : une classe d'étudiants virtuels passe un test du début à la fin.
+
+Chaque étudiant ouvre l'accueil, démarre le quiz, arrive en salle
+d'attente et l'interroge ; quand tous attendent, l'admin ouvre le test et
+chacun enchaîne interrogation de la salle d'attente, GET et POST de chaque
+exercice, puis /confirmation. Les étudiants sont répartis entre les quiz
+demandés (les deux par défaut), qui tournent donc en même temps.
+
+Trois façons de servir l'application :
+
+    python3 benchmarks/charge_classe.py                        # dans ce processus
+    python3 benchmarks/charge_classe.py --gunicorn -w 4        # gunicorn local
+    python3 benchmarks/charge_classe.py --gunicorn -k gevent   # workers gevent
+    python3 benchmarks/charge_classe.py --url http://127.0.0.1:5000
+
+Les deux premières tournent sur une base temporaire, neuve à chaque
+scénario. Avec --url, le serveur et sa base sont ceux qui tournent déjà :
+les quiz y sont passés en mode test puis remis en entraînement.
+
+Rapport : latences p50/p95/p99 par route, erreurs (statut inattendu ou
+5xx), erreurs SQLite « database is locked » et débit.
+"""
+
+import argparse
+import http.client
+import importlib
+import os
+import random
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from commun import RACINE, base_temporaire
+
+import config  # noqa: E402
+
+CHAMP = re.compile(r'<input[^>]*type="(text|checkbox)"[^>]*name="(\w+)"')
+CODE = re.compile(r'display-4[^>]*>\s*(\d{6})\s*<')
+BOUTON_MODE = r'toggle/{quiz_id}/mode"[^>]*>\s*<button[^>]*>\s*Passer en ([^<]+)<'
+NUMERO = re.compile(r"/\d+$")
+OCCUPEE = ("database is locked", "database is busy")
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+class ClientInterne:
+    """Étudiant servi dans ce processus (client de test Flask, cookies propres)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def requete(self, methode, chemin, data=None):
+        reponse = self.client.open(chemin, method=methode, data=data)
+        return reponse.status_code, reponse.get_data(as_text=True)
+
+
+class ClientHTTP:
+    """Étudiant sur un vrai serveur : une connexion et ses propres cookies."""
+
+    def __init__(self, url):
+        morceaux = urlsplit(url)
+        self.connexion = http.client.HTTPConnection(morceaux.hostname, morceaux.port or 80,
+                                                    timeout=120)
+        self.cookies = {}
+
+    def _envoyer(self, methode, chemin, corps, entetes):
+        try:
+            self.connexion.request(methode, chemin, body=corps, headers=entetes)
+            return self.connexion.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # Connexion fermée par le worker après la réponse précédente.
+            self.connexion.close()
+            self.connexion.request(methode, chemin, body=corps, headers=entetes)
+            return self.connexion.getresponse()
+
+    def requete(self, methode, chemin, data=None):
+        entetes, corps = {}, None
+        if data is not None:
+            corps = urlencode(data)
+            entetes["Content-Type"] = "application/x-www-form-urlencoded"
+        if self.cookies:
+            entetes["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        reponse = self._envoyer(methode, chemin, corps, entetes)
+        texte = reponse.read().decode()
+        for cookie in reponse.headers.get_all("Set-Cookie") or ():
+            nom, _, valeur = cookie.split(";", 1)[0].partition("=")
+            if "max-age=0" in cookie.lower() or "1970" in cookie:
+                self.cookies.pop(nom.strip(), None)
+            else:
+                self.cookies[nom.strip()] = valeur
+        if reponse.getheader("Connection", "").lower() == "close":
+            self.connexion.close()
+        return reponse.status, texte
+
+
+# ---------------------------------------------------------------------------
+# Mesures
+# ---------------------------------------------------------------------------
+
+class Mesures:
+    """Durées par route et erreurs, partagées par tous les fils."""
+
+    def __init__(self):
+        self.durees = defaultdict(list)
+        self.erreurs = defaultdict(int)
+        self.occupee = 0
+        self.verrou = threading.Lock()
+
+    def requete(self, client, methode, chemin, data=None, attendus=(200, 302)):
+        debut = time.perf_counter()
+        try:
+            statut, texte = client.requete(methode, chemin, data)
+        except OSError:
+            statut, texte = 0, ""
+        duree = time.perf_counter() - debut
+        route = f"{methode} {NUMERO.sub('/<n>', chemin)}"
+        with self.verrou:
+            self.durees[route].append(duree)
+            if statut not in attendus:
+                self.erreurs[route] += 1
+        return statut, texte
+
+    def noter_occupee(self, *_args, exception=None, **_kwargs):
+        """Signal got_request_exception (mode interne)."""
+        if any(m in str(exception) for m in OCCUPEE):
+            with self.verrou:
+                self.occupee += 1
+
+    def nombre(self):
+        return sum(len(d) for d in self.durees.values())
+
+
+# ---------------------------------------------------------------------------
+# Parcours
+# ---------------------------------------------------------------------------
+
+def arrivee(mesures, etudiant):
+    """Accueil, démarrage, salle d'attente (quiz encore fermé)."""
+    client, quiz_id, i, _total = etudiant
+    mesures.requete(client, "GET", f"/{quiz_id}/")
+    mesures.requete(client, "POST", f"/{quiz_id}/start",
+                    {"nom": f"Charge{i}", "prenom": "Etudiant"})
+    mesures.requete(client, "GET", f"/{quiz_id}/attente")
+    mesures.requete(client, "GET", f"/{quiz_id}/attente/status")
+
+
+def composition(mesures, etudiant):
+    """Après l'ouverture : tous les exercices puis la confirmation. Retourne (quiz, code)."""
+    client, quiz_id, i, total = etudiant
+    rng = random.Random(i)
+    mesures.requete(client, "GET", f"/{quiz_id}/attente/status")
+    for n in range(1, total + 1):
+        _, page = mesures.requete(client, "GET", f"/{quiz_id}/exercice/{n}")
+        data = {"direction": "next"}
+        for type_, nom in CHAMP.findall(page):
+            if type_ == "text":
+                data[nom] = format(rng.randrange(256), "08b")
+            elif rng.random() < 0.5:
+                data[nom] = "on"
+        mesures.requete(client, "POST", f"/{quiz_id}/exercice/{n}", data)
+    _, page = mesures.requete(client, "GET", f"/{quiz_id}/confirmation")
+    code = CODE.search(page)
+    return (quiz_id, code.group(1)) if code else None
+
+
+def basculer(admin, mesures, quiz_id, mode_voulu):
+    """Met le quiz dans le mode voulu ("test" ou "entrainement"), fermé.
+
+    Changer de mode ferme le quiz : un test déjà ouvert passe par
+    l'entraînement pour être refermé.
+    """
+    _, page = mesures.requete(admin, "GET", "/admin/")
+    propose = re.search(BOUTON_MODE.format(quiz_id=quiz_id), page)
+    actuel = "entrainement" if propose and propose.group(1).strip() == "test" else "test"
+    bascules = 2 if actuel == mode_voulu == "test" else int(actuel != mode_voulu)
+    for _ in range(bascules):
+        mesures.requete(admin, "POST", f"/admin/toggle/{quiz_id}/mode")
+
+
+def scenario(nombre, quiz_ids, paralleles, nouveau_client, mesures):
+    """Fait passer le test à nombre étudiants. Retourne (durées des phases, codes)."""
+    totaux = {q: importlib.import_module(f"quizzes.{q}").TOTAL_EXERCICES for q in quiz_ids}
+    etudiants = [(nouveau_client(), quiz_ids[i % len(quiz_ids)], i,
+                  totaux[quiz_ids[i % len(quiz_ids)]]) for i in range(nombre)]
+    admin = nouveau_client()
+    mesures.requete(admin, "POST", "/admin/login", {"password": config.ADMIN_PASSWORD})
+    for quiz_id in quiz_ids:
+        basculer(admin, mesures, quiz_id, "test")
+
+    with ThreadPoolExecutor(paralleles) as pool:
+        debut = time.perf_counter()
+        list(pool.map(lambda e: arrivee(mesures, e), etudiants))
+        duree_arrivee = time.perf_counter() - debut
+        requetes_arrivee = mesures.nombre()
+
+        for quiz_id in quiz_ids:
+            mesures.requete(admin, "POST", f"/admin/toggle/{quiz_id}/ouvert")
+        debut = time.perf_counter()
+        codes = list(pool.map(lambda e: composition(mesures, e), etudiants))
+        duree_composition = time.perf_counter() - debut
+
+    for quiz_id in quiz_ids:
+        basculer(admin, mesures, quiz_id, "entrainement")
+    return (duree_arrivee, requetes_arrivee, duree_composition), codes
+
+
+# ---------------------------------------------------------------------------
+# Serveurs
+# ---------------------------------------------------------------------------
+
+def application():
+    """Fabrique appelée par les workers gunicorn : l'application sur la base du test."""
+    import db
+
+    data_dir = os.environ["CHARGE_DATA"]
+    db.DATA_DIR = data_dir
+    db.DB_PATH = os.path.join(data_dir, "resultats.db")
+    db.CONFIG_VERSION_PATH = os.path.join(data_dir, "quiz_config.version")
+    from app import create_app
+
+    return create_app()
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def lancer_gunicorn(data_dir, workers, classe="sync", env=None):
+    """Démarre gunicorn sur la base temporaire. Retourne (processus, url, journal).
+
+    classe : type de worker (-k), « sync » ou « gevent ». env : variables
+    d'environnement ajoutées pour le serveur.
+    """
+    port = port_libre()
+    journal = open(os.path.join(data_dir, "gunicorn.log"), "w+")
+    processus = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "-w", str(workers),
+         "-k", classe, "--worker-connections", "2000", "--timeout", "120",
+         "--chdir", os.path.dirname(os.path.abspath(__file__)),
+         "--pythonpath", RACINE, "charge_classe:application()"],
+        env=dict(os.environ, CHARGE_DATA=data_dir, **(env or {})),
+        stdout=journal, stderr=journal,
+    )
+    url = f"http://127.0.0.1:{port}"
+    fin = time.monotonic() + 30
+    while time.monotonic() < fin:
+        try:
+            if ClientHTTP(url).requete("GET", "/")[0] == 200:
+                return processus, url, journal
+        except OSError:
+            time.sleep(0.2)
+    processus.kill()
+    raise RuntimeError("gunicorn n'a pas démarré (voir gunicorn.log)")
+
+
+# ---------------------------------------------------------------------------
+# Rapport
+# ---------------------------------------------------------------------------
+
+def afficher(mesures, phases, codes, enregistrees):
+    duree_arrivee, requetes_arrivee, duree_composition = phases
+    requetes_composition = mesures.nombre() - requetes_arrivee
+    reussies = sum(1 for c in codes if c)
+    print(f"  arrivée (accueil, start, salle d'attente) {duree_arrivee:7.2f} s  "
+          f"{requetes_arrivee / duree_arrivee:7.1f} req/s")
+    print(f"  composition après ouverture               {duree_composition:7.2f} s  "
+          f"{requetes_composition / duree_composition:7.1f} req/s  "
+          f"{reussies / duree_composition:6.1f} soumissions/s")
+    print(f"  {'route':<34} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'erreurs':>8}")
+    for route in sorted(mesures.durees):
+        durees = sorted(mesures.durees[route])
+        if len(durees) > 1:
+            centiles = statistics.quantiles(durees, n=100, method="inclusive")
+            p50, p95, p99 = centiles[49], centiles[94], centiles[98]
+        else:
+            p50 = p95 = p99 = durees[0]
+        print(f"  {route:<34} {len(durees):>6} " + " ".join(
+            f"{d * 1000:6.1f}ms" for d in (p50, p95, p99, durees[-1])
+        ) + f" {mesures.erreurs.get(route, 0):>8}")
+    ligne = (f"  SQLite occupée : {mesures.occupee}   codes reçus : {reussies}/{len(codes)}"
+             f"   codes distincts par quiz : {len({c for c in codes if c})}")
+    if enregistrees is not None:
+        ligne += f"   soumissions en base : {enregistrees}"
+    print(ligne)
+
+
+def compter_enregistrees():
+    import db
+
+    conn = db.connecter()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM resultats").fetchone()[0]
+    finally:
+        conn.fermer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--etudiants", type=int, nargs="+", default=[30, 300],
+                        help="Taille(s) de classe (par défaut : 30 300 ; essayer aussi 3000)")
+    parser.add_argument("--quiz", nargs="+", default=["binaire", "reseau"],
+                        help="Quiz passés en même temps (par défaut : les deux)")
+    parser.add_argument("-c", "--paralleles", type=int, default=50,
+                        help="Étudiants actifs en même temps (fils du client)")
+    serveur = parser.add_mutually_exclusive_group()
+    serveur.add_argument("--gunicorn", action="store_true",
+                         help="Lancer un gunicorn local par scénario")
+    serveur.add_argument("--url", help="Serveur déjà lancé (sa propre base)")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Workers gunicorn (avec --gunicorn)")
+    parser.add_argument("-k", "--classe", choices=("sync", "gevent"), default="sync",
+                        help="Type de worker gunicorn (avec --gunicorn)")
+    args = parser.parse_args()
+
+    if args.url:
+        mode = args.url
+    elif args.gunicorn:
+        mode = f"gunicorn -w {args.workers} -k {args.classe}"
+    else:
+        mode = "dans ce processus"
+
+    for nombre in args.etudiants:
+        print(f"{nombre} étudiants ({' + '.join(args.quiz)}), {args.paralleles} en parallèle, "
+              f"{mode} :")
+        mesures = Mesures()
+        processus = journal = None
+        enregistrees = None
+        if args.url:
+            phases, codes = scenario(nombre, args.quiz, args.paralleles,
+                                     lambda: ClientHTTP(args.url), mesures)
+        elif args.gunicorn:
+            data_dir = base_temporaire()
+            processus, url, journal = lancer_gunicorn(data_dir, args.workers, args.classe)
+            try:
+                phases, codes = scenario(nombre, args.quiz, args.paralleles,
+                                         lambda: ClientHTTP(url), mesures)
+            finally:
+                processus.send_signal(signal.SIGTERM)
+                processus.wait()
+            journal.seek(0)
+            mesures.occupee = sum(1 for ligne in journal if any(m in ligne for m in OCCUPEE))
+            journal.close()
+            enregistrees = compter_enregistrees()
+        else:
+            from flask import got_request_exception
+
+            base_temporaire()
+            from app import create_app
+
+            app = create_app()
+            got_request_exception.connect(mesures.noter_occupee, app)
+            phases, codes = scenario(nombre, args.quiz, args.paralleles,
+                                     lambda: ClientInterne(app), mesures)
+            enregistrees = compter_enregistrees()
+        afficher(mesures, phases, codes, enregistrees)
+
+
+if __name__ == "__main__":
+    main()
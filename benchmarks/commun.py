@@ -0,0 +1,167 @@
+"""Outils partagés par les scripts de benchmark.
+
+Les benchmarks tournent sur une base temporaire : ils ne touchent jamais
+data/resultats.db. Lancer depuis la racine du dépôt, par exemple :
+
+    python3 benchmarks/bench_quiz_config.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+
+def base_temporaire():
+    """Redirige db.py vers un répertoire data/ temporaire. Retourne son chemin."""
+    import db
+
+    data_dir = tempfile.mkdtemp(prefix="quiz-bench-")
+    db.DATA_DIR = data_dir
+    db.DB_PATH = os.path.join(data_dir, "resultats.db")
+    db.CONFIG_VERSION_PATH = os.path.join(data_dir, "quiz_config.version")
+    return data_dir
+
+
+class CompteurRequetes:
+    """Compte les instructions SQL exécutées sur toutes les connexions ouvertes."""
+
+    def __init__(self):
+        self.total = 0
+        self._connect = sqlite3.connect
+
+    def __enter__(self):
+        import db
+
+        # Les connexions déjà dans le pool ne passeraient pas par le traceur.
+        db.vider_pool()
+        compteur = self
+
+        def connect(*args, **kwargs):
+            conn = compteur._connect(*args, **kwargs)
+            conn.set_trace_callback(compteur._tracer)
+            return conn
+
+        sqlite3.connect = connect
+        return self
+
+    def __exit__(self, *exc):
+        import db
+
+        sqlite3.connect = self._connect
+        db.vider_pool()
+
+    def _tracer(self, _sql):
+        self.total += 1
+
+
+def feuille_binaire(rng):
+    """Feuille de réponses binaire aléatoire : (reponses, ex2_data, ex3_operands).
+
+    Chaque champ est juste, faux, vide ou invalide, avec espaces et casse variés.
+    """
+    from quizzes.binaire.logic import construire_corrections
+
+    ex2_data = [
+        [num, col, rng.randint(10, 99) if col == "bcd" else rng.randint(33, 254)]
+        for num, col in ((1, "hex"), (2, "bin"), (3, "bcd"), (4, "bin"),
+                         (5, "dec"), (6, "hex"), (7, "bcd"), (8, "dec"))
+    ]
+    ex3_operands = {"a": rng.randint(1, 254), "b": rng.randint(1, 254)}
+
+    reponses = {}
+    for champ, (type_champ, valeur) in construire_corrections(ex2_data, ex3_operands).items():
+        tirage = rng.random()
+        if tirage < 0.15:
+            continue
+        if tirage < 0.25:
+            reponses[champ] = rng.choice(["", " ", "??", "12z", "0x"])
+            continue
+        if tirage < 0.4 and isinstance(valeur, int):
+            valeur = valeur + 1
+        if type_champ == "dec":
+            texte = str(valeur)
+        elif type_champ == "hex":
+            texte = rng.choice(["{:X}", "{:x}", "{:02X}"]).format(valeur)
+        elif type_champ == "bin":
+            b = f"{valeur:08b}"
+            texte = rng.choice([b, f"{b[:4]} {b[4:]}", f"{valeur:b}"])
+        else:
+            texte = valeur if tirage >= 0.4 else valeur[::-1]
+        reponses[champ] = rng.choice(["{}", " {}", "{} "]).format(texte)
+    return reponses, ex2_data, ex3_operands
+
+
+def feuille_reseau(rng):
+    """Feuille de réponses réseau aléatoire (dict du formulaire).
+
+    Adresses justes, avec zéros en tête, fausses ou invalides ; cases
+    cochées au hasard ; IP et masques de l'exercice 2 dans ou hors plage.
+    """
+    from quizzes.reseau.logic import EX2_DEVICES, MACHINES, calculer_adresse_reseau
+
+    reponses = {}
+    for m in MACHINES:
+        adresse = calculer_adresse_reseau(m["ip"], m["masque"])
+        tirage = rng.random()
+        if tirage < 0.5:
+            reponses[f"ex1_reseau_{m['id']}"] = adresse
+        elif tirage < 0.65:
+            reponses[f"ex1_reseau_{m['id']}"] = ".".join(
+                f"{int(o):03d}" for o in adresse.split(".")
+            )
+        elif tirage < 0.85:
+            reponses[f"ex1_reseau_{m['id']}"] = m["ip"]
+        elif tirage < 0.95:
+            reponses[f"ex1_reseau_{m['id']}"] = rng.choice(["", "10.1", "256.0.0.0", "a.b.c.d"])
+        for autre in MACHINES:
+            if autre["id"] != m["id"] and rng.random() < 0.4:
+                reponses[f"ex1_comm_{m['id']}_{autre['id']}"] = "on"
+    for dev in EX2_DEVICES:
+        if dev.get("given"):
+            continue
+        hote = rng.randint(2, 126) if dev["subnet"] == 1 else rng.randint(129, 253)
+        if rng.random() < 0.3:
+            hote = rng.choice([0, 1, 127, 128, 254, 255])
+        reponses[f"ex2_ip_{dev['id']}"] = rng.choice(["{}", " {} "]).format(f"192.168.0.{hote}")
+        reponses[f"ex2_masque_{dev['id']}"] = rng.choice(
+            ["255.255.255.128", "255.255.255.128", "255.255.255.0", ""]
+        )
+    return reponses
+
+
+def peupler_binaire(n, graine, fausses=0):
+    """Insère n soumissions binaire aléatoires (dates croissantes sur une journée).
+
+    fausses : si non nul, une soumission sur fausses a un score volontairement faux.
+    """
+    import json
+    import random
+
+    import db
+    from quizzes.binaire.logic import corriger, structurer_resultat
+
+    rng = random.Random(graine)
+    conn = db.connecter()
+    lignes = []
+    for i in range(n):
+        reponses, ex2_data, ex3_operands = feuille_binaire(rng)
+        scores, total_c, total_q = corriger(reponses, ex2_data, ex3_operands)
+        if fausses and i % fausses == 0:
+            total_c += 1
+        enonce = {"ex2_data": ex2_data, "ex3_operands": ex3_operands}
+        entree = {"code": f"{i:06d}", "nom": f"Nom{i}", "prenom": "Prénom",
+                  "date": f"2026-01-01T08:{i // 60 % 60:02d}:{i % 60:02d}"}
+        entree.update(structurer_resultat(enonce, reponses, scores, total_c, total_q))
+        lignes.append({
+            "quiz_id": "binaire", "code": entree["code"], "nom": entree["nom"],
+            "prenom": "Prénom", "date": entree["date"], "score_total_correct": total_c,
+            "score_total_total": total_q, "donnees": json.dumps(entree, ensure_ascii=False),
+        })
+    db.inserer_resultats(conn, lignes)
+    conn.commit()
+    conn.fermer()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Stress test de db.allouer_code : processus concurrents, espace presque plein.
+
+Plusieurs processus allouent des codes en parallèle sur la même base jusqu'à
+épuiser l'espace de codes ; le script échoue si un code sort deux fois, et
+affiche le coût par code au début et à la fin du remplissage.
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+from commun import base_temporaire
+
+import db  # noqa: E402
+
+QUIZ = "stress"
+
+
+def _travailleur(args):
+    data_dir, n, tranches = args
+    db.DATA_DIR = data_dir
+    db.DB_PATH = f"{data_dir}/resultats.db"
+    codes, durees = [], []
+    taille = max(1, n // tranches)
+    debut = time.perf_counter()
+    try:
+        for i in range(n):
+            codes.append(db.allouer_code(QUIZ))
+            if (i + 1) % taille == 0:
+                durees.append(time.perf_counter() - debut)
+                debut = time.perf_counter()
+    except RuntimeError:
+        pass  # espace épuisé
+    return codes, durees
+
+
+def inserer_anciens(n):
+    """Simule des codes tirés au hasard par l'ancien générateur."""
+    conn = db.connecter()
+    anciens = random.sample(range(db.NB_CODES), n)
+    db.inserer_resultats(conn, [
+        {"quiz_id": QUIZ, "code": f"{c:06d}", "nom": "-", "prenom": "-", "date": "-",
+         "score_total_correct": 0, "score_total_total": 0, "donnees": "{}"}
+        for c in anciens
+    ])
+    conn.commit()
+    conn.fermer()
+    return {f"{c:06d}" for c in anciens}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-p", "--processus", type=int, default=8)
+    parser.add_argument("--anciens", type=int, default=50_000,
+                        help="Codes aléatoires déjà présents (ancien générateur)")
+    parser.add_argument("--tranches", type=int, default=10)
+    args = parser.parse_args()
+
+    data_dir = base_temporaire()
+    db.init_db()
+    anciens = inserer_anciens(args.anciens)
+    db.vider_pool()
+
+    par_processus = db.NB_CODES // args.processus + 1
+    debut = time.perf_counter()
+    with multiprocessing.Pool(args.processus) as pool:
+        resultats = pool.map(
+            _travailleur,
+            [(data_dir, par_processus, args.tranches)] * args.processus,
+        )
+    duree = time.perf_counter() - debut
+
+    tous = [c for codes, _ in resultats for c in codes]
+    uniques = set(tous)
+    collisions = len(tous) - len(uniques)
+    avec_anciens = len(uniques & anciens)
+    libres = db.NB_CODES - args.anciens
+
+    print(f"  {args.processus} processus, {len(tous)} codes alloués en {duree:.1f} s "
+          f"({duree * 1e6 / max(1, len(tous)):.1f} µs / code)")
+    print(f"  collisions entre processus : {collisions}")
+    print(f"  collisions avec les anciens codes : {avec_anciens}")
+    print(f"  codes libres restants : {libres - len(uniques)} / {libres}")
+    durees = resultats[0][1]
+    if durees:
+        taille = par_processus // args.tranches
+        print(f"  coût par code, début : {durees[0] * 1e6 / taille:.1f} µs, "
+              f"fin : {durees[-1] * 1e6 / taille:.1f} µs")
+
+    if collisions or avec_anciens:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
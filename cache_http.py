@@ -0,0 +1,167 @@
+"""Cache HTTP : pages publiques revalidées par ETag, fichiers statiques à empreinte.
+
+Les pages qui ne dépendent que des gabarits et de quiz_config (accueil
+général, accueil de chaque quiz) portent un ETag calculé sans les rendre :
+version du déploiement (contenu des gabarits et des fichiers statiques)
+et version de quiz_config (fichier témoin de db.signaler_changement_config).
+Un navigateur qui renvoie cet ETag reçoit 304, sans requête SQL ni rendu.
+
+url_for('static', ...) et url_for('<quiz>.static', ...) ajoutent ?v=<empreinte
+du contenu> : un fichier demandé avec son empreinte courante est servi avec
+un Cache-Control d'un an (immutable), et une nouvelle version du fichier
+change d'URL. Sans ?v ou avec une empreinte périmée, le fichier reste
+revalidé à chaque visite, comme avant.
+"""
+
+import functools
+import hashlib
+import os
+
+from flask import current_app, make_response, request
+from werkzeug.http import is_resource_modified
+
+import config
+from db import version_config
+from quizzes import MANIFESTE, QUIZ_REGISTRY
+
+# Cache-Control d'un fichier statique demandé avec son empreinte courante.
+CACHE_IMMUABLE = "public, max-age=31536000, immutable"
+# Suffixe de l'ETag d'un corps compressé (compression.py) : deux encodages
+# d'une même ressource n'ont pas le même validateur fort (RFC 9110, 8.8.3).
+SUFFIXES_ETAG = {"gzip": "-gz", "br": "-br"}
+
+# chemin absolu -> empreinte du contenu (le code et les fichiers ne changent
+# qu'au déploiement, qui redémarre les workers)
+_empreintes = {}
+# (endpoint, filename) -> empreinte, ou None pour un fichier absent
+_statiques = {}
+_deploiement = {"version": None}
+
+
+def _empreinte_fichier(chemin):
+    empreinte = _empreintes.get(chemin)
+    if empreinte is None:
+        with open(chemin, "rb") as f:
+            empreinte = hashlib.sha1(f.read()).hexdigest()[:12]
+        _empreintes[chemin] = empreinte
+    return empreinte
+
+
+def dossier_statique(endpoint):
+    """Dossier static de l'application ou du blueprint de l'endpoint, sinon None."""
+    if endpoint == "static":
+        return current_app.static_folder
+    nom, _, vue = endpoint.rpartition(".")
+    if vue == "static" and nom in current_app.blueprints:
+        return current_app.blueprints[nom].static_folder
+    return None
+
+
+def empreinte_statique(endpoint, filename):
+    """Empreinte d'un fichier statique, ou None s'il n'existe pas."""
+    cle = (endpoint, filename)
+    if cle not in _statiques:
+        dossier = dossier_statique(endpoint)
+        empreinte = None
+        if dossier is not None and filename:
+            chemin = os.path.realpath(os.path.join(dossier, filename))
+            if chemin.startswith(os.path.realpath(dossier) + os.sep) and os.path.isfile(chemin):
+                empreinte = _empreinte_fichier(chemin)
+        _statiques[cle] = empreinte
+    return _statiques[cle]
+
+
+def version_deploiement():
+    """Empreinte des gabarits, fichiers statiques et quiz.json, calculée une fois par worker.
+
+    Lue sur le disque, quiz chargés ou non : tous les workers trouvent la même.
+    Le quiz.json donne le titre et la description affichés sur les pages
+    versionnées : le modifier doit changer leur ETag.
+    """
+    if _deploiement["version"] is None:
+        h = hashlib.sha1()
+        dossiers = [
+            os.path.join(current_app.root_path, current_app.template_folder),
+            current_app.static_folder,
+        ] + [
+            os.path.join(meta["dossier"], sous_dossier)
+            for meta in QUIZ_REGISTRY.values() for sous_dossier in ("templates", "static")
+        ]
+        for dossier in dossiers:
+            for racine, _, fichiers in sorted(os.walk(dossier)):
+                for fichier in sorted(fichiers):
+                    chemin = os.path.join(racine, fichier)
+                    h.update(chemin.encode())
+                    h.update(_empreinte_fichier(chemin).encode())
+        for meta in QUIZ_REGISTRY.values():
+            chemin = os.path.join(meta["dossier"], MANIFESTE)
+            h.update(chemin.encode())
+            h.update(_empreinte_fichier(chemin).encode())
+        _deploiement["version"] = h.hexdigest()[:16]
+    return _deploiement["version"]
+
+
+# ---------------------------------------------------------------------------
+# Pages revalidées par ETag
+# ---------------------------------------------------------------------------
+
+def etag_encode(etag, encodage):
+    """ETag du corps compressé en encodage."""
+    return etag + SUFFIXES_ETAG[encodage]
+
+
+def page_versionnee(vue):
+    """Décorateur : ETag de la page, 304 avant tout rendu si le navigateur l'a déjà.
+
+    Réservé aux pages identiques pour tous les visiteurs, qui ne changent
+    qu'avec les gabarits ou quiz_config.
+    """
+    @functools.wraps(vue)
+    def enveloppe(*args, **kwargs):
+        cle = (version_deploiement(), version_config(), request.endpoint, sorted(kwargs.items()))
+        etag = hashlib.sha1(repr(cle).encode()).hexdigest()[:16]
+        # Le navigateur renvoie l'ETag de la version qu'il a reçue,
+        # éventuellement compressée : le 304 reprend celui-là.
+        connu = next((e for e in [etag] + [etag_encode(etag, c) for c in SUFFIXES_ETAG]
+                      if not is_resource_modified(request.environ, etag=e)), None)
+        if connu is not None:
+            reponse = current_app.response_class(status=304)
+            reponse.set_etag(connu)
+            if config.COMPRESSION:
+                reponse.vary.add("Accept-Encoding")
+        else:
+            reponse = make_response(vue(*args, **kwargs))
+            reponse.set_etag(etag)
+        # Toujours revalidée : une bascule de l'admin doit se voir tout de suite.
+        reponse.headers["Cache-Control"] = "no-cache"
+        return reponse
+
+    return enveloppe
+
+
+# ---------------------------------------------------------------------------
+# Fichiers statiques à empreinte
+# ---------------------------------------------------------------------------
+
+def _ajouter_empreinte(endpoint, values):
+    if "v" in values or "filename" not in values:
+        return
+    empreinte = empreinte_statique(endpoint, values["filename"])
+    if empreinte is not None:
+        values["v"] = empreinte
+
+
+def _cache_statique(reponse):
+    v = request.args.get("v")
+    if (
+        v and reponse.status_code in (200, 304) and request.endpoint
+        and v == empreinte_statique(request.endpoint, (request.view_args or {}).get("filename"))
+    ):
+        reponse.headers["Cache-Control"] = CACHE_IMMUABLE
+    return reponse
+
+
+def installer(app):
+    """Empreintes dans les URL des fichiers statiques, et leur Cache-Control."""
+    app.url_defaults(_ajouter_empreinte)
+    app.after_request(_cache_statique)
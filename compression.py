@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Compression des réponses : gzip, et brotli si le module est installé.
+
+Les réponses HTML, JSON, CSS et JavaScript de plus de COMPRESSION_SEUIL
+octets sont compressées à la volée selon Accept-Encoding ; les petites
+(attente/status, sauvegarde) et les réponses en flux (SSE, exports, liste
+complète des résultats) partent telles quelles.
+
+Les fichiers statiques sont précompressés au déploiement, une fois pour
+toutes au niveau maximal (fichiers .br et .gz à côté de l'original) :
+
+    python3 compression.py            # écrit les .gz / .br de tous les static/
+    python3 compression.py --effacer  # les supprime
+
+Un fichier précompressé plus ancien que l'original est ignoré.
+"""
+
+import argparse
+import gzip
+import mimetypes
+import os
+
+from flask import request
+
+import config
+from cache_http import dossier_statique, etag_encode
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLES = {
+    "text/html", "text/css", "text/plain", "text/csv", "application/json",
+    "application/javascript", "text/javascript", "image/svg+xml",
+}
+# encodage -> extension du fichier précompressé
+EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+# chemin du fichier statique -> {encodage: chemin précompressé}
+_precompresses = {}
+
+
+def encodages_disponibles():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compresser(donnees, encodage, niveau=None):
+    """Compresse des octets ; niveau par défaut : celui de la configuration."""
+    if encodage == "br":
+        return brotli.compress(
+            donnees, quality=config.COMPRESSION_NIVEAU_BROTLI if niveau is None else niveau
+        )
+    return gzip.compress(
+        donnees, compresslevel=config.COMPRESSION_NIVEAU_GZIP if niveau is None else niveau,
+        mtime=0,
+    )
+
+
+def _choisir_encodage(acceptes):
+    """Meilleur encodage accepté par le client, brotli d'abord, ou None."""
+    for encodage in encodages_disponibles():
+        if acceptes[encodage] > 0:
+            return encodage
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Réponses
+# ---------------------------------------------------------------------------
+
+def _fichier_statique():
+    """Chemin du fichier servi par un endpoint static, ou None."""
+    filename = (request.view_args or {}).get("filename")
+    dossier = dossier_statique(request.endpoint) if request.endpoint else None
+    if dossier is None or not filename:
+        return None
+    chemin = os.path.realpath(os.path.join(dossier, filename))
+    if not chemin.startswith(os.path.realpath(dossier) + os.sep):
+        return None
+    return chemin
+
+
+def _variantes(chemin):
+    """{encodage: fichier précompressé à jour} pour un fichier statique."""
+    variantes = _precompresses.get(chemin)
+    if variantes is None:
+        variantes = {}
+        try:
+            original = os.stat(chemin).st_mtime
+        except OSError:
+            original = None
+        for encodage, extension in EXTENSIONS.items():
+            try:
+                if original is not None and os.stat(chemin + extension).st_mtime >= original:
+                    variantes[encodage] = chemin + extension
+            except OSError:
+                pass
+        _precompresses[chemin] = variantes
+    return variantes
+
+
+def _compresser_reponse(reponse):
+    if (
+        reponse.status_code != 200
+        or "Content-Encoding" in reponse.headers
+        or reponse.mimetype not in COMPRESSIBLES
+        or request.method == "HEAD"
+    ):
+        return reponse
+
+    if reponse.direct_passthrough:
+        # Fichier statique : on sert sa version précompressée, s'il y en a une.
+        chemin = _fichier_statique()
+        if chemin is None:
+            return reponse
+        variantes = _variantes(chemin)
+        reponse.vary.add("Accept-Encoding")
+        encodage = next((e for e in ("br", "gzip") if e in variantes
+                         and request.accept_encodings[e] > 0), None)
+        if encodage is None:
+            return reponse
+        with open(variantes[encodage], "rb") as f:
+            donnees = f.read()
+        reponse.close()
+        reponse.direct_passthrough = False
+    else:
+        if reponse.is_streamed:
+            return reponse
+        reponse.vary.add("Accept-Encoding")
+        encodage = _choisir_encodage(request.accept_encodings)
+        if encodage is None or (reponse.content_length or 0) < config.COMPRESSION_SEUIL:
+            return reponse
+        donnees = compresser(reponse.get_data(), encodage)
+
+    reponse.set_data(donnees)
+    reponse.headers["Content-Encoding"] = encodage
+    etag, faible = reponse.get_etag()
+    if etag:
+        reponse.set_etag(etag_encode(etag, encodage), faible)
+        # Fichier statique revalidé avec l'ETag de sa version compressée.
+        reponse.make_conditional(request)
+    return reponse
+
+
+def installer(app):
+    """Compresse les réponses de l'application (voir COMPRESSION_SEUIL)."""
+    app.after_request(_compresser_reponse)
+
+
+# ---------------------------------------------------------------------------
+# Précompression des fichiers statiques
+# ---------------------------------------------------------------------------
+
+def dossiers_statiques():
+    """static/ de l'application et de chaque quiz, sans créer l'application."""
+    racine = os.path.dirname(os.path.abspath(__file__))
+    quizzes = os.path.join(racine, "quizzes")
+    return [os.path.join(racine, "static")] + sorted(
+        os.path.join(quizzes, nom, "static") for nom in os.listdir(quizzes)
+        if os.path.isdir(os.path.join(quizzes, nom, "static"))
+    )
+
+
+def precompresser(dossiers, effacer=False):
+    """Écrit (ou supprime) les .gz et .br des fichiers compressibles. Retourne le bilan."""
+    bilan = []
+    for dossier in dossiers:
+        for racine, _, fichiers in os.walk(dossier):
+            for fichier in sorted(fichiers):
+                chemin = os.path.join(racine, fichier)
+                if fichier.endswith(tuple(EXTENSIONS.values())):
+                    if effacer:
+                        os.remove(chemin)
+                    continue
+                if effacer or mimetypes.guess_type(fichier)[0] not in COMPRESSIBLES:
+                    continue
+                with open(chemin, "rb") as f:
+                    donnees = f.read()
+                tailles = []
+                for encodage in encodages_disponibles():
+                    compresse = compresser(donnees, encodage, 11 if encodage == "br" else 9)
+                    with open(chemin + EXTENSIONS[encodage], "wb") as f:
+                        f.write(compresse)
+                    tailles.append(f"{encodage} {len(compresse)}")
+                bilan.append(f"  {os.path.relpath(chemin)} : {len(donnees)} -> {', '.join(tailles)}")
+    return bilan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--effacer", action="store_true",
+                        help="Supprimer les fichiers précompressés")
+    args = parser.parse_args()
+
+    for ligne in precompresser(dossiers_statiques(), args.effacer):
+        print(ligne)
+    if brotli is None and not args.effacer:
+        print("  module brotli absent : seuls les .gz ont été écrits")
+
+
+if __name__ == "__main__":
+    main()
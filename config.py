@@ -2,3 +2,59 @@ import os
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "quiz-tcpip-dev-secret-key")
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "admin")
+
+# Salle d'attente : flux Server-Sent Events au lieu du polling toutes les 3 s.
+# Chaque flux occupe un worker sync pendant ATTENTE_FLUX_DUREE secondes : à
+# activer uniquement avec les workers gevent (voir cooperatif.py).
+ATTENTE_PUSH = os.environ.get("ATTENTE_PUSH", "0") == "1"
+ATTENTE_FLUX_DUREE = int(os.environ.get("ATTENTE_FLUX_DUREE", "25"))
+
+# Connexions SQLite (voir db.get_db) : réglages appliqués une fois par connexion.
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"))
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-8000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+SQLITE_POOL_TAILLE = int(os.environ.get("SQLITE_POOL_TAILLE", "8"))
+
+# Écriture différée des soumissions (voir ecriture.py) : les soumissions passent
+# par une file durable et un seul écrivain les insère par lots.
+ECRITURE_DIFFEREE = os.environ.get("ECRITURE_DIFFEREE", "0") == "1"
+ECRITURE_INTERVALLE = float(os.environ.get("ECRITURE_INTERVALLE", "1.0"))
+ECRITURE_LOT = int(os.environ.get("ECRITURE_LOT", "500"))
+
+# Codes de dépôt : taille des blocs du compteur réservés par chaque worker.
+CODES_BLOC = int(os.environ.get("CODES_BLOC", "64"))
+
+# Sessions stockées dans data/sessions.db (voir sessions.py) ; le cookie ne
+# contient qu'un identifiant. SESSIONS_DUREE : durée de vie en secondes.
+SESSIONS_SERVEUR = os.environ.get("SESSIONS_SERVEUR", "1") == "1"
+SESSIONS_DUREE = int(os.environ.get("SESSIONS_DUREE", str(24 * 3600)))
+
+# Métriques par route et par requête SQL (voir metriques.py), servies au format
+# Prometheus sur /admin/metrics. METRIQUES_JETON : jeton « Authorization:
+# Bearer » accepté en plus de la session admin, pour le collecteur.
+METRIQUES = os.environ.get("METRIQUES", "1") == "1"
+METRIQUES_JETON = os.environ.get("METRIQUES_JETON", "")
+
+# Profilage des requêtes (voir profilage.py), désactivé par défaut.
+# PROFILAGE_ECHANTILLON : une requête sur N passe sous cProfile (0 = aucune).
+# PROFILAGE_SEUIL : les autres requêtes plus longues (secondes) sont gardées
+# sous forme de piles échantillonnées (0 = aucune).
+PROFILAGE = os.environ.get("PROFILAGE", "0") == "1"
+PROFILAGE_ECHANTILLON = int(os.environ.get("PROFILAGE_ECHANTILLON", "100"))
+PROFILAGE_SEUIL = float(os.environ.get("PROFILAGE_SEUIL", "1.0"))
+
+# Cache de bytecode Jinja dans data/jinja/ et compilation de tous les gabarits
+# au démarrage de chaque worker (voir app.prechauffer_gabarits).
+GABARITS_CACHE = os.environ.get("GABARITS_CACHE", "1") == "1"
+
+# Quiz chargés à la première requête sous /<quiz_id>/ plutôt qu'au démarrage
+# de chaque worker (voir quizzes/__init__.py).
+QUIZ_PARESSEUX = os.environ.get("QUIZ_PARESSEUX", "1") == "1"
+
+# Compression gzip (et brotli si le module est installé) des réponses de plus
+# de COMPRESSION_SEUIL octets. Niveaux : gzip 1-9, brotli 0-11.
+COMPRESSION = os.environ.get("COMPRESSION", "1") == "1"
+COMPRESSION_SEUIL = int(os.environ.get("COMPRESSION_SEUIL", "1024"))
+COMPRESSION_NIVEAU_GZIP = int(os.environ.get("COMPRESSION_NIVEAU_GZIP", "6"))
+COMPRESSION_NIVEAU_BROTLI = int(os.environ.get("COMPRESSION_NIVEAU_BROTLI", "4"))
@@ -1,13 +1,28 @@
 #!/usr/bin/env python3
-"""Consulter les réponses d'un étudiant à partir de son code de soumission."""
+"""Consulter les réponses d'étudiants à partir de leurs codes de soumission.
+
+    python3 consulter.py binaire 123456
+    python3 consulter.py binaire 123456 654321 --document classe.txt --sans-couleurs
+    python3 consulter.py reseau --since 2025-01-13 --until 2025-01-13 --sortie rapports/
+
+En mode lot, les soumissions sont lues en une seule requête et les rapports
+rendus en parallèle (un processus par cœur), chacun construit en mémoire
+puis écrit d'un bloc.
+"""
 
 import argparse
 import json
+import multiprocessing
 import os
 import re
-import sqlite3
 import sys
 
+from db import DB_PATH, connecter
+from lister import construire_requete
+
+# Soumissions lues et rendues à la fois.
+LOT = 500
+
 
 # ── Couleurs ANSI ──────────────────────────────────────────────────────────
 
@@ -17,6 +32,8 @@ GRAS = "\033[1m"
 DIM = "\033[2m"
 RESET = "\033[0m"
 
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
 
 def marque(correct):
     return f"{VERT}✓{RESET}" if correct else f"{ROUGE}✗{RESET}"
@@ -24,7 +41,20 @@ def marque(correct):
 
 def visible_len(s):
     """Longueur visible d'une chaîne (sans codes ANSI)."""
-    return len(re.sub(r'\033\[[0-9;]*m', '', s))
+    return len(ANSI.sub('', s))
+
+
+def desactiver_couleurs():
+    """Mode texte brut : plus de codes ANSI, donc plus rien à retirer pour pad()."""
+    global VERT, ROUGE, GRAS, DIM, RESET, visible_len
+    VERT = ROUGE = GRAS = DIM = RESET = ""
+    visible_len = len
+
+
+def initialiser(couleurs):
+    """Initialisation d'un processus de rendu (pool)."""
+    if not couleurs:
+        desactiver_couleurs()
 
 
 def pad(s, width):
@@ -168,72 +198,93 @@ def norm_bcd(s):
 
 # ── Chargement ────────────────────────────────────────────────────────────
 
-def charger_soumission(quiz, code):
-    base = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(base, "data", "resultats.db")
-    if not os.path.exists(db_path):
-        print(f"Base introuvable : {db_path}", file=sys.stderr)
-        sys.exit(1)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    row = conn.execute(
-        "SELECT donnees FROM resultats WHERE quiz_id=? AND code=?",
-        (quiz, code),
-    ).fetchone()
-    conn.close()
-    if row:
-        return json.loads(row["donnees"])
-    return None
+def requete_soumissions(quiz, codes=None, depuis=None, jusqua=None, nom=None):
+    """Retourne (sql, paramètres) des soumissions choisies, en une seule requête.
+
+    Sans codes, tout le quiz (filtré par dates et début de nom) est parcouru.
+    """
+    if codes:
+        marques = ", ".join("?" * len(codes))
+        return (
+            f"SELECT code, donnees FROM resultats WHERE quiz_id=? AND code IN ({marques}) "
+            "ORDER BY date, id",
+            [quiz, *codes],
+        )
+    return construire_requete(quiz, depuis, jusqua, nom, selection="code, donnees")
+
+
+# ── Rendu ─────────────────────────────────────────────────────────────────
+
+def rendre(quiz, r):
+    """Rapport complet d'une soumission, construit en mémoire puis joint une fois."""
+    out = []
+    if quiz == "binaire":
+        afficher_binaire(r, out)
+    else:
+        afficher_reseau(r, out)
+    out.append("")
+    return "\n".join(out) + "\n"
+
+
+def _rendre_ligne(args):
+    """Travail d'un processus : (quiz, code, donnees) -> (code, étudiant, rapport)."""
+    quiz, code, donnees = args
+    r = json.loads(donnees)
+    return code, f"{r['nom']}_{r['prenom']}", rendre(quiz, r)
+
+
+def nom_fichier(quiz, code, etudiant):
+    return re.sub(r"[^\w-]+", "_", f"{quiz}_{code}_{etudiant}") + ".txt"
 
 
 # ── Affichage commun ──────────────────────────────────────────────────────
 
-def titre(texte):
+def titre(texte, out):
     w = max(visible_len(texte) + 4, 60)
-    print(f"\n{'─' * w}")
-    print(f"  {GRAS}{texte}{RESET}")
-    print(f"{'─' * w}")
+    out.append(f"\n{'─' * w}")
+    out.append(f"  {GRAS}{texte}{RESET}")
+    out.append(f"{'─' * w}")
 
 
-def entete(r):
-    print()
-    print(f"{'═' * 60}")
-    print(f"  Nom : {GRAS}{r['nom']}{RESET}    Prénom : {GRAS}{r['prenom']}{RESET}")
-    print(f"  Date : {r['date']}    Code : {GRAS}{r['code']}{RESET}")
+def entete(r, out):
+    out.append("")
+    out.append(f"{'═' * 60}")
+    out.append(f"  Nom : {GRAS}{r['nom']}{RESET}    Prénom : {GRAS}{r['prenom']}{RESET}")
+    out.append(f"  Date : {r['date']}    Code : {GRAS}{r['code']}{RESET}")
     sc = r["score_total"]
-    print(f"  Score total : {GRAS}{sc['correct']}/{sc['total']}{RESET}")
-    print(f"{'═' * 60}")
+    out.append(f"  Score total : {GRAS}{sc['correct']}/{sc['total']}{RESET}")
+    out.append(f"{'═' * 60}")
 
 
 # ── Quiz Binaire ──────────────────────────────────────────────────────────
 
-def afficher_binaire(r):
-    entete(r)
-    afficher_binaire_ex1(r)
-    afficher_binaire_ex2(r)
-    afficher_binaire_ex3(r)
+def afficher_binaire(r, out):
+    entete(r, out)
+    afficher_binaire_ex1(r, out)
+    afficher_binaire_ex2(r, out)
+    afficher_binaire_ex3(r, out)
 
 
-def afficher_binaire_ex1(r):
+def afficher_binaire_ex1(r, out):
     ex = r["exercice1"]
     sc = ex["score"]
-    titre(f"Exercice 1 : Conversions 0–15  ({sc['correct']}/{sc['total']})")
+    titre(f"Exercice 1 : Conversions 0–15  ({sc['correct']}/{sc['total']})", out)
 
     rep = ex["réponses"]
     W_ATT, W_REP = 7, 9
 
-    print()
+    out.append("")
     h = f"  {'Déc':>3}  "
     h += f"  {pad('Attendu', W_ATT)} {pad('Réponse', W_REP)}  "
     h += f"  {pad('Att.', 3)} {pad('Rép.', W_REP-4)}  "
     h += f"  {pad('Attendu', W_ATT)} {pad('Réponse', W_REP)}  "
-    print(h)
+    out.append(h)
     s = f"  {'':>3}  "
     s += f"  {'── Binaire ──':^{W_ATT + W_REP + 1}}  "
     s += f"  {'── Hex ──':^{3 + W_REP - 4 + 1}}  "
     s += f"  {'──── BCD ────':^{W_ATT + W_REP + 1}}  "
-    print(s)
-    print(f"  {'─'*3}  {'─'*(W_ATT + W_REP + 3)}  {'─'*(3 + W_REP - 4 + 3)}  {'─'*(W_ATT + W_REP + 3)}")
+    out.append(s)
+    out.append(f"  {'─'*3}  {'─'*(W_ATT + W_REP + 3)}  {'─'*(3 + W_REP - 4 + 3)}  {'─'*(W_ATT + W_REP + 3)}")
 
     for i in range(16):
         si = str(i)
@@ -256,13 +307,13 @@ def afficher_binaire_ex1(r):
             ok_bcd = norm_bcd(r_bcd) == att_bcd if norm_bcd(r_bcd) is not None else False
             line += f"  {pad(att_bcd, W_ATT)} {pad(vide(r_bcd), W_REP)} {marque(ok_bcd)}"
 
-        print(line)
+        out.append(line)
 
 
-def afficher_binaire_ex2(r):
+def afficher_binaire_ex2(r, out):
     ex = r["exercice2"]
     sc = ex["score"]
-    titre(f"Exercice 2 : Conversions aléatoires  ({sc['correct']}/{sc['total']})")
+    titre(f"Exercice 2 : Conversions aléatoires  ({sc['correct']}/{sc['total']})", out)
 
     enonce = ex["énoncé"]
     rep = ex["réponses"]
@@ -275,7 +326,7 @@ def afficher_binaire_ex2(r):
         val_dec = item["valeur_décimale"]
         val_aff = item["valeur_affichée"]
 
-        print(f"\n  Ligne {ligne}  │  {col_donnee} donné : {GRAS}{val_aff}{RESET}  (décimal = {val_dec})")
+        out.append(f"\n  Ligne {ligne}  │  {col_donnee} donné : {GRAS}{val_aff}{RESET}  (décimal = {val_dec})")
 
         ligne_rep = rep.get(str(ligne), {})
 
@@ -300,13 +351,13 @@ def afficher_binaire_ex2(r):
                 attendu = format_bcd(val_dec)
                 ok = norm_bcd(student) == dec_to_bcd(val_dec) if norm_bcd(student) is not None else False
 
-            print(f"    {pad(col_nom, 13)} : {pad(vide(student), 12)}  attendu : {pad(attendu, 12)} {marque(ok)}")
+            out.append(f"    {pad(col_nom, 13)} : {pad(vide(student), 12)}  attendu : {pad(attendu, 12)} {marque(ok)}")
 
 
-def afficher_binaire_ex3(r):
+def afficher_binaire_ex3(r, out):
     ex = r["exercice3"]
     sc = ex["score"]
-    titre(f"Exercice 3 : Logique  ({sc['correct']}/{sc['total']})")
+    titre(f"Exercice 3 : Logique  ({sc['correct']}/{sc['total']})", out)
 
     rep = ex["réponses"]
     eno = ex["énoncé"]
@@ -314,7 +365,7 @@ def afficher_binaire_ex3(r):
     a = int(eno["opérande_a"].replace(" ", ""), 2)
     b = int(eno["opérande_b"].replace(" ", ""), 2)
 
-    print(f"\n  Opérandes : A = {eno['opérande_a']} ({a})   B = {eno['opérande_b']} ({b})")
+    out.append(f"\n  Opérandes : A = {eno['opérande_a']} ({a})   B = {eno['opérande_b']} ({b})")
 
     # Tables de vérité attendues
     tt = {
@@ -327,7 +378,7 @@ def afficher_binaire_ex3(r):
     }
 
     # Tables de vérité
-    print(f"\n  {GRAS}Tables de vérité{RESET}")
+    out.append(f"\n  {GRAS}Tables de vérité{RESET}")
     tt_rep = rep["tables_vérité"]
     for op, table in tt.items():
         errs = []
@@ -338,12 +389,12 @@ def afficher_binaire_ex3(r):
         n = len(table)
         c = n - len(errs)
         if errs:
-            print(f"    {op:<5} {c}/{n} {marque(False)}  {', '.join(errs)}")
+            out.append(f"    {op:<5} {c}/{n} {marque(False)}  {', '.join(errs)}")
         else:
-            print(f"    {op:<5} {c}/{n} {marque(True)}")
+            out.append(f"    {op:<5} {c}/{n} {marque(True)}")
 
     # Karnaugh
-    print(f"\n  {GRAS}Tableaux de Karnaugh{RESET}")
+    out.append(f"\n  {GRAS}Tableaux de Karnaugh{RESET}")
     kn_rep = rep["karnaugh"]
     for op in ("AND", "OR", "XOR", "NAND", "NOR"):
         table = tt[op]
@@ -355,12 +406,12 @@ def afficher_binaire_ex3(r):
         n = len(table)
         c = n - len(errs)
         if errs:
-            print(f"    {op:<5} {c}/{n} {marque(False)}  {', '.join(errs)}")
+            out.append(f"    {op:<5} {c}/{n} {marque(False)}  {', '.join(errs)}")
         else:
-            print(f"    {op:<5} {c}/{n} {marque(True)}")
+            out.append(f"    {op:<5} {c}/{n} {marque(True)}")
 
     # Bit à bit
-    print(f"\n  {GRAS}Opérations bit à bit{RESET}")
+    out.append(f"\n  {GRAS}Opérations bit à bit{RESET}")
     bw_rep = rep["bit_à_bit"]
     bw_expected = {
         "NOT":  f"{(~b & 0xFF):08b}",
@@ -376,24 +427,24 @@ def afficher_binaire_ex3(r):
         ok = student_norm == expected
         label = "NOT B" if op == "NOT" else f"A {op} B"
         exp_fmt = f"{expected[:4]} {expected[4:]}"
-        print(f"    {pad(label, 10)} : {pad(vide(student), 12)}  attendu : {exp_fmt}  {marque(ok)}")
+        out.append(f"    {pad(label, 10)} : {pad(vide(student), 12)}  attendu : {exp_fmt}  {marque(ok)}")
 
 
 # ── Quiz Réseau ───────────────────────────────────────────────────────────
 
-def afficher_reseau(r):
-    entete(r)
-    afficher_reseau_ex1(r)
-    afficher_reseau_ex2(r)
+def afficher_reseau(r, out):
+    entete(r, out)
+    afficher_reseau_ex1(r, out)
+    afficher_reseau_ex2(r, out)
 
 
-def afficher_reseau_ex1(r):
+def afficher_reseau_ex1(r, out):
     ex = r["exercice1"]
     s_adr = ex["score_adresses"]
     s_comm = ex["score_communication"]
     total_c = s_adr["correct"] + s_comm["correct"]
     total_t = s_adr["total"] + s_comm["total"]
-    titre(f"Exercice 1 : Adressage réseau  ({total_c}/{total_t})")
+    titre(f"Exercice 1 : Adressage réseau  ({total_c}/{total_t})", out)
 
     communications = calculer_communications()
     id_to_nom = {m["id"]: m["nom"] for m in MACHINES}
@@ -401,22 +452,22 @@ def afficher_reseau_ex1(r):
     # 1.1 Adresses réseau
     W = (16, 16, 16, 14, 14)
 
-    print(f"\n  {GRAS}1.1 Adresses réseau{RESET}  ({s_adr['correct']}/{s_adr['total']})\n")
-    print(f"  {pad('Machine', W[0])} {pad('IP', W[1])} {pad('Masque', W[2])} {pad('Attendu', W[3])} Réponse")
-    print(f"  {'─'*W[0]} {'─'*W[1]} {'─'*W[2]} {'─'*W[3]} {'─'*W[4]}")
+    out.append(f"\n  {GRAS}1.1 Adresses réseau{RESET}  ({s_adr['correct']}/{s_adr['total']})\n")
+    out.append(f"  {pad('Machine', W[0])} {pad('IP', W[1])} {pad('Masque', W[2])} {pad('Attendu', W[3])} Réponse")
+    out.append(f"  {'─'*W[0]} {'─'*W[1]} {'─'*W[2]} {'─'*W[3]} {'─'*W[4]}")
 
     rep_adr = ex["réponses_adresses"]
     for m in MACHINES:
         attendu = calculer_adresse_reseau(m["ip"], m["masque"])
         student = rep_adr.get(m["nom"], "")
         ok = normaliser_ip(student) == attendu if student.strip() else False
-        print(
+        out.append(
             f"  {pad(m['nom'], W[0])} {pad(m['ip'], W[1])} {pad(m['masque'], W[2])} "
             f"{pad(attendu, W[3])} {pad(vide(student), W[4])} {marque(ok)}"
         )
 
     # 1.2 Communication
-    print(f"\n  {GRAS}1.2 Communication{RESET}  ({s_comm['correct']}/{s_comm['total']})\n")
+    out.append(f"\n  {GRAS}1.2 Communication{RESET}  ({s_comm['correct']}/{s_comm['total']})\n")
 
     rep_comm = ex["réponses_communication"]
     for m in MACHINES:
@@ -428,20 +479,20 @@ def afficher_reseau_ex1(r):
         att_str = ", ".join(attendu_noms) if attendu_noms else "(aucun)"
         stu_str = ", ".join(student_noms) if student_noms else "(aucun)"
 
-        print(f"  {pad(m['nom'], 16)} {marque(ok)}")
-        print(f"    Attendu : {att_str}")
-        print(f"    Réponse : {stu_str}")
+        out.append(f"  {pad(m['nom'], 16)} {marque(ok)}")
+        out.append(f"    Attendu : {att_str}")
+        out.append(f"    Réponse : {stu_str}")
 
     # 1.3 Diagnostic
-    print(f"\n  {GRAS}1.3 Diagnostic{RESET}\n")
+    out.append(f"\n  {GRAS}1.3 Diagnostic{RESET}\n")
     diag = ex.get("diagnostic", "")
-    print(f"    {diag if diag else f'{DIM}(vide){RESET}'}")
+    out.append(f"    {diag if diag else f'{DIM}(vide){RESET}'}")
 
 
-def afficher_reseau_ex2(r):
+def afficher_reseau_ex2(r, out):
     ex = r["exercice2"]
     sc = ex["score"]
-    titre(f"Exercice 2 : Plan d'adressage  ({sc['correct']}/{sc['total']})")
+    titre(f"Exercice 2 : Plan d'adressage  ({sc['correct']}/{sc['total']})", out)
 
     rep = ex["réponses"]
 
@@ -452,9 +503,9 @@ def afficher_reseau_ex2(r):
 
     W_NOM, W_IP, W_MSQ = 24, 18, 18
 
-    print()
-    print(f"  {pad('Appareil', W_NOM)} {pad('IP élève', W_IP)} {pad('Masque élève', W_MSQ)} IP  Msq")
-    print(f"  {'─'*W_NOM} {'─'*W_IP} {'─'*W_MSQ} {'─'*3} {'─'*3}")
+    out.append("")
+    out.append(f"  {pad('Appareil', W_NOM)} {pad('IP élève', W_IP)} {pad('Masque élève', W_MSQ)} IP  Msq")
+    out.append(f"  {'─'*W_NOM} {'─'*W_IP} {'─'*W_MSQ} {'─'*3} {'─'*3}")
 
     for nom, dev_rep in rep.items():
         dev = dev_map.get(nom)
@@ -477,46 +528,123 @@ def afficher_reseau_ex2(r):
                         and norm not in exclusions):
                     ok_ip = True
 
-        print(
+        out.append(
             f"  {pad(nom, W_NOM)} {pad(vide(rep_ip), W_IP)} "
             f"{pad(vide(rep_masque), W_MSQ)} {marque(ok_ip)}   {marque(ok_masque)}"
         )
 
-    print(f"\n  {DIM}Sous-réseau 1 : 192.168.0.0/25   (hôtes .1 – .126,  masque 255.255.255.128){RESET}")
-    print(f"  {DIM}Sous-réseau 2 : 192.168.0.128/25 (hôtes .129 – .254, masque 255.255.255.128){RESET}")
+    out.append(f"\n  {DIM}Sous-réseau 1 : 192.168.0.0/25   (hôtes .1 – .126,  masque 255.255.255.128){RESET}")
+    out.append(f"  {DIM}Sous-réseau 2 : 192.168.0.128/25 (hôtes .129 – .254, masque 255.255.255.128){RESET}")
 
 
 # ── Main ──────────────────────────────────────────────────────────────────
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Consulter les réponses d'un étudiant."
+        description="Consulter les réponses d'un ou plusieurs étudiants."
     )
     parser.add_argument("quiz", choices=["binaire", "reseau"],
                         help="Type de quiz (binaire ou reseau)")
-    parser.add_argument("code", help="Code de soumission (6 chiffres)")
+    parser.add_argument("codes", nargs="*", metavar="code",
+                        help="Code(s) de soumission (6 chiffres)")
+    selection = parser.add_argument_group("sélection sans code")
+    selection.add_argument("--all", action="store_true", help="Toutes les soumissions du quiz")
+    selection.add_argument("--since", metavar="DATE",
+                           help="Soumissions à partir de cette date (AAAA-MM-JJ[THH:MM])")
+    selection.add_argument("--until", metavar="DATE",
+                           help="Soumissions jusqu'à cette date incluse (AAAA-MM-JJ[THH:MM])")
+    selection.add_argument("--nom", metavar="PREFIXE",
+                           help="Début du nom de famille (insensible à la casse)")
+    sortie = parser.add_mutually_exclusive_group()
+    sortie.add_argument("--sortie", metavar="REPERTOIRE",
+                        help="Un fichier par soumission dans ce répertoire")
+    sortie.add_argument("--document", metavar="FICHIER",
+                        help="Tous les rapports dans un seul fichier (par défaut : écran)")
+    parser.add_argument("-p", "--processus", type=int,
+                        default=os.cpu_count() if (os.cpu_count() or 1) > 1 else 0,
+                        help="Processus de rendu en parallèle (0 : aucun ; "
+                             "par défaut un par cœur)")
+    parser.add_argument("--sans-couleurs", action="store_true",
+                        help="Texte brut, sans codes ANSI")
     args = parser.parse_args()
 
-    if not args.code.isdigit() or len(args.code) != 6:
-        print("Erreur : le code doit être composé de 6 chiffres.", file=sys.stderr)
+    filtres = args.all or args.since or args.until or args.nom
+    if not args.codes and not filtres:
+        parser.error("indiquer au moins un code, ou --all / --since / --until / --nom")
+    if args.codes and filtres:
+        parser.error("les codes et les filtres de sélection s'excluent")
+
+    for code in args.codes:
+        if not code.isdigit() or len(code) != 6:
+            print("Erreur : le code doit être composé de 6 chiffres.", file=sys.stderr)
+            sys.exit(1)
+
+    if not os.path.exists(DB_PATH):
+        print(f"Base introuvable : {DB_PATH}", file=sys.stderr)
         sys.exit(1)
 
-    r = charger_soumission(args.quiz, args.code)
-    if r is None:
+    try:
+        sql, params = requete_soumissions(args.quiz, args.codes, args.since, args.until,
+                                          args.nom)
+    except ValueError as e:
+        parser.error(f"date invalide : {e}")
+
+    if args.sans_couleurs:
+        desactiver_couleurs()
+    # Un seul rapport : pas de pool, son démarrage coûterait plus que le rendu.
+    pool = None
+    if args.processus and len(args.codes) != 1:
+        pool = multiprocessing.Pool(args.processus, initializer=initialiser,
+                                    initargs=(not args.sans_couleurs,))
+    if args.sortie:
+        os.makedirs(args.sortie, exist_ok=True)
+    document = open(args.document, "w", encoding="utf-8") if args.document else sys.stdout
+
+    conn = connecter()
+    conn.row_factory = None
+    trouves = set()
+    try:
+        curseur = conn.execute(sql, params)
+        while True:
+            lot = curseur.fetchmany(LOT)
+            if not lot:
+                break
+            travaux = [(args.quiz, code, donnees) for code, donnees in lot]
+            if pool:
+                rapports = pool.imap(_rendre_ligne, travaux, chunksize=8)
+            else:
+                rapports = map(_rendre_ligne, travaux)
+            for code, etudiant, rapport in rapports:
+                trouves.add(code)
+                if args.sortie:
+                    chemin = os.path.join(args.sortie, nom_fichier(args.quiz, code, etudiant))
+                    with open(chemin, "w", encoding="utf-8") as f:
+                        f.write(rapport)
+                else:
+                    document.write(rapport)
+    finally:
+        conn.fermer()
+        if pool:
+            pool.close()
+            pool.join()
+        if args.document:
+            document.close()
+
+    if args.sortie or args.document:
+        print(f"{len(trouves)} rapport(s) écrit(s) dans {args.sortie or args.document}")
+    elif not trouves and filtres:
+        print("Aucune soumission ne correspond.", file=sys.stderr)
+
+    manquants = [code for code in args.codes if code not in trouves]
+    for code in manquants:
         print(
-            f"Aucune soumission trouvée pour le code {args.code} "
+            f"Aucune soumission trouvée pour le code {code} "
             f"dans le quiz {args.quiz}.",
             file=sys.stderr,
         )
+    if manquants:
         sys.exit(1)
 
-    if args.quiz == "binaire":
-        afficher_binaire(r)
-    else:
-        afficher_reseau(r)
-
-    print()
-
 
 if __name__ == "__main__":
     main()
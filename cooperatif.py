@@ -0,0 +1,32 @@
+"""Mode coopératif : workers gevent de gunicorn.
+
+    gunicorn -k gevent --worker-connections 1000 -w 4 app:app
+
+Avec les workers sync, chaque connexion ouverte (flux de la salle
+d'attente, client lent sur le Wi-Fi de l'établissement) occupe un worker
+entier. Avec gevent, chaque requête est un greenlet : un worker garde des
+centaines de connexions inactives et les autres requêtes passent.
+
+Le worker gevent patche la bibliothèque standard (sockets, time.sleep,
+threading) avant de charger l'application. Reste SQLite, qui bloque dans
+du code C : db.Connexion fait passer execute, executemany et commit, là où
+SQLite attend un verrou (jusqu'à busy_timeout), dans le pool de threads
+natifs du hub gevent. La lecture des lignes (fetchall, itération) reste
+dans le greenlet : elle ne fait que du calcul.
+"""
+
+
+def actif():
+    """True dans un processus patché par gevent (worker gunicorn -k gevent)."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+
+def hors_boucle(fonction, *args, **kwargs):
+    """Exécute un appel bloquant dans un thread natif ; le greenlet attend sans bloquer le hub."""
+    from gevent import get_hub
+
+    return get_hub().threadpool.apply(fonction, args, kwargs)
@@ -1,20 +1,252 @@
+import hashlib
+import json
 import os
-import random
+import queue
+import re
+import secrets
 import sqlite3
+import tempfile
+import threading
+import time
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "data", "resultats.db")
+import config
+from cooperatif import actif as mode_cooperatif, hors_boucle
 
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DB_PATH = os.path.join(DATA_DIR, "resultats.db")
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+# Fichier témoin remplacé à chaque modification de quiz_config : son
+# (inode, mtime) sert de numéro de version partagé entre tous les workers.
+CONFIG_VERSION_PATH = os.path.join(DATA_DIR, "quiz_config.version")
+
+CONFIG_DEFAUT = {"mode": "entrainement", "ouvert": 0}
+
+# PRAGMA user_version à partir duquel les résumés (resumes_*) sont complets.
+VERSION_RESUMES = 1
+
+# Cache de quiz_config propre au worker, invalidé par version_config().
+_config_cache = {"version": None, "configs": None}
+
+
+# ---------------------------------------------------------------------------
+# Pool de connexions
+# ---------------------------------------------------------------------------
+
+class Connexion(sqlite3.Connection):
+    """Connexion du pool : close() la rend au pool au lieu de la fermer."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pid = os.getpid()
+        self.dans_requete = False
+        # Mesure de la requête Flask en cours (metriques.py), sinon None.
+        self.mesure = None
+        # Worker gevent (cooperatif.py) : appels bloquants dans un thread natif,
+        # et verrou d'écriture du worker tenu pendant une transaction.
+        self.cooperatif = mode_cooperatif()
+        self.verrou = None
+
+    def execute(self, sql, *args):
+        if self.mesure is None and not self.cooperatif:
+            return super().execute(sql, *args)
+        return self._bloquant(super().execute, sql, *args, ecrit=ECRITURE.match(sql) is not None)
+
+    def executemany(self, *args):
+        if self.mesure is None and not self.cooperatif:
+            return super().executemany(*args)
+        return self._bloquant(super().executemany, *args, ecrit=True)
+
+    def commit(self):
+        if self.mesure is None and not self.cooperatif:
+            return super().commit()
+        return self._bloquant(super().commit)
+
+    def rollback(self):
+        super().rollback()
+        self._liberer_verrou()
+
+    def __exit__(self, *exc):
+        # « with conn: » valide sans passer par commit().
+        if self.mesure is None and not self.cooperatif:
+            return super().__exit__(*exc)
+        return self._bloquant(super().__exit__, *exc)
+
+    def _bloquant(self, fonction, *args, ecrit=False):
+        """Appel qui peut attendre un verrou : chronométré, et hors du hub gevent.
+
+        En mode coopératif, une écriture prend d'abord le verrou du worker sur
+        cette base, gardé jusqu'à la fin de la transaction : les greenlets qui
+        attendent leur tour n'occupent pas les threads natifs dont celui qui
+        écrit a besoin pour valider.
+        """
+        if self.cooperatif:
+            if ecrit and self.verrou is None:
+                self.verrou = _verrou_ecriture(self.chemin)
+                self.verrou.acquire()
+            args = (fonction, *args)
+            fonction = hors_boucle
+        try:
+            if self.mesure is None:
+                return fonction(*args)
+            return self.mesure.chronometrer(fonction, *args)
+        finally:
+            if not self.in_transaction:
+                self._liberer_verrou()
+
+    def _liberer_verrou(self):
+        if self.verrou is not None:
+            self.verrou.release()
+            self.verrou = None
+
+    def close(self):
+        # Pendant une requête, la connexion appartient à g : rendue au teardown.
+        if not self.dans_requete:
+            _rendre(self)
+
+    def fermer(self):
+        """Ferme réellement la connexion."""
+        super().close()
+        self._liberer_verrou()
+
+
+# Instructions qui ouvrent une transaction d'écriture (mode coopératif).
+ECRITURE = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE|BEGIN|CREATE|DROP|ALTER)\b", re.I)
+# chemin -> verrou d'écriture du worker (mode coopératif)
+_verrous_ecriture = {}
+
+
+def _verrou_ecriture(chemin):
+    """Verrou créé à la demande : sous gevent, threading.Lock est celui de gevent."""
+    verrou = _verrous_ecriture.get(chemin)
+    if verrou is None:
+        verrou = _verrous_ecriture[chemin] = threading.Lock()
+    return verrou
+
+
+_pools = {"pid": None, "libres": {}}
+# Connexions héritées d'un fork : jamais réutilisées ni fermées dans l'enfant.
+_herites = []
+
+
+def _libres(chemin):
+    """File des connexions libres vers chemin (recréée après un fork)."""
+    pid = os.getpid()
+    if _pools["pid"] != pid:
+        _herites.append(_pools["libres"])
+        _pools["pid"] = pid
+        _pools["libres"] = {}
+    libres = _pools["libres"].get(chemin)
+    if libres is None:
+        libres = _pools["libres"][chemin] = queue.LifoQueue(maxsize=config.SQLITE_POOL_TAILLE)
+    return libres
+
+
+def connecter(chemin=None):
+    """Ouvre une nouvelle connexion et applique les PRAGMA une seule fois."""
+    chemin = chemin or DB_PATH
+    conn = sqlite3.connect(chemin, factory=Connexion, check_same_thread=False)
+    conn.chemin = chemin
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT}")
+    conn.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size={config.SQLITE_CACHE_SIZE}")
+    conn.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
     return conn
 
 
+def prendre_connexion(chemin=None):
+    """Connexion prise au pool de chemin (par défaut la base des résultats).
+
+    close() la rend au pool ; hors requête Flask, c'est ce qu'utilise get_db().
+    """
+    chemin = chemin or DB_PATH
+    try:
+        return _libres(chemin).get_nowait()
+    except queue.Empty:
+        return connecter(chemin)
+
+
+def _rendre(conn):
+    if conn.pid != os.getpid():
+        return
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _libres(conn.chemin).put_nowait(conn)
+    except queue.Full:
+        conn.fermer()
+
+
+def get_db():
+    """Connexion SQLite : la même pendant toute une requête Flask, sinon prise au pool."""
+    # Import local : les outils CLI (lister.py, consulter.py...) importent db
+    # sans payer le chargement de Flask.
+    from flask import g, has_app_context
+
+    if not has_app_context():
+        return prendre_connexion()
+    conn = g.get("_db")
+    if conn is None:
+        conn = prendre_connexion()
+        conn.dans_requete = True
+        mesure = g.get("_mesure_sql")
+        if mesure is not None:
+            conn.mesure = mesure
+            conn.set_trace_callback(mesure.tracer)
+        g._db = conn
+    return conn
+
+
+def liberer_db(_exc=None):
+    """Teardown : rend au pool la connexion de la requête."""
+    from flask import g
+
+    conn = g.pop("_db", None)
+    if conn is not None:
+        conn.dans_requete = False
+        if conn.mesure is not None:
+            conn.mesure = None
+            conn.set_trace_callback(None)
+        _rendre(conn)
+
+
+def vider_pool():
+    """Ferme les connexions libres (avant un fork avec gunicorn --preload)."""
+    for chemin in list(_pools["libres"]):
+        libres = _libres(chemin)
+        while True:
+            try:
+                libres.get_nowait().fermer()
+            except queue.Empty:
+                break
+
+
+# ---------------------------------------------------------------------------
+# Schéma
+# ---------------------------------------------------------------------------
+
+def schema_manquant(noms):
+    """Tables ou index de noms absents de la base, sans rien modifier.
+
+    Pour les outils en lecture seule : les migrations restent à init_db
+    (démarrage de l'application), jamais pendant qu'une classe soumet.
+    """
+    conn = prendre_connexion()
+    try:
+        presents = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    finally:
+        conn.close()
+    return [nom for nom in noms if nom not in presents]
+
+
+def message_schema(manquants):
+    return (f"Base pas encore migrée (absent : {', '.join(manquants)}) : "
+            "démarrer l'application une fois pour la mettre à jour.")
+
+
 def init_db():
     conn = get_db()
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("""CREATE TABLE IF NOT EXISTS resultats (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         quiz_id TEXT NOT NULL,
@@ -27,23 +259,448 @@ def init_db():
         donnees TEXT NOT NULL,
         UNIQUE(quiz_id, code)
     )""")
+    # Une ligne par champ de formulaire, pour agréger dans SQLite sans JSON.
+    conn.execute("""CREATE TABLE IF NOT EXISTS reponses (
+        resultat_id INTEGER NOT NULL REFERENCES resultats(id),
+        champ TEXT NOT NULL,
+        valeur TEXT NOT NULL,
+        attendu TEXT NOT NULL,
+        correct INTEGER NOT NULL,
+        PRIMARY KEY (resultat_id, champ)
+    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reponses_champ ON reponses(champ, correct)")
+    # Index des tris de /resultats (l'id, alias du rowid, y est implicite).
+    # Le tri par date couvre aussi les colonnes lues par lister.py, qui
+    # parcourt ainsi l'index sans jamais charger les lignes (et leur JSON).
+    conn.execute("DROP INDEX IF EXISTS idx_resultats_date")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resultats_liste ON resultats("
+        "quiz_id, date, id, code, nom, prenom, score_total_correct, score_total_total)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resultats_score "
+        "ON resultats(quiz_id, score_total_correct)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resultats_nom ON resultats(quiz_id, nom, prenom)")
     conn.execute("""CREATE TABLE IF NOT EXISTS quiz_config (
         quiz_id TEXT PRIMARY KEY,
         mode TEXT NOT NULL DEFAULT 'entrainement',
         ouvert INTEGER NOT NULL DEFAULT 0
     )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS compteurs_codes (
+        quiz_id TEXT PRIMARY KEY,
+        suivant INTEGER NOT NULL DEFAULT 0,
+        cle TEXT NOT NULL
+    )""")
+    # Date (epoch) de la dernière écriture dans resultats, par quiz : sert de
+    # Last-Modified aux exports. Les bases existantes partent de maintenant.
+    conn.execute("""CREATE TABLE IF NOT EXISTS modifications (
+        quiz_id TEXT PRIMARY KEY,
+        date REAL NOT NULL
+    )""")
+    conn.execute(
+        "INSERT OR IGNORE INTO modifications (quiz_id, date) "
+        "SELECT DISTINCT quiz_id, CAST(strftime('%s', 'now') AS REAL) FROM resultats"
+    )
+    # Analyse des items (analyse.py) : sommes par champ sur les soumissions
+    # d'id <= analyse_curseurs.dernier_id ; seules les suivantes restent à lire.
+    conn.execute("""CREATE TABLE IF NOT EXISTS analyse_champs (
+        quiz_id TEXT NOT NULL,
+        champ TEXT NOT NULL,
+        n INTEGER NOT NULL,
+        sx INTEGER NOT NULL,
+        sy INTEGER NOT NULL,
+        sxy INTEGER NOT NULL,
+        syy INTEGER NOT NULL,
+        PRIMARY KEY (quiz_id, champ)
+    ) WITHOUT ROWID""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS analyse_curseurs (
+        quiz_id TEXT PRIMARY KEY,
+        dernier_id INTEGER NOT NULL
+    )""")
     conn.commit()
+    _migrer_resumes(conn)
     conn.close()
+    if version_config() is None:
+        signaler_changement_config()
+
 
+def _migrer_resumes(conn, lot=1000):
+    """Crée les tables de résumés et y verse toutes les soumissions déjà enregistrées.
 
-def generer_code(conn, quiz_id):
-    """Genere un code unique de 6 chiffres pour un quiz donne."""
-    for _ in range(100):
-        code = f"{random.randint(0, 999999):06d}"
+    Création et remplissage dans une seule transaction (BEGIN IMMEDIATE) :
+    aucune soumission ne s'intercale, et un autre worker qui démarre en même
+    temps attend puis trouve la migration faite. PRAGMA user_version la
+    marque comme faite ; des résumés créés sans elle (base mise à jour avant
+    cette migration) sont reconstruits depuis resultats.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= VERSION_RESUMES:
+            conn.rollback()
+            return
+        # Résumés matérialisés des scores, par quiz et par jour, tenus à jour
+        # dans la transaction de chaque insertion : le tableau de bord les lit
+        # sans parcourir resultats. Histogramme des scores totaux (effectif,
+        # moyenne et médiane s'en déduisent) et sommes des scores par exercice.
+        conn.execute("""CREATE TABLE IF NOT EXISTS resumes_scores (
+            quiz_id TEXT NOT NULL,
+            jour TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            nombre INTEGER NOT NULL,
+            PRIMARY KEY (quiz_id, jour, score)
+        ) WITHOUT ROWID""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS resumes_exercices (
+            quiz_id TEXT NOT NULL,
+            jour TEXT NOT NULL,
+            exercice TEXT NOT NULL,
+            correct INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (quiz_id, jour, exercice)
+        ) WITHOUT ROWID""")
+        conn.execute("DELETE FROM resumes_scores")
+        conn.execute("DELETE FROM resumes_exercices")
+        curseur = conn.execute(
+            "SELECT quiz_id, date, score_total_correct, donnees FROM resultats"
+        )
+        while True:
+            rows = curseur.fetchmany(lot)
+            if not rows:
+                break
+            ajouter_resumes(conn, [dict(row) for row in rows])
+        conn.execute(f"PRAGMA user_version={VERSION_RESUMES}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+COLONNES_RESULTATS = (
+    "quiz_id", "code", "nom", "prenom", "date",
+    "score_total_correct", "score_total_total", "donnees",
+)
+
+
+def inserer_resultats(conn, lignes, ignorer_doublons=False):
+    """Insère des soumissions sans commit.
+
+    Chaque ligne est un dict de COLONNES_RESULTATS, plus "reponses" : la liste
+    des (champ, valeur, attendu, correct) écrite dans la même transaction, et
+    éventuellement "exercices" (scores_exercices, sinon relu dans donnees).
+    """
+    verbe = "INSERT OR IGNORE" if ignorer_doublons else "INSERT"
+    if ignorer_doublons:
+        # Lot rejoué : une ligne déjà écrite ne doit pas compter deux fois
+        # dans les résumés.
+        lignes = [
+            ligne for ligne in lignes
+            if conn.execute("SELECT 1 FROM resultats WHERE quiz_id=? AND code=?",
+                            (ligne["quiz_id"], ligne["code"])).fetchone() is None
+        ]
+    conn.executemany(
+        f"{verbe} INTO resultats ({', '.join(COLONNES_RESULTATS)}) "
+        f"VALUES ({', '.join('?' * len(COLONNES_RESULTATS))})",
+        [tuple(ligne[c] for c in COLONNES_RESULTATS) for ligne in lignes],
+    )
+    inserer_reponses(conn, [
+        (ligne["quiz_id"], ligne["code"], *detail)
+        for ligne in lignes for detail in ligne.get("reponses", ())
+    ], ignorer_doublons)
+    ajouter_resumes(conn, lignes)
+    marquer_modification(conn, {ligne["quiz_id"] for ligne in lignes})
+
+
+def inserer_reponses(conn, details, ignorer_doublons=False):
+    """Insère des (quiz_id, code, champ, valeur, attendu, correct) sans commit."""
+    verbe = "INSERT OR IGNORE" if ignorer_doublons else "INSERT"
+    conn.executemany(
+        f"{verbe} INTO reponses (resultat_id, champ, valeur, attendu, correct) "
+        "VALUES ((SELECT id FROM resultats WHERE quiz_id=? AND code=?), ?, ?, ?, ?)",
+        details,
+    )
+
+
+def scores_exercices(donnees):
+    """{exercice: (correct, total)} d'une soumission structurée.
+
+    Somme, pour chaque clé exerciceN, des sous-scores {"correct", "total"}
+    (score, score_adresses, score_communication...).
+    """
+    scores = {}
+    for cle, valeur in donnees.items():
+        if not cle.startswith("exercice") or not isinstance(valeur, dict):
+            continue
+        correct = total = 0
+        for nom, score in valeur.items():
+            if nom.startswith("score") and isinstance(score, dict):
+                correct += score.get("correct") or 0
+                total += score.get("total") or 0
+        scores[cle] = (correct, total)
+    return scores
+
+
+def ajouter_resumes(conn, lignes, signe=1):
+    """Ajoute (signe=-1 : retire) des soumissions aux résumés, sans commit.
+
+    Chaque ligne a au moins quiz_id, date, score_total_correct, et
+    "exercices" ou donnees.
+    """
+    scores, exercices = {}, {}
+    for ligne in lignes:
+        if ligne["score_total_correct"] is None:
+            continue
+        cle = (ligne["quiz_id"], ligne["date"][:10])
+        cle_score = cle + (ligne["score_total_correct"],)
+        scores[cle_score] = scores.get(cle_score, 0) + signe
+        par_exercice = ligne.get("exercices")
+        if par_exercice is None:
+            par_exercice = scores_exercices(json.loads(ligne["donnees"]))
+        for exercice, (correct, total) in par_exercice.items():
+            c, t = exercices.get(cle + (exercice,), (0, 0))
+            exercices[cle + (exercice,)] = (c + signe * correct, t + signe * total)
+    conn.executemany(
+        "INSERT INTO resumes_scores (quiz_id, jour, score, nombre) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET nombre = nombre + excluded.nombre",
+        [(*cle, n) for cle, n in scores.items()],
+    )
+    conn.executemany(
+        "INSERT INTO resumes_exercices (quiz_id, jour, exercice, correct, total) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET "
+        "correct = correct + excluded.correct, total = total + excluded.total",
+        [(*cle, c, t) for cle, (c, t) in exercices.items()],
+    )
+
+
+def lire_resume(quiz_id, jour=None):
+    """Résumé des scores d'un quiz (d'un seul jour AAAA-MM-JJ si jour).
+
+    Lit au plus une ligne par valeur de score et par exercice et par jour,
+    quel que soit le nombre de soumissions.
+    """
+    filtre, params = "quiz_id=?", [quiz_id]
+    if jour:
+        filtre += " AND jour=?"
+        params.append(jour)
+    conn = get_db()
+    try:
+        histogramme = conn.execute(
+            f"SELECT score, SUM(nombre) FROM resumes_scores WHERE {filtre} "
+            "GROUP BY score HAVING SUM(nombre) > 0 ORDER BY score",
+            params,
+        ).fetchall()
+        exercices = conn.execute(
+            f"SELECT exercice, SUM(correct), SUM(total) FROM resumes_exercices "
+            f"WHERE {filtre} GROUP BY exercice ORDER BY exercice",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+
+    nombre = sum(n for _, n in histogramme)
+    resume = {"nombre": nombre, "moyenne": None, "mediane": None, "exercices": {}}
+    if not nombre:
+        return resume
+    resume["moyenne"] = round(sum(s * n for s, n in histogramme) / nombre, 2)
+    # Médiane : valeur(s) de rang (nombre+1)//2 et nombre//2+1.
+    rangs = [(nombre + 1) // 2, nombre // 2 + 1]
+    valeurs, cumul = [], 0
+    for score, n in histogramme:
+        cumul += n
+        while rangs and rangs[0] <= cumul:
+            valeurs.append(score)
+            rangs.pop(0)
+    resume["mediane"] = sum(valeurs) / 2
+    for exercice, correct, total in exercices:
+        resume["exercices"][exercice] = {
+            "moyenne": round(correct / nombre, 2),
+            "total": round(total / nombre, 2),
+        }
+    return resume
+
+
+def marquer_modification(conn, quiz_ids):
+    """Note (sans commit) que les soumissions de ces quiz viennent de changer."""
+    maintenant = time.time()
+    conn.executemany(
+        "INSERT INTO modifications (quiz_id, date) VALUES (?, ?) "
+        "ON CONFLICT(quiz_id) DO UPDATE SET date=excluded.date",
+        [(quiz_id, maintenant) for quiz_id in quiz_ids],
+    )
+
+
+def derniere_modification(quiz_id):
+    """Epoch de la dernière écriture des soumissions du quiz, ou None."""
+    conn = get_db()
+    try:
         row = conn.execute(
-            "SELECT 1 FROM resultats WHERE quiz_id=? AND code=?",
-            (quiz_id, code),
+            "SELECT date FROM modifications WHERE quiz_id=?", (quiz_id,)
         ).fetchone()
-        if row is None:
-            return code
-    raise RuntimeError("Impossible de générer un code unique")
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+# Tris autorisés sur /resultats : colonnes indexées uniquement.
+TRIS_RESULTATS = {
+    "date": ("date",),
+    "score": ("score_total_correct",),
+    "nom": ("nom", "prenom"),
+}
+
+
+def compter_resultats(quiz_id):
+    conn = get_db()
+    n = conn.execute(
+        "SELECT COUNT(*) FROM resultats WHERE quiz_id=?", (quiz_id,)
+    ).fetchone()[0]
+    conn.close()
+    return n
+
+
+def iterer_resultats(quiz_id, tri="date", desc=False, limite=-1, decalage=0):
+    """Parcourt les soumissions d'un quiz triées sur un index, sans tout charger."""
+    sens = "DESC" if desc else "ASC"
+    ordre = ", ".join(f"{col} {sens}" for col in TRIS_RESULTATS[tri])
+    conn = get_db()
+    try:
+        curseur = conn.execute(
+            f"SELECT donnees FROM resultats WHERE quiz_id=? ORDER BY {ordre}, id {sens} "
+            "LIMIT ? OFFSET ?",
+            (quiz_id, limite, decalage),
+        )
+        for row in curseur:
+            yield json.loads(row["donnees"])
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Codes de dépôt
+# ---------------------------------------------------------------------------
+#
+# Chaque quiz a un compteur partagé (table compteurs_codes). Un worker en
+# réserve un bloc de CODES_BLOC valeurs par UPDATE ... RETURNING, puis
+# distribue ces valeurs sans accès à la base. Chaque valeur passe par une
+# permutation de Feistel à clé secrète (tirée au hasard à la création du
+# compteur) de [0, NB_CODES) : les codes ont l'air aléatoires, et deux
+# valeurs distinctes du compteur ne donnent jamais le même code.
+
+NB_CODES = 1_000_000
+_BITS = 20                  # 2**20 >= NB_CODES, parcours cyclique au-delà
+_DEMI = _BITS // 2
+_MASQUE = (1 << _DEMI) - 1
+_TOURS = 4
+
+_allocation = {"pid": None, "blocs": {}, "tables": {}}
+_allocation_verrou = threading.Lock()
+
+
+def _tables_feistel(cle):
+    """Fonctions de tour précalculées : _TOURS tables de 2**_DEMI entrées."""
+    tables = []
+    for tour in range(_TOURS):
+        table = []
+        for x in range(1 << _DEMI):
+            h = hashlib.blake2b(f"{tour}:{x}".encode(), key=cle.encode(), digest_size=4)
+            table.append(int.from_bytes(h.digest(), "big") & _MASQUE)
+        tables.append(table)
+    return tables
+
+
+def _permuter(n, tables):
+    """Bijection de [0, NB_CODES) sur lui-même (Feistel + parcours cyclique)."""
+    while True:
+        g, d = n >> _DEMI, n & _MASQUE
+        for table in tables:
+            g, d = d, g ^ table[d]
+        n = (g << _DEMI) | d
+        if n < NB_CODES:
+            return n
+
+
+def _reserver_bloc(quiz_id):
+    """Réserve un bloc du compteur. Retourne (valeurs libres, tables)."""
+    conn = connecter()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO compteurs_codes (quiz_id, cle) VALUES (?, ?)",
+                (quiz_id, secrets.token_hex(16)),
+            )
+            fin, cle = conn.execute(
+                "UPDATE compteurs_codes SET suivant = suivant + ? "
+                "WHERE quiz_id=? RETURNING suivant, cle",
+                (config.CODES_BLOC, quiz_id),
+            ).fetchone()
+        debut = fin - config.CODES_BLOC
+        if debut >= NB_CODES:
+            raise RuntimeError("Impossible de générer un code unique")
+
+        tables = _allocation["tables"].get(quiz_id)
+        if tables is None:
+            tables = _allocation["tables"][quiz_id] = _tables_feistel(cle)
+        codes = [f"{_permuter(n, tables):06d}" for n in range(debut, min(fin, NB_CODES))]
+
+        # Codes tirés au hasard par l'ancien générateur : une requête par bloc.
+        deja_pris = {
+            row[0] for row in conn.execute(
+                f"SELECT code FROM resultats WHERE quiz_id=? "
+                f"AND code IN ({', '.join('?' * len(codes))})",
+                (quiz_id, *codes),
+            )
+        }
+    finally:
+        conn.fermer()
+    return [c for c in codes if c not in deja_pris]
+
+
+def allouer_code(quiz_id):
+    """Retourne un code de 6 chiffres jamais attribué pour ce quiz, sans sondage."""
+    with _allocation_verrou:
+        if _allocation["pid"] != os.getpid():
+            # Un bloc hérité d'un fork est partagé avec le parent : on l'abandonne.
+            _allocation["pid"] = os.getpid()
+            _allocation["blocs"] = {}
+        bloc = _allocation["blocs"].setdefault(quiz_id, [])
+        while not bloc:
+            bloc.extend(reversed(_reserver_bloc(quiz_id)))
+        return bloc.pop()
+
+
+def signaler_changement_config():
+    """Publie une nouvelle version de quiz_config pour tous les workers."""
+    fd, tmp = tempfile.mkstemp(dir=DATA_DIR, prefix=".quiz_config.")
+    with os.fdopen(fd, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp, CONFIG_VERSION_PATH)
+
+
+def version_config():
+    """Version courante de quiz_config (un simple stat, sans requête SQL)."""
+    try:
+        st = os.stat(CONFIG_VERSION_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def lire_configs():
+    """Retourne {quiz_id: {"mode", "ouvert"}}, relu seulement si la version a changé."""
+    version = version_config()
+    if version is not None and version == _config_cache["version"]:
+        return _config_cache["configs"]
+
+    conn = get_db()
+    configs = {}
+    for row in conn.execute("SELECT quiz_id, mode, ouvert FROM quiz_config").fetchall():
+        configs[row["quiz_id"]] = {"mode": row["mode"], "ouvert": row["ouvert"]}
+    conn.close()
+
+    _config_cache["version"] = version
+    _config_cache["configs"] = configs
+    return configs
+
+
+def lire_config(quiz_id):
+    """Configuration d'un quiz, ou None s'il n'est pas encore enregistré."""
+    return lire_configs().get(quiz_id)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Écriture des soumissions : directe, ou différée par lots (write-behind).
+
+En mode différé (ECRITURE_DIFFEREE=1), /confirmation n'écrit que dans une
+file durable (data/file_attente.db, synchronous=FULL). Un écrivain unique
+(verrou sur data/file_attente.lock) vide la file par lots : un seul
+executemany et un seul commit sur data/resultats.db pour tout le lot.
+
+Le code de dépôt vient de db.allouer_code, qui ne répète jamais un code :
+il est donc unique dès sa mise en file, avant l'écriture du lot. La
+contrainte UNIQUE de la file reste un garde-fou pour les codes attribués
+par l'ancien générateur.
+
+Vider la file à la main (par exemple avant une sauvegarde) :
+
+    python3 ecriture.py
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+import config
+import db
+
+_ecrivain = {"pid": None}
+# (pid, chemin) de la file dont ce processus a déjà créé le schéma
+_schema_file = {"cle": None}
+
+
+def _chemin(nom):
+    return os.path.join(db.DATA_DIR, nom)
+
+
+def _connecter_file():
+    """Connexion à la file, prise au pool de db (rendue par close()).
+
+    Le schéma n'est créé qu'une fois par processus, et synchronous=FULL
+    qu'une fois par connexion : une mise en file ne coûte qu'un INSERT.
+    """
+    chemin = _chemin("file_attente.db")
+    conn = db.prendre_connexion(chemin)
+    if not getattr(conn, "file_attente", False):
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.file_attente = True
+    cle = (os.getpid(), chemin)
+    if _schema_file["cle"] != cle:
+        _creer_schema_file(conn)
+        _schema_file["cle"] = cle
+    return conn
+
+
+def _creer_schema_file(conn):
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""CREATE TABLE IF NOT EXISTS soumissions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_id TEXT NOT NULL,
+        code TEXT NOT NULL,
+        ligne TEXT,
+        ecrite INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(quiz_id, code)
+    )""")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_soumissions_a_ecrire "
+        "ON soumissions(id) WHERE ecrite=0"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Enregistrement
+# ---------------------------------------------------------------------------
+
+def enregistrer_resultat(quiz_id, construire):
+    """Enregistre la soumission construite par construire(code). Retourne le code."""
+    if config.ECRITURE_DIFFEREE:
+        return _mettre_en_file(quiz_id, construire)
+
+    conn = db.get_db()
+    try:
+        # allouer_code ne répète jamais un code : la contrainte UNIQUE ne peut
+        # échouer que sur une ligne écrite par l'ancien générateur aléatoire.
+        for _ in range(100):
+            code = db.allouer_code(quiz_id)
+            try:
+                with conn:
+                    db.inserer_resultats(conn, [construire(code)])
+            except sqlite3.IntegrityError:
+                continue
+            return code
+    finally:
+        conn.close()
+    raise RuntimeError("Impossible de générer un code unique")
+
+
+def _mettre_en_file(quiz_id, construire):
+    file = _connecter_file()
+    try:
+        for _ in range(100):
+            code = db.allouer_code(quiz_id)
+            try:
+                with file:
+                    file.execute(
+                        "INSERT INTO soumissions (quiz_id, code, ligne) VALUES (?,?,?)",
+                        (quiz_id, code, json.dumps(construire(code), ensure_ascii=False)),
+                    )
+            except sqlite3.IntegrityError:
+                continue  # code encore en file, attribué par l'ancien générateur
+            _demarrer_ecrivain()
+            return code
+    finally:
+        file.close()
+    raise RuntimeError("Impossible de générer un code unique")
+
+
+# ---------------------------------------------------------------------------
+# Écrivain
+# ---------------------------------------------------------------------------
+
+def vider_file():
+    """Écrit les soumissions en attente par lots. Retourne le nombre écrit.
+
+    Ne fait rien (et retourne 0) si un autre processus est déjà l'écrivain.
+    """
+    if not os.path.exists(_chemin("file_attente.db")):
+        return 0
+    with open(_chemin("file_attente.lock"), "w") as verrou:
+        try:
+            fcntl.flock(verrou, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+
+        file = _connecter_file()
+        conn = db.get_db()
+        ecrites = 0
+        try:
+            while True:
+                lot = file.execute(
+                    "SELECT id, ligne FROM soumissions WHERE ecrite=0 ORDER BY id LIMIT ?",
+                    (config.ECRITURE_LOT,),
+                ).fetchall()
+                if not lot:
+                    return ecrites
+                # Rejouer un lot après un arrêt brutal est sans effet : OR IGNORE.
+                db.inserer_resultats(
+                    conn, [json.loads(ligne) for _, ligne in lot], ignorer_doublons=True
+                )
+                conn.commit()
+                with file:
+                    file.executemany(
+                        "UPDATE soumissions SET ecrite=1, ligne=NULL WHERE id=?",
+                        [(id_,) for id_, _ in lot],
+                    )
+                ecrites += len(lot)
+        finally:
+            file.close()
+            conn.close()
+
+
+def _boucle_ecrivain():
+    while True:
+        time.sleep(config.ECRITURE_INTERVALLE)
+        try:
+            vider_file()
+        except Exception:
+            # Nouvel essai au tour suivant, la file est durable : l'écrivain
+            # ne doit pas mourir en laissant _ecrivain["pid"] posé.
+            traceback.print_exc()
+
+
+def _demarrer_ecrivain():
+    """Démarre le thread écrivain de ce worker (une fois par processus)."""
+    if _ecrivain["pid"] == os.getpid():
+        return
+    _ecrivain["pid"] = os.getpid()
+    threading.Thread(target=_boucle_ecrivain, name="ecrivain", daemon=True).start()
+
+
+if __name__ == "__main__":
+    print(f"{vider_file()} soumission(s) écrite(s)")
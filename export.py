@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Exporter les soumissions d'un quiz en CSV ou NDJSON, au fil de l'eau.
+
+Une colonne par champ de la structure produite par structurer_resultat,
+nommée par son chemin (exercice1.réponses.3.binaire, score_total.correct...).
+Les listes de valeurs (communications du quiz réseau) sont jointes par « ; ».
+Les soumissions sont lues ligne par ligne et l'export est produit par blocs :
+la mémoire ne dépend pas du nombre de soumissions.
+
+Même export que /admin/export/<quiz_id> :
+
+    python3 export.py binaire > binaire.csv
+    python3 export.py reseau --format ndjson --sortie reseau.ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+from db import DB_PATH, message_schema, prendre_connexion, schema_manquant
+
+# format -> type MIME de la réponse HTTP
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# Taille visée d'un bloc envoyé (un chunk HTTP).
+TAILLE_BLOC = 64 * 1024
+
+
+def aplatir(valeur, prefixe="", plat=None):
+    """Structure imbriquée -> {chemin: valeur}, dans l'ordre du JSON."""
+    if plat is None:
+        plat = {}
+    if isinstance(valeur, dict):
+        for cle, v in valeur.items():
+            aplatir(v, f"{prefixe}.{cle}" if prefixe else cle, plat)
+    elif isinstance(valeur, list) and any(isinstance(v, (dict, list)) for v in valeur):
+        # Numérotées à partir de 1, comme les lignes de l'exercice 2 binaire.
+        for i, v in enumerate(valeur, 1):
+            aplatir(v, f"{prefixe}.{i}", plat)
+    elif isinstance(valeur, list):
+        plat[prefixe] = "; ".join(str(v) for v in valeur)
+    else:
+        plat[prefixe] = valeur
+    return plat
+
+
+def generer_export(quiz_id, format_="csv"):
+    """Produit l'export par blocs de texte d'environ TAILLE_BLOC caractères.
+
+    Les colonnes CSV sont celles de la première soumission (toutes les
+    soumissions d'un quiz ont la même structure). La connexion est prise au
+    pool et rendue à la fin, y compris si le client coupe le téléchargement.
+    """
+    conn = prendre_connexion()
+    try:
+        curseur = conn.execute(
+            "SELECT donnees FROM resultats WHERE quiz_id=? ORDER BY date, id", (quiz_id,)
+        )
+        tampon = io.StringIO()
+        writer = None
+        for row in curseur:
+            plat = aplatir(json.loads(row[0]))
+            if format_ == "ndjson":
+                tampon.write(json.dumps(plat, ensure_ascii=False, separators=(",", ":")))
+                tampon.write("\n")
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(tampon, fieldnames=list(plat),
+                                            restval="", extrasaction="ignore")
+                    writer.writeheader()
+                writer.writerow(plat)
+            if tampon.tell() >= TAILLE_BLOC:
+                yield tampon.getvalue()
+                tampon.seek(0)
+                tampon.truncate()
+        if tampon.tell():
+            yield tampon.getvalue()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("quiz", help="Identifiant du quiz (binaire, reseau, ...)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="csv",
+                        help="Format de sortie (par défaut : csv)")
+    parser.add_argument("--sortie", metavar="FICHIER",
+                        help="Fichier de sortie (par défaut : sortie standard)")
+    args = parser.parse_args()
+
+    if not os.path.exists(DB_PATH):
+        print(f"Base introuvable : {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+    manquants = schema_manquant(("resultats",))
+    if manquants:
+        print(message_schema(manquants), file=sys.stderr)
+        sys.exit(1)
+
+    # newline="" : le module csv écrit lui-même ses fins de ligne.
+    sortie = open(args.sortie, "w", encoding="utf-8", newline="") if args.sortie else sys.stdout
+    try:
+        for bloc in generer_export(args.quiz, args.format):
+            sortie.write(bloc)
+        sortie.flush()
+    except BrokenPipeError:
+        sys.stdout = open(os.devnull, "w")
+    finally:
+        if args.sortie:
+            sortie.close()
+
+
+if __name__ == "__main__":
+    main()
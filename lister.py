@@ -1,52 +1,183 @@
 #!/usr/bin/env python3
-"""Lister toutes les soumissions des quiz."""
+"""Lister les soumissions des quiz, avec filtres.
 
-import json
+Seules les colonnes de resultats sont lues (jamais le JSON donnees), via un
+curseur parcouru ligne par ligne : la mémoire reste constante quelle que
+soit la taille de la base.
+
+    python3 lister.py
+    python3 lister.py --quiz binaire --since 2025-01-13 --until 2025-01-17
+    python3 lister.py --nom dup --score-min 20 --format csv > notes.csv
+"""
+
+import argparse
+import csv
 import os
-import sqlite3
 import sys
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-BASE = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE, "data", "resultats.db")
+from db import DB_PATH, connecter, message_schema, schema_manquant
 
+W_QUIZ, W_NOM, W_PRE, W_CODE, W_DATE, W_SCORE = 8, 14, 14, 6, 16, 7
 
-def main():
-    if not os.path.exists(DB_PATH):
-        print(f"Base introuvable : {DB_PATH}", file=sys.stderr)
-        sys.exit(1)
+COLONNES = ("quiz_id", "code", "nom", "prenom", "date",
+            "score_total_correct", "score_total_total")
+# Sortie JSON : l'objet de chaque ligne est construit par SQLite (json_object).
+OBJET_JSON = "json_object(" + ", ".join(f"'{c}', {c}" for c in COLONNES) + ")"
+
+
+# ---------------------------------------------------------------------------
+# Requête
+# ---------------------------------------------------------------------------
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute(
-        "SELECT quiz_id, donnees FROM resultats ORDER BY quiz_id, date"
-    ).fetchall()
-    conn.close()
+def _borne_date(texte, fin):
+    """AAAA-MM-JJ[THH:MM[:SS]] -> (opérateur, valeur comparable à la colonne date).
 
-    W_QUIZ, W_NOM, W_PRE, W_CODE, W_DATE, W_SCORE = 8, 14, 14, 6, 16, 7
+    Une date seule en fin d'intervalle inclut toute la journée.
+    """
+    if len(texte) == 10:
+        jour = date.fromisoformat(texte)
+        if fin:
+            return "<", (jour + timedelta(days=1)).isoformat()
+        return ">=", jour.isoformat()
+    moment = datetime.fromisoformat(texte).strftime("%Y-%m-%dT%H:%M:%S")
+    return ("<=" if fin else ">="), moment
 
-    print(
+
+def construire_requete(quiz=None, depuis=None, jusqua=None, nom=None,
+                       score_min=None, score_max=None, selection=None):
+    """Retourne (sql, paramètres) : soumissions filtrées, triées par quiz puis date.
+
+    selection : expression à lire (par défaut les colonnes COLONNES).
+    """
+    conditions, params = [], []
+    if quiz:
+        conditions.append("quiz_id = ?")
+        params.append(quiz)
+    if depuis:
+        op, valeur = _borne_date(depuis, fin=False)
+        conditions.append(f"date {op} ?")
+        params.append(valeur)
+    if jusqua:
+        op, valeur = _borne_date(jusqua, fin=True)
+        conditions.append(f"date {op} ?")
+        params.append(valeur)
+    if nom:
+        conditions.append("nom LIKE ? ESCAPE '\\'")
+        params.append(nom.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    if score_min is not None:
+        conditions.append("score_total_correct >= ?")
+        params.append(score_min)
+    if score_max is not None:
+        conditions.append("score_total_correct <= ?")
+        params.append(score_max)
+
+    sql = f"SELECT {selection or ', '.join(COLONNES)} FROM resultats"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    # Ordre de l'index couvrant idx_resultats_liste : ni tri, ni lecture des lignes.
+    sql += " ORDER BY quiz_id, date, id"
+    return sql, params
+
+
+# ---------------------------------------------------------------------------
+# Formats de sortie
+# ---------------------------------------------------------------------------
+
+def ecrire_tableau(rows, sortie):
+    sortie.write(
         f"  {'Quiz':<{W_QUIZ}} {'Nom':<{W_NOM}} {'Prénom':<{W_PRE}} "
-        f"{'Code':<{W_CODE}} {'Date':<{W_DATE}} {'Score':>{W_SCORE}}"
+        f"{'Code':<{W_CODE}} {'Date':<{W_DATE}} {'Score':>{W_SCORE}}\n"
     )
-    print(
+    sortie.write(
         f"  {'─'*W_QUIZ} {'─'*W_NOM} {'─'*W_PRE} "
-        f"{'─'*W_CODE} {'─'*W_DATE} {'─'*W_SCORE}"
+        f"{'─'*W_CODE} {'─'*W_DATE} {'─'*W_SCORE}\n"
     )
-
     total = 0
-    for row in rows:
-        r = json.loads(row["donnees"])
-        sc = r.get("score_total", {})
-        score = f"{sc.get('correct', '?')}/{sc.get('total', '?')}"
-        dt = datetime.fromisoformat(r["date"]).strftime("%d-%m-%Y %H:%M")
-        print(
-            f"  {row['quiz_id']:<{W_QUIZ}} {r['nom']:<{W_NOM}} {r['prenom']:<{W_PRE}} "
-            f"{r['code']:<{W_CODE}} {dt:<{W_DATE}} {score:>{W_SCORE}}"
+    for quiz_id, code, nom, prenom, d, correct, sur in rows:
+        score = f"{'?' if correct is None else correct}/{'?' if sur is None else sur}"
+        dt = f"{d[8:10]}-{d[5:7]}-{d[:4]} {d[11:16]}"
+        sortie.write(
+            f"  {quiz_id:<{W_QUIZ}} {nom:<{W_NOM}} {prenom:<{W_PRE}} "
+            f"{code:<{W_CODE}} {dt:<{W_DATE}} {score:>{W_SCORE}}\n"
         )
         total += 1
+    sortie.write(f"\n  {total} soumission(s)\n")
+
+
+def ecrire_csv(rows, sortie):
+    writer = csv.writer(sortie)
+    writer.writerow(COLONNES)
+    writer.writerows(rows)
+
+
+def ecrire_json(rows, sortie):
+    """Tableau JSON écrit au fil de l'eau (jamais construit en mémoire).
+
+    rows contient une seule colonne, l'objet déjà sérialisé (OBJET_JSON).
+    """
+    sortie.write("[")
+    separateur = "\n"
+    for (objet,) in rows:
+        sortie.write(separateur)
+        sortie.write(objet)
+        separateur = ",\n"
+    sortie.write("\n]\n")
+
+
+# format -> (expression lue, fonction d'écriture)
+FORMATS = {
+    "table": (None, ecrire_tableau),
+    "csv": (None, ecrire_csv),
+    "json": (OBJET_JSON, ecrire_json),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quiz", help="Identifiant du quiz (binaire, reseau, ...)")
+    parser.add_argument("--since", metavar="DATE",
+                        help="Soumissions à partir de cette date (AAAA-MM-JJ[THH:MM])")
+    parser.add_argument("--until", metavar="DATE",
+                        help="Soumissions jusqu'à cette date incluse (AAAA-MM-JJ[THH:MM])")
+    parser.add_argument("--nom", metavar="PREFIXE",
+                        help="Début du nom de famille (insensible à la casse)")
+    parser.add_argument("--score-min", type=int, help="Score total minimal (points)")
+    parser.add_argument("--score-max", type=int, help="Score total maximal (points)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="table",
+                        help="Format de sortie (par défaut : table)")
+    args = parser.parse_args()
+
+    if not os.path.exists(DB_PATH):
+        print(f"Base introuvable : {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+    manquants = schema_manquant(("resultats",))
+    if manquants:
+        print(message_schema(manquants), file=sys.stderr)
+        sys.exit(1)
+    if schema_manquant(("idx_resultats_liste",)):
+        # Même résultat, mais en lisant les lignes (et leur JSON) de la table.
+        print("  (index idx_resultats_liste absent : listing plus lent, "
+              "démarrer l'application pour le créer)", file=sys.stderr)
+
+    try:
+        selection, ecrire = FORMATS[args.format]
+        sql, params = construire_requete(args.quiz, args.since, args.until, args.nom,
+                                         args.score_min, args.score_max, selection)
+    except ValueError as e:
+        parser.error(f"date invalide : {e}")
 
-    print(f"\n  {total} soumission(s)")
+    conn = connecter()
+    # Tuples plutôt que sqlite3.Row : rien d'autre n'est créé par ligne.
+    conn.row_factory = None
+    try:
+        ecrire(conn.execute(sql, params), sys.stdout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Sortie coupée (| head) : ne pas afficher de trace.
+        sys.stdout = open(os.devnull, "w")
+    finally:
+        conn.fermer()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,296 @@
+"""Métriques par route : latence, instructions SQL, temps SQL, base occupée.
+
+Chaque requête Flask reçoit une MesureRequete : la connexion de db.get_db
+compte ses instructions (trace callback sqlite3) et chronomètre execute,
+executemany et commit. À la fin de la requête, les valeurs sont ajoutées
+aux compteurs du worker, par endpoint et méthode.
+
+Chaque worker gunicorn a ses propres compteurs : il les écrit toutes les
+ECRITURE_INTERVALLE secondes dans data/metriques/<pid>-<jeton>.json (le
+jeton, date de démarrage du processus, distingue deux workers qui ont eu
+le même pid), et /admin/metrics additionne les fichiers de tous les
+workers (format texte Prometheus). Le fichier d'un worker arrêté est versé
+dans retraites.json puis supprimé : les compteurs ne reculent jamais. Ils
+sont cumulés depuis la création du dossier ; supprimer data/metriques/ les
+remet à zéro.
+
+Le module sqlite3 n'expose pas le gestionnaire d'attente de SQLite : les
+attentes de verrou à l'intérieur de busy_timeout se voient dans le temps
+SQL, et quiz_sql_occupee_total compte les instructions qui ont fini en
+« database is locked ».
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import g, request
+
+import db
+
+# Bornes (secondes) des histogrammes de latence.
+BORNES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Intervalle entre deux écritures du fichier du worker.
+ECRITURE_INTERVALLE = 5.0
+
+_verrou = threading.Lock()
+# (endpoint, méthode) -> [effectifs par borne (+Inf en dernier), somme des
+# durées, instructions SQL, temps SQL, occupée]
+_routes = {}
+# (endpoint, méthode, statut) -> nombre de réponses
+_statuts = {}
+_ecriture = {"prochaine": 0.0}
+_processus = {"pid": None, "jeton": None}
+
+# Fichier d'un worker : <pid>-<jeton>.json (<pid>.json avant le jeton).
+NOM_FICHIER = re.compile(r"(\d+)(?:-(\w+))?\.json$")
+# Compteurs des workers arrêtés.
+RETRAITES = "retraites.json"
+
+
+class MesureRequete:
+    """Instructions et temps SQL d'une requête (voir db.Connexion)."""
+
+    __slots__ = ("instructions", "temps", "occupee")
+
+    def __init__(self):
+        self.instructions = 0
+        self.temps = 0.0
+        self.occupee = 0
+
+    def tracer(self, _sql):
+        self.instructions += 1
+
+    def chronometrer(self, fonction, *args, **kwargs):
+        debut = time.perf_counter()
+        try:
+            return fonction(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                self.occupee += 1
+            raise
+        finally:
+            self.temps += time.perf_counter() - debut
+
+
+def chemin_metriques():
+    return os.path.join(db.DATA_DIR, "metriques")
+
+
+def _debut_processus(pid):
+    """Date de démarrage d'un processus (/proc, Linux), ou None s'il n'existe pas."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Champ 22 ; le nom de commande (champ 2) peut contenir des espaces.
+            return f.read().rpartition(")")[2].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _jeton():
+    """Jeton de ce processus, recalculé après un fork."""
+    pid = os.getpid()
+    if _processus["pid"] != pid:
+        _processus["pid"] = pid
+        _processus["jeton"] = _debut_processus(pid) or secrets.token_hex(6)
+    return _processus["jeton"]
+
+
+def _vivant(pid, jeton):
+    """True si le worker qui a écrit <pid>-<jeton>.json tourne encore."""
+    if os.path.isdir("/proc"):
+        debut = _debut_processus(pid)
+        return debut is not None and (jeton is None or debut == jeton)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Collecte
+# ---------------------------------------------------------------------------
+
+def _debut_requete():
+    g._debut_requete = time.perf_counter()
+    g._mesure_sql = MesureRequete()
+
+
+def _fin_requete(reponse):
+    debut = g.pop("_debut_requete", None)
+    if debut is None:
+        return reponse
+    duree = time.perf_counter() - debut
+    mesure = g.pop("_mesure_sql")
+    cle = (request.endpoint or "inconnu", request.method)
+    with _verrou:
+        route = _routes.get(cle)
+        if route is None:
+            route = _routes[cle] = [[0] * (len(BORNES) + 1), 0.0, 0, 0.0, 0]
+        route[0][bisect.bisect_left(BORNES, duree)] += 1
+        route[1] += duree
+        route[2] += mesure.instructions
+        route[3] += mesure.temps
+        route[4] += mesure.occupee
+        cle_statut = (*cle, reponse.status_code)
+        _statuts[cle_statut] = _statuts.get(cle_statut, 0) + 1
+    if time.monotonic() >= _ecriture["prochaine"]:
+        ecrire()
+    return reponse
+
+
+def installer(app):
+    """Branche la collecte sur toutes les requêtes de l'application."""
+    app.before_request(_debut_requete)
+    app.after_request(_fin_requete)
+
+
+def _compteurs(routes, statuts):
+    return {
+        "routes": [[*cle, *valeurs] for cle, valeurs in routes.items()],
+        "statuts": [[*cle, n] for cle, n in statuts.items()],
+    }
+
+
+def _ecrire_json(dossier, nom, contenu):
+    fd, tmp = tempfile.mkstemp(dir=dossier, prefix=".metriques.")
+    with os.fdopen(fd, "w") as f:
+        f.write(contenu)
+    os.replace(tmp, os.path.join(dossier, nom))
+
+
+def ecrire():
+    """Écrit les compteurs de ce worker dans data/metriques/<pid>-<jeton>.json."""
+    with _verrou:
+        _ecriture["prochaine"] = time.monotonic() + ECRITURE_INTERVALLE
+        contenu = json.dumps(_compteurs(_routes, _statuts))
+    dossier = chemin_metriques()
+    os.makedirs(dossier, exist_ok=True)
+    _ecrire_json(dossier, f"{os.getpid()}-{_jeton()}.json", contenu)
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+
+def _lire(chemin):
+    try:
+        with open(chemin) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _ajouter(routes, statuts, contenu):
+    """Ajoute le contenu d'un fichier de compteurs à (routes, statuts)."""
+    for endpoint, methode, effectifs, somme, instructions, temps, occupee in contenu["routes"]:
+        route = routes.setdefault((endpoint, methode),
+                                  [[0] * (len(BORNES) + 1), 0.0, 0, 0.0, 0])
+        route[0] = [a + b for a, b in zip(route[0], effectifs)]
+        route[1] += somme
+        route[2] += instructions
+        route[3] += temps
+        route[4] += occupee
+    for endpoint, methode, statut, n in contenu["statuts"]:
+        statuts[(endpoint, methode, statut)] = statuts.get((endpoint, methode, statut), 0) + n
+
+
+def _retirer(dossier, arretes):
+    """Verse les fichiers des workers arrêtés dans retraites.json, puis les supprime.
+
+    Les noms versés sont d'abord notés dans retraites.json : un arrêt avant
+    leur suppression ne les compte pas deux fois.
+    """
+    retraites = _lire(os.path.join(dossier, RETRAITES)) or {"routes": [], "statuts": []}
+    absorbes = set(retraites.get("absorbes", ()))
+    routes, statuts = {}, {}
+    _ajouter(routes, statuts, retraites)
+    for nom in arretes:
+        contenu = _lire(os.path.join(dossier, nom))
+        if nom not in absorbes and contenu is not None:
+            _ajouter(routes, statuts, contenu)
+            absorbes.add(nom)
+    _ecrire_json(dossier, RETRAITES, json.dumps(
+        dict(_compteurs(routes, statuts), absorbes=sorted(absorbes))))
+    for nom in absorbes:
+        try:
+            os.remove(os.path.join(dossier, nom))
+        except FileNotFoundError:
+            pass
+    _ecrire_json(dossier, RETRAITES, json.dumps(_compteurs(routes, statuts)))
+
+
+def _additionner():
+    """Compteurs de tous les workers, arrêtés compris : (routes, statuts), formes de _routes.
+
+    Sous verrou : deux workers qui exposent en même temps ne versent pas
+    le même fichier deux fois, et ne lisent pas un fichier à moitié versé.
+    """
+    ecrire()
+    dossier = chemin_metriques()
+    moi = f"{os.getpid()}-{_jeton()}.json"
+    with open(os.path.join(dossier, ".verrou"), "w") as verrou:
+        fcntl.flock(verrou, fcntl.LOCK_EX)
+        arretes = [
+            nom for nom in os.listdir(dossier)
+            if nom != moi and (m := NOM_FICHIER.match(nom)) and not _vivant(int(m[1]), m[2])
+        ]
+        if arretes:
+            _retirer(dossier, arretes)
+
+        routes, statuts = {}, {}
+        for nom in os.listdir(dossier):
+            if nom == RETRAITES or NOM_FICHIER.match(nom):
+                contenu = _lire(os.path.join(dossier, nom))
+                if contenu is not None:
+                    _ajouter(routes, statuts, contenu)
+    return routes, statuts
+
+
+def exposer():
+    """Texte au format d'exposition Prometheus (version 0.0.4)."""
+    routes, statuts = _additionner()
+    lignes = [
+        "# HELP quiz_requete_duree_secondes Durée des requêtes HTTP.",
+        "# TYPE quiz_requete_duree_secondes histogram",
+    ]
+    for (endpoint, methode), (effectifs, somme, *_reste) in sorted(routes.items()):
+        etiquettes = f'endpoint="{endpoint}",methode="{methode}"'
+        cumul = 0
+        for borne, n in zip((*BORNES, "+Inf"), effectifs):
+            cumul += n
+            lignes.append(f'quiz_requete_duree_secondes_bucket{{{etiquettes},le="{borne}"}} {cumul}')
+        lignes.append(f"quiz_requete_duree_secondes_sum{{{etiquettes}}} {somme:.6f}")
+        lignes.append(f"quiz_requete_duree_secondes_count{{{etiquettes}}} {cumul}")
+
+    lignes += [
+        "# HELP quiz_requetes_total Réponses HTTP par statut.",
+        "# TYPE quiz_requetes_total counter",
+    ]
+    for (endpoint, methode, statut), n in sorted(statuts.items()):
+        lignes.append(
+            f'quiz_requetes_total{{endpoint="{endpoint}",methode="{methode}",statut="{statut}"}} {n}'
+        )
+
+    for nom, aide, index, format_ in (
+        ("quiz_sql_instructions_total", "Instructions SQL exécutées.", 2, "d"),
+        ("quiz_sql_duree_secondes_total", "Temps passé dans SQLite (attentes de verrou comprises).",
+         3, ".6f"),
+        ("quiz_sql_occupee_total", "Instructions échouées sur « database is locked ».", 4, "d"),
+    ):
+        lignes += [f"# HELP {nom} {aide}", f"# TYPE {nom} counter"]
+        for (endpoint, methode), valeurs in sorted(routes.items()):
+            lignes.append(
+                f'{nom}{{endpoint="{endpoint}",methode="{methode}"}} {valeurs[index]:{format_}}'
+            )
+    return "\n".join(lignes) + "\n"
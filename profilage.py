@@ -0,0 +1,252 @@
+"""Profilage des requêtes en production, à la demande (PROFILAGE=1).
+
+Deux façons de prendre une requête :
+
+- une requête sur PROFILAGE_ECHANTILLON passe entière sous cProfile, et son
+  profil est écrit en .prof (pstats, snakeviz...) ;
+- toutes les autres sont échantillonnées par un thread qui relève la pile
+  du thread de la requête toutes les PERIODE secondes ; si la requête dure
+  plus de PROFILAGE_SEUIL secondes, les piles sont écrites en .folded (une
+  pile par ligne, format de flamegraph.pl et speedscope).
+
+Un seul cProfile à la fois par worker : depuis Python 3.12, un second
+enable() pendant qu'un profil est actif lève ValueError ; une requête tirée
+au sort pendant ce temps n'est pas profilée. Sous les workers gevent
+(cooperatif.py), sys._current_frames() ne voit pas les greenlets :
+l'échantillonnage des requêtes lentes est désactivé, seul cProfile reste.
+
+Les fichiers vont dans data/profiles/, nommés par date, endpoint, durée et
+pid ; /admin/profils liste les plus lents. Sans PROFILAGE=1, create_app
+n'installe rien : aucun coût par requête.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+import config
+import db
+from cooperatif import actif as mode_cooperatif
+
+# Intervalle entre deux relevés de pile.
+PERIODE = 0.005
+# Au-delà, les profils les plus rapides sont supprimés.
+PROFILS_MAX = 200
+
+NOM_PROFIL = re.compile(r"^(\d{8}-\d{12})_([\w.]+)_(\d+)ms_(\d+)\.(prof|folded)$")
+
+# id du thread -> Counter des piles relevées pendant sa requête
+_en_cours = {}
+_echantillonneur = {"pid": None}
+# cProfile en cours dans ce worker (un seul à la fois)
+_cprofile = {"actif": False}
+_verrou = threading.Lock()
+
+
+def chemin_profils():
+    return os.path.join(db.DATA_DIR, "profiles")
+
+
+# ---------------------------------------------------------------------------
+# Échantillonnage des piles
+# ---------------------------------------------------------------------------
+
+def _pile(frame):
+    """Pile d'appels en une ligne, de l'appel le plus externe au plus interne."""
+    appels = []
+    while frame is not None:
+        code = frame.f_code
+        appels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(appels))
+
+
+def _echantillonner():
+    while True:
+        time.sleep(PERIODE)
+        if not _en_cours:
+            continue
+        frames = sys._current_frames()
+        with _verrou:
+            for thread_id, piles in _en_cours.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    piles[_pile(frame)] += 1
+
+
+def _demarrer_echantillonneur():
+    """Un thread par worker : les threads ne survivent pas au fork de gunicorn."""
+    pid = os.getpid()
+    if _echantillonneur["pid"] == pid:
+        return
+    with _verrou:
+        if _echantillonneur["pid"] != pid:
+            threading.Thread(target=_echantillonner, name="profilage", daemon=True).start()
+            _echantillonneur["pid"] = pid
+
+
+# ---------------------------------------------------------------------------
+# Collecte
+# ---------------------------------------------------------------------------
+
+def _prendre_cprofile():
+    """Démarre un cProfile si aucun autre ne tourne dans ce worker, sinon None."""
+    with _verrou:
+        if _cprofile["actif"]:
+            return None
+        _cprofile["actif"] = True
+    profil = cProfile.Profile()
+    try:
+        profil.enable()
+    except ValueError:
+        # Un autre outil de profilage est actif (sys.monitoring, 3.12+).
+        _cprofile["actif"] = False
+        return None
+    return profil
+
+
+def _debut_requete():
+    g._profil_debut = time.perf_counter()
+    echantillon = config.PROFILAGE_ECHANTILLON
+    if echantillon and random.random() * echantillon < 1:
+        profil = _prendre_cprofile()
+        if profil is not None:
+            g._profil = profil
+            return
+    if config.PROFILAGE_SEUIL and not mode_cooperatif():
+        _demarrer_echantillonneur()
+        with _verrou:
+            _en_cours[threading.get_ident()] = Counter()
+
+
+def _fin_requete(_exc=None):
+    debut = g.pop("_profil_debut", None)
+    if debut is None:
+        return
+    profil = g.pop("_profil", None)
+    if profil is not None:
+        profil.disable()
+        _cprofile["actif"] = False
+    with _verrou:
+        piles = _en_cours.pop(threading.get_ident(), None)
+        piles = piles.most_common() if piles else None
+    duree = time.perf_counter() - debut
+    if profil is not None:
+        _ecrire(duree, "prof", profil.dump_stats)
+    elif piles and duree >= config.PROFILAGE_SEUIL:
+        def ecrire_piles(chemin):
+            with open(chemin, "w") as f:
+                for pile, n in piles:
+                    f.write(f"{pile} {n}\n")
+        _ecrire(duree, "folded", ecrire_piles)
+
+
+def _ecrire(duree, extension, ecrire):
+    dossier = chemin_profils()
+    os.makedirs(dossier, exist_ok=True)
+    nom = (f"{datetime.now():%Y%m%d-%H%M%S%f}_{request.endpoint or 'inconnu'}_"
+           f"{round(duree * 1000)}ms_{os.getpid()}.{extension}")
+    tmp = os.path.join(dossier, f".{nom}")
+    ecrire(tmp)
+    os.replace(tmp, os.path.join(dossier, nom))
+    _elaguer()
+
+
+def _elaguer():
+    """Ne garde que les PROFILS_MAX profils les plus lents."""
+    profils = lister_profils()
+    for profil in profils[PROFILS_MAX:]:
+        try:
+            os.remove(os.path.join(chemin_profils(), profil["nom"]))
+        except FileNotFoundError:
+            pass  # Déjà supprimé par un autre worker.
+
+
+def installer(app):
+    """Branche le profilage sur toutes les requêtes de l'application."""
+    app.before_request(_debut_requete)
+    app.teardown_request(_fin_requete)
+
+
+# ---------------------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------------------
+
+def lister_profils():
+    """Profils de data/profiles/, du plus lent au plus rapide.
+
+    Chaque profil est un dict : nom, date, endpoint, duree (ms), pid, type
+    (« prof » ou « folded »).
+    """
+    try:
+        noms = os.listdir(chemin_profils())
+    except FileNotFoundError:
+        return []
+    profils = []
+    for nom in noms:
+        m = NOM_PROFIL.match(nom)
+        if m:
+            profils.append({
+                "nom": nom,
+                "date": datetime.strptime(m.group(1), "%Y%m%d-%H%M%S%f"),
+                "endpoint": m.group(2),
+                "duree": int(m.group(3)),
+                "pid": int(m.group(4)),
+                "type": m.group(5),
+            })
+    profils.sort(key=lambda p: p["duree"], reverse=True)
+    return profils
+
+
+def resumer_routes(profils):
+    """Par endpoint : nombre de profils, durée maximale et moyenne (ms), du pire au meilleur."""
+    routes = {}
+    for p in profils:
+        route = routes.setdefault(p["endpoint"], {"endpoint": p["endpoint"], "nombre": 0,
+                                                  "max": 0, "somme": 0})
+        route["nombre"] += 1
+        route["max"] = max(route["max"], p["duree"])
+        route["somme"] += p["duree"]
+    for route in routes.values():
+        route["moyenne"] = route.pop("somme") / route["nombre"]
+    return sorted(routes.values(), key=lambda r: r["max"], reverse=True)
+
+
+def detailler(nom, lignes=40):
+    """Résumé texte d'un profil : fonctions par temps cumulé (.prof) ou
+    fonctions les plus souvent en cours et piles les plus fréquentes (.folded).
+    """
+    chemin = os.path.join(chemin_profils(), nom)
+    if nom.endswith(".prof"):
+        sortie = io.StringIO()
+        pstats.Stats(chemin, stream=sortie).sort_stats("cumulative").print_stats(lignes)
+        return sortie.getvalue()
+
+    piles = Counter()
+    with open(chemin) as f:
+        for ligne in f:
+            pile, _, n = ligne.rpartition(" ")
+            piles[pile] = int(n)
+    total = sum(piles.values())
+    feuilles = Counter()
+    for pile, n in piles.items():
+        feuilles[pile.rpartition(";")[2]] += n
+
+    sortie = [f"{total} relevés toutes les {PERIODE * 1000:g} ms", "",
+              "Fonctions en cours (feuille de la pile) :"]
+    for fonction, n in feuilles.most_common(lignes):
+        sortie.append(f"  {n / total:6.1%}  {fonction}")
+    sortie += ["", "Piles les plus fréquentes :"]
+    for pile, n in piles.most_common(10):
+        sortie.append(f"  {n / total:6.1%}  {pile.replace(';', ' > ')}")
+    return "\n".join(sortie) + "\n"
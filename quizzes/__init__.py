@@ -1,22 +1,108 @@
+"""Registre des quiz, découverts dans quizzes/ et chargés à la demande.
+
+Chaque sous-dossier qui contient un quiz.json est un quiz, d'identifiant
+le nom du dossier :
+
+    {"titre": "...", "description": "..."}
+
+Au démarrage, on ne lit que ces manifestes : la page d'accueil, le tableau
+de bord et quiz_config n'ont besoin de rien d'autre. Le package du quiz
+(routes, logique, gabarits) n'est importé et son blueprint enregistré qu'à
+la première requête sous /<quiz_id>/, une fois par worker. QUIZ_PARESSEUX=0
+charge tout au démarrage, comme avant.
+"""
+
+import importlib
+import json
+import os
+import threading
+
+import config
 from db import get_db
 
+MANIFESTE = "quiz.json"
+
 QUIZ_REGISTRY = {}
 
+_verrou_chargement = threading.Lock()
+
+
+def lire_manifeste(dossier):
+    """Contenu du quiz.json du quiz rangé dans dossier."""
+    with open(os.path.join(dossier, MANIFESTE), encoding="utf-8") as f:
+        return json.load(f)
+
 
 def register_quiz(quiz_id, titre, description, blueprint):
-    QUIZ_REGISTRY[quiz_id] = {
+    QUIZ_REGISTRY.setdefault(quiz_id, {}).update({
         "titre": titre,
         "description": description,
         "blueprint": blueprint,
-    }
+    })
 
 
-def register_all(app):
-    from quizzes.binaire import bp as bp_binaire
-    from quizzes.reseau import bp as bp_reseau
+def decouvrir():
+    """Remplit QUIZ_REGISTRY à partir des manifestes, sans importer les quiz.
 
-    # Ne rien faire de plus avec bp_binaire/bp_reseau ici,
-    # register_quiz est appele dans chaque __init__.py
+    Parcourt tous les dossiers du package (quizzes.__path__), dans l'ordre
+    alphabétique des identifiants.
+    """
+    trouves = {}
+    for dossier in __path__:
+        for nom in os.listdir(dossier):
+            if nom.isidentifier() and os.path.isfile(os.path.join(dossier, nom, MANIFESTE)):
+                trouves.setdefault(nom, dossier)
+    for quiz_id in sorted(trouves):
+        dossier = os.path.join(trouves[quiz_id], quiz_id)
+        manifeste = lire_manifeste(dossier)
+        QUIZ_REGISTRY.setdefault(quiz_id, {"blueprint": None}).update({
+            "titre": manifeste["titre"],
+            "description": manifeste["description"],
+            "dossier": dossier,
+        })
+
+
+def charger(app, quiz_id):
+    """Importe le quiz et enregistre son blueprint, si ce n'est déjà fait."""
+    if quiz_id in app.blueprints:
+        return
+    with _verrou_chargement:
+        if quiz_id in app.blueprints:
+            return
+        bp = importlib.import_module(f"quizzes.{quiz_id}").bp
+        # Flask refuse d'enregistrer un blueprint après la première requête,
+        # pour ne pas modifier les routes pendant qu'un autre thread les lit.
+        # Ici l'ajout est fait sous verrou et werkzeug reconstruit sa table
+        # de routes sous le sien : on lève la garde le temps de l'ajout.
+        premiere_requete = app._got_first_request
+        app._got_first_request = False
+        try:
+            app.register_blueprint(bp, url_prefix=f"/{quiz_id}")
+        finally:
+            app._got_first_request = premiere_requete
+        # Chargé après app.prechauffer_gabarits : on compile ses gabarits
+        # de la même façon (au démarrage, le préchauffage s'en charge).
+        if app.jinja_env.bytecode_cache is not None:
+            for nom in bp.jinja_loader.list_templates():
+                if nom.endswith(".html"):
+                    app.jinja_env.get_template(nom)
+
+
+def _installer_chargement(app):
+    """Charge le quiz visé par l'URL avant que Flask ne cherche la route."""
+    wsgi_app = app.wsgi_app
+
+    def charger_puis_servir(environ, start_response):
+        quiz_id = environ.get("PATH_INFO", "").split("/", 2)[1:2]
+        if quiz_id and quiz_id[0] in QUIZ_REGISTRY and quiz_id[0] not in app.blueprints:
+            charger(app, quiz_id[0])
+        return wsgi_app(environ, start_response)
+
+    app.wsgi_app = charger_puis_servir
+
+
+def register_all(app):
+    decouvrir()
 
     conn = get_db()
     for quiz_id in QUIZ_REGISTRY:
@@ -27,5 +113,8 @@ def register_all(app):
     conn.commit()
     conn.close()
 
-    for quiz_id, meta in QUIZ_REGISTRY.items():
-        app.register_blueprint(meta["blueprint"], url_prefix=f"/{quiz_id}")
+    if config.QUIZ_PARESSEUX:
+        _installer_chargement(app)
+    else:
+        for quiz_id in QUIZ_REGISTRY:
+            charger(app, quiz_id)
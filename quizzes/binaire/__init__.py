@@ -1,11 +1,17 @@
+import os
+
 from flask import Blueprint, render_template, request, session, redirect, url_for, jsonify
 
-from db import get_db
-from quizzes import register_quiz
+import config
+from cache_http import page_versionnee
+from quizzes import lire_manifeste, register_quiz
+from quizzes.commun import (
+    quiz_ouvert, quiz_en_attente, flux_attente, page_resultats, sauvegarde_auto,
+)
 from quizzes.binaire.logic import (
     formater_donnee, format_bin,
     generer_exercice2, generer_exercice3,
-    corriger, sauvegarder_resultat, charger_resultats,
+    corriger, sauvegarder_resultat, charger_resultats, flux_resultats,
 )
 
 bp = Blueprint(
@@ -17,8 +23,9 @@ bp = Blueprint(
 )
 
 QUIZ_ID = "binaire"
-TITRE = "Test info atelier - partie 1"
-DESCRIPTION = "Conversions numériques et opérations logiques"
+_manifeste = lire_manifeste(os.path.dirname(__file__))
+TITRE = _manifeste["titre"]
+DESCRIPTION = _manifeste["description"]
 TOTAL_EXERCICES = 3
 
 
@@ -35,6 +42,7 @@ register_quiz(QUIZ_ID, TITRE, DESCRIPTION, bp)
 # ---------------------------------------------------------------------------
 
 @bp.route("/")
+@page_versionnee
 def accueil():
     return render_template(
         "accueil.html",
@@ -57,13 +65,7 @@ def start():
     session[_sk("ex3_operands")] = generer_exercice3()
 
     # Vérifier le mode test
-    conn = get_db()
-    row = conn.execute(
-        "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?", (QUIZ_ID,)
-    ).fetchone()
-    conn.close()
-
-    if row and row["mode"] == "test" and not row["ouvert"]:
+    if quiz_en_attente(QUIZ_ID):
         return redirect(url_for(".attente"))
 
     return redirect(url_for(".exercice", n=1))
@@ -79,19 +81,20 @@ def attente():
         titre=TITRE,
         nom=session.get(_sk("nom"), ""),
         prenom=session.get(_sk("prenom"), ""),
+        push=config.ATTENTE_PUSH,
     )
 
 
 @bp.route("/attente/status")
 def attente_status():
-    conn = get_db()
-    row = conn.execute(
-        "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?", (QUIZ_ID,)
-    ).fetchone()
-    conn.close()
-    if row and (row["mode"] == "entrainement" or row["ouvert"]):
-        return jsonify(ouvert=True)
-    return jsonify(ouvert=False)
+    return jsonify(ouvert=quiz_ouvert(QUIZ_ID))
+
+
+@bp.route("/attente/flux")
+def attente_flux():
+    if not config.ATTENTE_PUSH:
+        return "", 404
+    return flux_attente(QUIZ_ID)
 
 
 @bp.route("/exercice/<int:n>", methods=["GET", "POST"])
@@ -103,12 +106,7 @@ def exercice(n):
         return redirect(url_for(".accueil"))
 
     # Garde : vérifier le mode test
-    conn = get_db()
-    row = conn.execute(
-        "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?", (QUIZ_ID,)
-    ).fetchone()
-    conn.close()
-    if row and row["mode"] == "test" and not row["ouvert"]:
+    if quiz_en_attente(QUIZ_ID):
         return redirect(url_for(".attente"))
 
     if request.method == "POST":
@@ -149,6 +147,11 @@ def exercice(n):
     return render_template(f"binaire/exercice{n}.html", **kwargs)
 
 
+@bp.route("/sauvegarde", methods=["POST"])
+def sauvegarde():
+    return sauvegarde_auto(QUIZ_ID, _sk)
+
+
 @bp.route("/confirmation")
 def confirmation():
     if _sk("nom") not in session:
@@ -185,5 +188,6 @@ def confirmation():
 
 @bp.route("/resultats")
 def resultats():
-    tous = charger_resultats()
-    return render_template("binaire/resultats.html", resultats=tous)
+    return page_resultats(
+        "binaire/resultats.html", QUIZ_ID, charger_resultats, flux_resultats
+    )
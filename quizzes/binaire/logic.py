@@ -3,7 +3,8 @@ import random
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from db import get_db, generer_code
+from db import compter_resultats, iterer_resultats, scores_exercices
+from ecriture import enregistrer_resultat
 
 
 # ---------------------------------------------------------------------------
@@ -67,55 +68,118 @@ def generer_exercice3():
 # Correction automatique
 # ---------------------------------------------------------------------------
 
-def construire_corrections(ex2_data, ex3_operands):
-    """Construit le dictionnaire de corrections pour un étudiant donné."""
-    c = {}
-
-    # --- Exercice 1 : identique pour tous ---
+# Tables de vérité attendues (exercice 3, identiques pour tous)
+TABLES_VERITE = {
+    "not": {"0": "1", "1": "0"},
+    "and":  {"00": "0", "01": "0", "10": "0", "11": "1"},
+    "or":   {"00": "0", "01": "1", "10": "1", "11": "1"},
+    "xor":  {"00": "0", "01": "1", "10": "1", "11": "0"},
+    "nand": {"00": "1", "01": "1", "10": "1", "11": "0"},
+    "nor":  {"00": "1", "01": "0", "10": "0", "11": "0"},
+}
+
+
+def _verifier_chaine(valeur, attendu):
+    return valeur.strip().replace(" ", "") == attendu
+
+
+def _verifieur_entier(base):
+    def verifier(valeur, attendu):
+        s = valeur.strip().replace(" ", "")
+        if not s:
+            return False
+        try:
+            return int(s, base) == attendu
+        except ValueError:
+            return False
+    return verifier
+
+
+# Vérificateur choisi une fois pour toutes par type de champ :
+# verifier(valeur saisie, valeur attendue) -> bool, équivalent à
+# normaliser(valeur, type) == attendu.
+VERIFICATEURS = {
+    "dec": _verifieur_entier(10),
+    "hex": _verifieur_entier(16),
+    "bin": _verifieur_entier(2),
+    "bcd": _verifier_chaine,
+    "bw": _verifier_chaine,
+    "bit": _verifier_chaine,
+}
+
+
+def _compiler_plan_fixe():
+    """Parties de la correction identiques pour tous : (ex1, tables de l'ex3).
+
+    Chaque entrée est (champ, exercice, type, valeur attendue, vérificateur).
+    """
+    ex1 = []
     for i in range(16):
-        c[f"ex1_bin_{i}"] = ("bin", i)
-        c[f"ex1_hex_{i}"] = ("hex", i)
+        ex1.append((f"ex1_bin_{i}", 1, "bin", i))
+        ex1.append((f"ex1_hex_{i}", 1, "hex", i))
         if i < 10:
-            c[f"ex1_bcd_{i}"] = ("bcd", dec_to_bcd(i))
+            ex1.append((f"ex1_bcd_{i}", 1, "bcd", dec_to_bcd(i)))
+
+    ex3 = []
+    for op, table in TABLES_VERITE.items():
+        for inputs, output in table.items():
+            ex3.append((f"ex3_tt_{op}_{inputs}", 3, "bit", output))
+    for op in ("and", "or", "xor", "nand", "nor"):
+        for inputs, output in TABLES_VERITE[op].items():
+            ex3.append((f"ex3_kn_{op}_{inputs}", 3, "bit", output))
 
-    # --- Exercice 2 : valeurs aléatoires ---
+    return (
+        tuple((*e, VERIFICATEURS[e[2]]) for e in ex1),
+        tuple((*e, VERIFICATEURS[e[2]]) for e in ex3),
+    )
+
+
+_PLAN_EX1, _PLAN_EX3_TABLES = _compiler_plan_fixe()
+
+
+def _plan_etudiant(ex2_data, ex3_operands):
+    """Parties propres à l'étudiant : lignes de l'ex2 et opérations bit à bit."""
+    ex2 = []
     for row, given_col, dec_val in ex2_data:
         if given_col != "dec":
-            c[f"ex2_dec_{row}"] = ("dec", dec_val)
+            ex2.append((f"ex2_dec_{row}", 2, "dec", dec_val))
         if given_col != "bin":
-            c[f"ex2_bin_{row}"] = ("bin", dec_val)
+            ex2.append((f"ex2_bin_{row}", 2, "bin", dec_val))
         if given_col != "hex":
-            c[f"ex2_hex_{row}"] = ("hex", dec_val)
+            ex2.append((f"ex2_hex_{row}", 2, "hex", dec_val))
         if given_col != "bcd":
-            c[f"ex2_bcd_{row}"] = ("bcd", dec_to_bcd(dec_val))
-
-    # --- Exercice 3 : tables de vérité et Karnaugh (identiques pour tous) ---
-    tt = {
-        "not": {"0": "1", "1": "0"},
-        "and":  {"00": "0", "01": "0", "10": "0", "11": "1"},
-        "or":   {"00": "0", "01": "1", "10": "1", "11": "1"},
-        "xor":  {"00": "0", "01": "1", "10": "1", "11": "0"},
-        "nand": {"00": "1", "01": "1", "10": "1", "11": "0"},
-        "nor":  {"00": "1", "01": "0", "10": "0", "11": "0"},
-    }
-    for op, table in tt.items():
-        for inputs, output in table.items():
-            c[f"ex3_tt_{op}_{inputs}"] = ("bit", output)
-    for op in ("and", "or", "xor", "nand", "nor"):
-        for inputs, output in tt[op].items():
-            c[f"ex3_kn_{op}_{inputs}"] = ("bit", output)
+            ex2.append((f"ex2_bcd_{row}", 2, "bcd", dec_to_bcd(dec_val)))
 
-    # --- Exercice 3 : opérations bit à bit (aléatoires) ---
     a = ex3_operands["a"]
     b = ex3_operands["b"]
-    c["ex3_bw_not"]  = ("bw", f"{(~b & 0xFF):08b}")
-    c["ex3_bw_and"]  = ("bw", f"{(a & b):08b}")
-    c["ex3_bw_or"]   = ("bw", f"{(a | b):08b}")
-    c["ex3_bw_xor"]  = ("bw", f"{(a ^ b):08b}")
-    c["ex3_bw_nand"] = ("bw", f"{(~(a & b) & 0xFF):08b}")
-    c["ex3_bw_nor"]  = ("bw", f"{(~(a | b) & 0xFF):08b}")
+    bw = [
+        ("ex3_bw_not", 3, "bw", f"{(~b & 0xFF):08b}"),
+        ("ex3_bw_and", 3, "bw", f"{(a & b):08b}"),
+        ("ex3_bw_or", 3, "bw", f"{(a | b):08b}"),
+        ("ex3_bw_xor", 3, "bw", f"{(a ^ b):08b}"),
+        ("ex3_bw_nand", 3, "bw", f"{(~(a & b) & 0xFF):08b}"),
+        ("ex3_bw_nor", 3, "bw", f"{(~(a | b) & 0xFF):08b}"),
+    ]
+    verif = VERIFICATEURS
+    return (
+        [(*e, verif[e[2]]) for e in ex2],
+        [(*e, verif["bw"]) for e in bw],
+    )
+
+
+def plan_correction(ex2_data, ex3_operands):
+    """Plan complet dans l'ordre du sujet : ex1, ex2, tables de l'ex3, bit à bit."""
+    ex2, bw = _plan_etudiant(ex2_data, ex3_operands)
+    return (_PLAN_EX1, ex2, _PLAN_EX3_TABLES, bw)
 
-    return c
+
+def construire_corrections(ex2_data, ex3_operands):
+    """Construit le dictionnaire de corrections pour un étudiant donné."""
+    return {
+        champ: (type_champ, valeur)
+        for partie in plan_correction(ex2_data, ex3_operands)
+        for champ, _exo, type_champ, valeur, _verifier in partie
+    }
 
 
 NOMS_COLONNES = {"dec": "décimal", "bin": "binaire", "hex": "hexadécimal", "bcd": "BCD"}
@@ -223,49 +287,143 @@ def normaliser(valeur, type_champ):
 
 def corriger(reponses, ex2_data, ex3_operands):
     """Corrige les réponses d'un étudiant."""
-    corrections = construire_corrections(ex2_data, ex3_operands)
     scores = {1: [0, 0], 2: [0, 0], 3: [0, 0]}
-
-    for champ, (type_champ, valeur_correcte) in corrections.items():
-        exo = int(champ[2])
-
-        scores[exo][1] += 1  # total
-
-        reponse = reponses.get(champ, "")
-        norm = normaliser(reponse, type_champ)
-        if norm is not None and norm == valeur_correcte:
-            scores[exo][0] += 1  # correct
+    get = reponses.get
+
+    for partie in plan_correction(ex2_data, ex3_operands):
+        if not partie:
+            continue
+        exo = partie[0][1]
+        correct = 0
+        for champ, _exo, _type, valeur_correcte, verifier in partie:
+            if verifier(get(champ, ""), valeur_correcte):
+                correct += 1
+        scores[exo][0] += correct
+        scores[exo][1] += len(partie)
 
     total_c = sum(s[0] for s in scores.values())
     total_q = sum(s[1] for s in scores.values())
     return scores, total_c, total_q
 
 
+def formater_attendu(type_champ, valeur_correcte):
+    """Forme lisible d'une valeur attendue, pour la table reponses."""
+    if type_champ == "dec":
+        return str(valeur_correcte)
+    if type_champ == "hex":
+        return f"{valeur_correcte:X}"
+    if type_champ == "bin":
+        return f"{valeur_correcte:b}"
+    return valeur_correcte
+
+
+def detailler(reponses, ex2_data, ex3_operands):
+    """Détail par champ : liste de (champ, valeur, attendu, correct)."""
+    detail = []
+    for partie in plan_correction(ex2_data, ex3_operands):
+        for champ, _exo, type_champ, valeur_correcte, verifier in partie:
+            reponse = reponses.get(champ, "")
+            detail.append((
+                champ, reponse, formater_attendu(type_champ, valeur_correcte),
+                int(verifier(reponse, valeur_correcte)),
+            ))
+    return detail
+
+
+def relire_donnees(donnees):
+    """Inverse de structurer_resultat. Retourne (reponses, ex2_data, ex3_operands)."""
+    colonnes = {nom: col for col, nom in NOMS_COLONNES.items()}
+    reponses = {}
+
+    for i, rep in donnees["exercice1"]["réponses"].items():
+        reponses[f"ex1_bin_{i}"] = rep["binaire"]
+        reponses[f"ex1_hex_{i}"] = rep["hexadécimal"]
+        if int(i) < 10:
+            reponses[f"ex1_bcd_{i}"] = rep.get("BCD", "")
+
+    ex2 = donnees["exercice2"]
+    ex2_data = [
+        [e["ligne"], colonnes[e["colonne_donnée"]], e["valeur_décimale"]]
+        for e in ex2["énoncé"]
+    ]
+    for ligne, rep in ex2["réponses"].items():
+        for nom_col, valeur in rep.items():
+            reponses[f"ex2_{colonnes[nom_col]}_{ligne}"] = valeur
+
+    ex3 = donnees["exercice3"]
+    for cle, prefixe in (("tables_vérité", "tt"), ("karnaugh", "kn")):
+        for op, table in ex3["réponses"][cle].items():
+            for inputs, valeur in table.items():
+                reponses[f"ex3_{prefixe}_{op.lower()}_{inputs}"] = valeur
+    for op, valeur in ex3["réponses"]["bit_à_bit"].items():
+        reponses[f"ex3_bw_{op.lower()}"] = valeur
+    ex3_operands = {
+        "a": int(ex3["énoncé"]["opérande_a"].replace(" ", ""), 2),
+        "b": int(ex3["énoncé"]["opérande_b"].replace(" ", ""), 2),
+    }
+    return reponses, ex2_data, ex3_operands
+
+
+def detailler_donnees(donnees):
+    """Détail par champ d'une soumission enregistrée (colonne donnees)."""
+    return detailler(*relire_donnees(donnees))
+
+
+def recorriger(donnees, detail=False):
+    """Recorrige une soumission enregistrée.
+
+    Retourne (nouvelles donnees, ou None si aucun score ne change ;
+    détail par champ si detail=True, sinon None). detail="si_modifiee" :
+    détail seulement si la soumission change (elle sera réécrite).
+    """
+    reponses, ex2_data, ex3_operands = relire_donnees(donnees)
+    scores, total_c, total_q = corriger(reponses, ex2_data, ex3_operands)
+
+    nouvelles = None
+    anciens = [donnees[f"exercice{exo}"]["score"] for exo in (1, 2, 3)]
+    anciens.append(donnees["score_total"])
+    recalcules = [{"correct": scores[exo][0], "total": scores[exo][1]} for exo in (1, 2, 3)]
+    recalcules.append({"correct": total_c, "total": total_q})
+    if anciens != recalcules:
+        enonce = {"ex2_data": ex2_data, "ex3_operands": ex3_operands}
+        nouvelles = {cle: donnees[cle] for cle in ("code", "nom", "prenom", "date")}
+        nouvelles.update(structurer_resultat(enonce, reponses, scores, total_c, total_q))
+
+    if detail == "si_modifiee":
+        detail = nouvelles is not None
+    return nouvelles, detailler(reponses, ex2_data, ex3_operands) if detail else None
+
+
 def sauvegarder_resultat(nom, prenom, enonce, reponses, scores, total_c, total_q):
     """Sauvegarde une soumission dans la base SQLite. Retourne le code généré."""
-    conn = get_db()
-    code = generer_code(conn, "binaire")
-    entree = {
-        "code": code,
-        "nom": nom,
-        "prenom": prenom,
-        "date": datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%dT%H:%M:%S"),
-    }
-    entree.update(structurer_resultat(enonce, reponses, scores, total_c, total_q))
-    conn.execute(
-        "INSERT INTO resultats (quiz_id, code, nom, prenom, date, score_total_correct, score_total_total, donnees) VALUES (?,?,?,?,?,?,?,?)",
-        ("binaire", code, nom, prenom, entree["date"], total_c, total_q, json.dumps(entree, ensure_ascii=False)),
-    )
-    conn.commit()
-    conn.close()
-    return code
-
-
-def charger_resultats():
-    """Charge tous les résultats du quiz binaire."""
-    conn = get_db()
-    rows = conn.execute(
-        "SELECT donnees FROM resultats WHERE quiz_id='binaire' ORDER BY date"
-    ).fetchall()
-    conn.close()
-    return [json.loads(row["donnees"]) for row in rows]
+    date = datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%dT%H:%M:%S")
+    resultat = structurer_resultat(enonce, reponses, scores, total_c, total_q)
+    detail = detailler(reponses, enonce["ex2_data"], enonce["ex3_operands"])
+    exercices = scores_exercices(resultat)
+
+    def construire(code):
+        entree = {"code": code, "nom": nom, "prenom": prenom, "date": date}
+        entree.update(resultat)
+        return {
+            "quiz_id": "binaire", "code": code, "nom": nom, "prenom": prenom,
+            "date": date, "score_total_correct": total_c, "score_total_total": total_q,
+            "donnees": json.dumps(entree, ensure_ascii=False),
+            "reponses": detail,
+            "exercices": exercices,
+        }
+
+    return enregistrer_resultat("binaire", construire)
+
+
+def charger_resultats(page=1, par_page=50, tri="date", desc=False):
+    """Charge une page de résultats du quiz binaire. Retourne (résultats, total)."""
+    total = compter_resultats("binaire")
+    resultats = list(iterer_resultats(
+        "binaire", tri, desc, limite=par_page, decalage=(page - 1) * par_page
+    ))
+    return resultats, total
+
+
+def flux_resultats(tri="date", desc=False):
+    """Itère sur tous les résultats du quiz binaire (rendu en streaming)."""
+    return iterer_resultats("binaire", tri, desc)
@@ -0,0 +1,132 @@
+import json
+import math
+import re
+import time
+
+from flask import (
+    Response, jsonify, render_template, request, session, stream_template, url_for,
+)
+
+import config
+from db import TRIS_RESULTATS, compter_resultats, lire_config, version_config
+
+# Intervalle entre deux vérifications du fichier témoin de quiz_config.
+FLUX_INTERVALLE = 0.5
+# Commentaire SSE envoyé régulièrement pour garder la connexion ouverte.
+FLUX_KEEPALIVE = 10
+# Délai de reconnexion suggéré au navigateur en fin de flux (ms).
+FLUX_RECONNEXION_MS = 1000
+# Nombre de soumissions par page de /resultats.
+RESULTATS_PAR_PAGE = 50
+# Sauvegarde automatique : champs acceptés et taille maximale d'un envoi.
+CHAMP_REPONSE = re.compile(r"ex\d+_\w+")
+SAUVEGARDE_MAX_CHAMPS = 200
+SAUVEGARDE_MAX_VALEUR = 2000
+
+
+def quiz_ouvert(quiz_id):
+    """True si les étudiants peuvent accéder aux exercices du quiz."""
+    cfg = lire_config(quiz_id)
+    return bool(cfg and (cfg["mode"] == "entrainement" or cfg["ouvert"]))
+
+
+def quiz_en_attente(quiz_id):
+    """True si le quiz est en mode test et pas encore ouvert."""
+    cfg = lire_config(quiz_id)
+    return bool(cfg and cfg["mode"] == "test" and not cfg["ouvert"])
+
+
+def flux_attente(quiz_id):
+    """Flux Server-Sent Events de la salle d'attente.
+
+    Le flux ne relit quiz_config que lorsque le fichier témoin change (admin
+    qui bascule le quiz, quel que soit le worker), et se termine au bout de
+    ATTENTE_FLUX_DUREE secondes : le navigateur se reconnecte alors tout seul.
+    """
+    def generer():
+        yield f"retry: {FLUX_RECONNEXION_MS}\n\n"
+        fin = time.monotonic() + config.ATTENTE_FLUX_DUREE
+        prochain_ping = time.monotonic() + FLUX_KEEPALIVE
+        version = object()
+        while True:
+            courante = version_config()
+            if courante != version:
+                version = courante
+                if quiz_ouvert(quiz_id):
+                    yield f"event: ouverture\ndata: {json.dumps({'ouvert': True})}\n\n"
+                    return
+            maintenant = time.monotonic()
+            if maintenant >= fin:
+                return
+            if maintenant >= prochain_ping:
+                yield ": ping\n\n"
+                prochain_ping = maintenant + FLUX_KEEPALIVE
+            time.sleep(FLUX_INTERVALLE)
+
+    return Response(
+        generer(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def sauvegarde_auto(quiz_id, sk):
+    """Fusionne dans la session les champs modifiés envoyés par autosave.js.
+
+    Le corps est un objet JSON {champ: valeur} ne contenant que les champs
+    changés depuis le dernier envoi.
+    """
+    if sk("nom") not in session or sk("code") in session:
+        return jsonify(ok=False, redirection=url_for(".accueil")), 409
+    if quiz_en_attente(quiz_id):
+        return jsonify(ok=False, redirection=url_for(".attente")), 409
+
+    champs = request.get_json(silent=True)
+    if (
+        not isinstance(champs, dict)
+        or len(champs) > SAUVEGARDE_MAX_CHAMPS
+        or not all(
+            CHAMP_REPONSE.fullmatch(cle) and isinstance(valeur, str)
+            and len(valeur) <= SAUVEGARDE_MAX_VALEUR
+            for cle, valeur in champs.items()
+        )
+    ):
+        return jsonify(ok=False), 400
+
+    reponses = session.get(sk("reponses"), {})
+    reponses.update(champs)
+    session[sk("reponses")] = reponses
+    return jsonify(ok=True, champs=len(champs))
+
+
+def page_resultats(template, quiz_id, charger_resultats, flux_resultats):
+    """Rend /resultats : une page triée, ou toute la liste en streaming (?tout=1).
+
+    Query string : tri=date|score|nom, ordre=asc|desc, page=N.
+    """
+    tri = request.args.get("tri", "date")
+    if tri not in TRIS_RESULTATS:
+        tri = "date"
+    desc = request.args.get("ordre") == "desc"
+    contexte = {"tri": tri, "desc": desc}
+
+    if request.args.get("tout") == "1":
+        # Mémoire constante : les lignes sont lues et rendues au fil de l'eau.
+        return Response(stream_template(
+            template,
+            resultats=flux_resultats(tri, desc),
+            total=compter_resultats(quiz_id),
+            page=1, pages=1, tout=True, **contexte,
+        ))
+
+    page = max(1, request.args.get("page", 1, type=int))
+    resultats, total = charger_resultats(page, RESULTATS_PAR_PAGE, tri, desc)
+    return render_template(
+        template,
+        resultats=resultats,
+        total=total,
+        page=page,
+        pages=max(1, math.ceil(total / RESULTATS_PAR_PAGE)),
+        tout=False,
+        **contexte,
+    )
@@ -1,11 +1,17 @@
+import os
+
 from flask import Blueprint, render_template, request, session, redirect, url_for, jsonify
 
-from db import get_db
-from quizzes import register_quiz
+import config
+from cache_http import page_versionnee
+from quizzes import lire_manifeste, register_quiz
+from quizzes.commun import (
+    quiz_ouvert, quiz_en_attente, flux_attente, page_resultats, sauvegarde_auto,
+)
 from quizzes.reseau.logic import (
     MACHINES, EX2_DEVICES, EX2_GIVEN,
     corriger_ex1, corriger_ex2,
-    sauvegarder_resultat, charger_resultats,
+    sauvegarder_resultat, charger_resultats, flux_resultats,
 )
 
 bp = Blueprint(
@@ -17,8 +23,9 @@ bp = Blueprint(
 )
 
 QUIZ_ID = "reseau"
-TITRE = "Test info atelier - partie 2"
-DESCRIPTION = "Adressage IP et routage"
+_manifeste = lire_manifeste(os.path.dirname(__file__))
+TITRE = _manifeste["titre"]
+DESCRIPTION = _manifeste["description"]
 TOTAL_EXERCICES = 2
 
 
@@ -35,6 +42,7 @@ register_quiz(QUIZ_ID, TITRE, DESCRIPTION, bp)
 # ---------------------------------------------------------------------------
 
 @bp.route("/")
+@page_versionnee
 def accueil():
     return render_template(
         "accueil.html",
@@ -55,13 +63,7 @@ def start():
     session[_sk("prenom")] = request.form.get("prenom", "").strip()
 
     # Vérifier le mode test
-    conn = get_db()
-    row = conn.execute(
-        "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?", (QUIZ_ID,)
-    ).fetchone()
-    conn.close()
-
-    if row and row["mode"] == "test" and not row["ouvert"]:
+    if quiz_en_attente(QUIZ_ID):
         return redirect(url_for(".attente"))
 
     return redirect(url_for(".exercice", n=1))
@@ -77,19 +79,20 @@ def attente():
         titre=TITRE,
         nom=session.get(_sk("nom"), ""),
         prenom=session.get(_sk("prenom"), ""),
+        push=config.ATTENTE_PUSH,
     )
 
 
 @bp.route("/attente/status")
 def attente_status():
-    conn = get_db()
-    row = conn.execute(
-        "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?", (QUIZ_ID,)
-    ).fetchone()
-    conn.close()
-    if row and (row["mode"] == "entrainement" or row["ouvert"]):
-        return jsonify(ouvert=True)
-    return jsonify(ouvert=False)
+    return jsonify(ouvert=quiz_ouvert(QUIZ_ID))
+
+
+@bp.route("/attente/flux")
+def attente_flux():
+    if not config.ATTENTE_PUSH:
+        return "", 404
+    return flux_attente(QUIZ_ID)
 
 
 @bp.route("/exercice/<int:n>", methods=["GET", "POST"])
@@ -101,12 +104,7 @@ def exercice(n):
         return redirect(url_for(".accueil"))
 
     # Garde : vérifier le mode test
-    conn = get_db()
-    row = conn.execute(
-        "SELECT mode, ouvert FROM quiz_config WHERE quiz_id=?", (QUIZ_ID,)
-    ).fetchone()
-    conn.close()
-    if row and row["mode"] == "test" and not row["ouvert"]:
+    if quiz_en_attente(QUIZ_ID):
         return redirect(url_for(".attente"))
 
     if request.method == "POST":
@@ -143,6 +141,11 @@ def exercice(n):
     return render_template(f"reseau/exercice{n}.html", **kwargs)
 
 
+@bp.route("/sauvegarde", methods=["POST"])
+def sauvegarde():
+    return sauvegarde_auto(QUIZ_ID, _sk)
+
+
 @bp.route("/confirmation")
 def confirmation():
     if _sk("nom") not in session:
@@ -177,5 +180,6 @@ def confirmation():
 
 @bp.route("/resultats")
 def resultats():
-    tous = charger_resultats()
-    return render_template("reseau/resultats.html", resultats=tous)
+    return page_resultats(
+        "reseau/resultats.html", QUIZ_ID, charger_resultats, flux_resultats
+    )
@@ -2,7 +2,8 @@ import json
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from db import get_db, generer_code
+from db import compter_resultats, iterer_resultats, scores_exercices
+from ecriture import enregistrer_resultat
 
 
 # ---------------------------------------------------------------------------
@@ -138,28 +139,93 @@ def corriger_ex2(reponses):
         if dev.get("given"):
             continue
 
-        subnet = dev["subnet"]
-        lo, hi = SUBNET_RANGES[subnet]
-        exclusions = SUBNET_EXCLUSIONS[subnet]
-
         # Vérifier le masque
         rep_masque = reponses.get(f"ex2_masque_{dev['id']}", "").strip()
         if rep_masque == "255.255.255.128":
             score += 1
 
         # Vérifier l'IP
-        rep_ip = reponses.get(f"ex2_ip_{dev['id']}", "").strip()
-        norm_ip = normaliser_ip(rep_ip)
-        if norm_ip is not None:
-            octets = parse_ip(rep_ip)
-            if octets is not None and (octets[0] == 192 and octets[1] == 168 and octets[2] == 0
-                    and lo <= octets[3] <= hi
-                    and norm_ip not in exclusions):
-                score += 1
+        if ip_valide(reponses.get(f"ex2_ip_{dev['id']}", ""), dev):
+            score += 1
 
     return score, total
 
 
+def ip_valide(rep_ip, dev):
+    """True si rep_ip est une adresse libre du sous-réseau de l'appareil dev."""
+    subnet = dev["subnet"]
+    lo, hi = SUBNET_RANGES[subnet]
+    norm_ip = normaliser_ip(rep_ip)
+    if norm_ip is None:
+        return False
+    octets = parse_ip(rep_ip)
+    return (octets[0] == 192 and octets[1] == 168 and octets[2] == 0
+            and lo <= octets[3] <= hi
+            and norm_ip not in SUBNET_EXCLUSIONS[subnet])
+
+
+def detailler(reponses):
+    """Détail par champ : liste de (champ, valeur, attendu, correct).
+
+    Pour 1.2, chaque case à cocher (couple de machines) est un champ.
+    """
+    communications = calculer_communications()
+    detail = []
+
+    for m in MACHINES:
+        champ = f"ex1_reseau_{m['id']}"
+        attendu = calculer_adresse_reseau(m["ip"], m["masque"])
+        reponse = reponses.get(champ, "")
+        detail.append((champ, reponse, attendu, int(normaliser_ip(reponse) == attendu)))
+
+    for m in MACHINES:
+        for other in MACHINES:
+            if other["id"] == m["id"]:
+                continue
+            champ = f"ex1_comm_{m['id']}_{other['id']}"
+            attendu = "on" if other["id"] in communications[m["id"]] else ""
+            reponse = reponses.get(champ, "")
+            detail.append((champ, reponse, attendu, int((reponse == "on") == (attendu == "on"))))
+
+    for dev in EX2_DEVICES:
+        if dev.get("given"):
+            continue
+        lo, hi = SUBNET_RANGES[dev["subnet"]]
+        champ = f"ex2_ip_{dev['id']}"
+        reponse = reponses.get(champ, "")
+        detail.append((champ, reponse, f"192.168.0.{lo}-{hi}", int(ip_valide(reponse, dev))))
+        champ = f"ex2_masque_{dev['id']}"
+        reponse = reponses.get(champ, "")
+        detail.append((champ, reponse, "255.255.255.128", int(reponse.strip() == "255.255.255.128")))
+
+    return detail
+
+
+def relire_donnees(donnees):
+    """Inverse de structurer_resultat : retrouve le dict de réponses du formulaire."""
+    par_nom = {m["nom"]: m["id"] for m in MACHINES}
+    reponses = {}
+
+    ex1 = donnees["exercice1"]
+    for nom, valeur in ex1["réponses_adresses"].items():
+        reponses[f"ex1_reseau_{par_nom[nom]}"] = valeur
+    for nom, autres in ex1["réponses_communication"].items():
+        for autre in autres:
+            reponses[f"ex1_comm_{par_nom[nom]}_{par_nom[autre]}"] = "on"
+    reponses["ex1_diagnostic"] = ex1.get("diagnostic", "")
+
+    appareils = {d["nom"]: d["id"] for d in EX2_DEVICES if not d.get("given")}
+    for nom, rep in donnees["exercice2"]["réponses"].items():
+        reponses[f"ex2_ip_{appareils[nom]}"] = rep.get("ip", "")
+        reponses[f"ex2_masque_{appareils[nom]}"] = rep.get("masque", "")
+    return reponses
+
+
+def detailler_donnees(donnees):
+    """Détail par champ d'une soumission enregistrée (colonne donnees)."""
+    return detailler(relire_donnees(donnees))
+
+
 def structurer_resultat(reponses, scores):
     """Restructure les données brutes en format JSON lisible."""
     s11, s12, t11, t12 = scores["ex1"]
@@ -210,32 +276,55 @@ def structurer_resultat(reponses, scores):
     }
 
 
+def recorriger(donnees, detail=False):
+    """Recorrige une soumission enregistrée.
+
+    Retourne (nouvelles donnees, ou None si aucun score ne change ;
+    détail par champ si detail=True, sinon None). detail="si_modifiee" :
+    détail seulement si la soumission change (elle sera réécrite).
+    """
+    reponses = relire_donnees(donnees)
+    scores = {"ex1": corriger_ex1(reponses), "ex2": corriger_ex2(reponses)}
+    nouvelles = {cle: donnees[cle] for cle in ("code", "nom", "prenom", "date")}
+    nouvelles.update(structurer_resultat(reponses, scores))
+    if nouvelles == donnees:
+        nouvelles = None
+    if detail == "si_modifiee":
+        detail = nouvelles is not None
+    return nouvelles, detailler(reponses) if detail else None
+
+
 def sauvegarder_resultat(nom, prenom, reponses, scores):
     """Sauvegarde une soumission dans la base SQLite. Retourne le code généré."""
-    conn = get_db()
-    code = generer_code(conn, "reseau")
-    entree = {
-        "code": code,
-        "nom": nom,
-        "prenom": prenom,
-        "date": datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%dT%H:%M:%S"),
-    }
-    entree.update(structurer_resultat(reponses, scores))
-    st = entree["score_total"]
-    conn.execute(
-        "INSERT INTO resultats (quiz_id, code, nom, prenom, date, score_total_correct, score_total_total, donnees) VALUES (?,?,?,?,?,?,?,?)",
-        ("reseau", code, nom, prenom, entree["date"], st["correct"], st["total"], json.dumps(entree, ensure_ascii=False)),
-    )
-    conn.commit()
-    conn.close()
-    return code
-
-
-def charger_resultats():
-    """Charge tous les résultats du quiz réseau."""
-    conn = get_db()
-    rows = conn.execute(
-        "SELECT donnees FROM resultats WHERE quiz_id='reseau' ORDER BY date"
-    ).fetchall()
-    conn.close()
-    return [json.loads(row["donnees"]) for row in rows]
+    date = datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%dT%H:%M:%S")
+    resultat = structurer_resultat(reponses, scores)
+    st = resultat["score_total"]
+    detail = detailler(reponses)
+    exercices = scores_exercices(resultat)
+
+    def construire(code):
+        entree = {"code": code, "nom": nom, "prenom": prenom, "date": date}
+        entree.update(resultat)
+        return {
+            "quiz_id": "reseau", "code": code, "nom": nom, "prenom": prenom,
+            "date": date, "score_total_correct": st["correct"], "score_total_total": st["total"],
+            "donnees": json.dumps(entree, ensure_ascii=False),
+            "reponses": detail,
+            "exercices": exercices,
+        }
+
+    return enregistrer_resultat("reseau", construire)
+
+
+def charger_resultats(page=1, par_page=50, tri="date", desc=False):
+    """Charge une page de résultats du quiz réseau. Retourne (résultats, total)."""
+    total = compter_resultats("reseau")
+    resultats = list(iterer_resultats(
+        "reseau", tri, desc, limite=par_page, decalage=(page - 1) * par_page
+    ))
+    return resultats, total
+
+
+def flux_resultats(tri="date", desc=False):
+    """Itère sur tous les résultats du quiz réseau (rendu en streaming)."""
+    return iterer_resultats("reseau", tri, desc)
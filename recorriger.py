@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Recorriger toutes les soumissions d'un quiz avec les règles actuelles.
+
+Après une modification des règles de correction, les scores enregistrés
+(colonnes score_total_* et scores inclus dans donnees) sont recalculés à
+partir des réponses stockées, par lots d'id, éventuellement en parallèle.
+Seules les soumissions dont le résultat change sont réécrites, une
+transaction par lot, avec les résumés de scores du tableau de bord.
+
+    python3 recorriger.py binaire
+    python3 recorriger.py reseau --processus 4 --simulation
+
+Sans --processus, tout se fait dans le processus courant : sur un cœur,
+le pool ne fait qu'ajouter la sérialisation des lots (voir le README).
+
+Le bouton « Recorriger » du tableau de bord lance ce script en arrière-plan
+(lancer()) : l'état de la dernière recorrection de chaque quiz est gardé
+dans data/recorrections/<quiz_id>.json et affiché par le tableau de bord.
+"""
+
+import argparse
+import fcntl
+import importlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import db
+from analyse import invalider as invalider_analyse
+from db import ajouter_resumes, connecter, init_db, marquer_modification
+
+LOT = 2000
+
+
+def _recorriger_ligne(args):
+    """Travail d'un processus : (quiz_id, id, donnees, ...) -> changement ou None."""
+    quiz_id, id_, texte, avec_reponses = args
+    logic = importlib.import_module(f"quizzes.{quiz_id}.logic")
+    anciennes = json.loads(texte)
+    # Une seule correction par ligne ; le détail par champ n'est calculé que
+    # pour les lignes à réécrire.
+    nouvelles, detail = logic.recorriger(anciennes, detail=True if avec_reponses else "si_modifiee")
+    if nouvelles is None and not avec_reponses:
+        return None
+    return (
+        id_,
+        anciennes["score_total"]["correct"],
+        (nouvelles or anciennes)["score_total"],
+        json.dumps(nouvelles, ensure_ascii=False) if nouvelles is not None else None,
+        detail,
+    )
+
+
+def recorriger_quiz(quiz_id, processus=0, simulation=False, avec_reponses=False, lot=LOT):
+    """Recorrige un quiz. Retourne un résumé des différences.
+
+    processus : 0 pour tout faire dans le processus courant, sinon taille du pool.
+    avec_reponses : réécrire aussi la table reponses des soumissions inchangées.
+    """
+    importlib.import_module(f"quizzes.{quiz_id}.logic")  # quiz inconnu : ImportError
+    resume = {"quiz_id": quiz_id, "total": 0, "modifies": 0, "hausses": 0,
+              "baisses": 0, "delta": 0, "exemples": []}
+    pool = multiprocessing.Pool(processus) if processus else None
+    conn = connecter()
+    try:
+        dernier = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, quiz_id, date, score_total_correct, donnees FROM resultats "
+                "WHERE quiz_id=? AND id > ? ORDER BY id LIMIT ?",
+                (quiz_id, dernier, lot),
+            ).fetchall()
+            if not rows:
+                break
+            lignes = {row["id"]: dict(row) for row in rows}
+            dernier = rows[-1]["id"]
+            resume["total"] += len(rows)
+
+            travaux = [(quiz_id, row["id"], row["donnees"], avec_reponses) for row in rows]
+            if pool:
+                changements = pool.map(_recorriger_ligne, travaux, chunksize=64)
+            else:
+                changements = map(_recorriger_ligne, travaux)
+            changements = [c for c in changements if c is not None]
+
+            mises_a_jour, anciennes, nouvelles = [], [], []
+            for id_, avant, score, texte, _detail in changements:
+                if texte is None:
+                    continue
+                mises_a_jour.append((score["correct"], score["total"], texte, id_))
+                anciennes.append(lignes[id_])
+                nouvelles.append({"quiz_id": quiz_id, "date": lignes[id_]["date"],
+                                  "score_total_correct": score["correct"], "donnees": texte})
+                resume["modifies"] += 1
+                resume["delta"] += score["correct"] - avant
+                if score["correct"] != avant:
+                    resume["hausses" if score["correct"] > avant else "baisses"] += 1
+                    if len(resume["exemples"]) < 10:
+                        code = json.loads(texte)["code"]
+                        resume["exemples"].append((code, avant, score["correct"]))
+
+            if simulation:
+                continue
+            with conn:
+                conn.executemany(
+                    "UPDATE resultats SET score_total_correct=?, score_total_total=?, "
+                    "donnees=? WHERE id=?",
+                    mises_a_jour,
+                )
+                reecrits = [c for c in changements if c[3] is not None or avec_reponses]
+                conn.executemany(
+                    "DELETE FROM reponses WHERE resultat_id=?",
+                    [(c[0],) for c in reecrits],
+                )
+                conn.executemany(
+                    "INSERT INTO reponses (resultat_id, champ, valeur, attendu, correct) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(c[0], *d) for c in reecrits for d in c[4]],
+                )
+                if reecrits:
+                    invalider_analyse(conn, quiz_id)
+                if mises_a_jour:
+                    ajouter_resumes(conn, anciennes, signe=-1)
+                    ajouter_resumes(conn, nouvelles)
+                    marquer_modification(conn, [quiz_id])
+    finally:
+        conn.fermer()
+        if pool:
+            pool.close()
+            pool.join()
+    return resume
+
+
+def formater_resume(resume):
+    lignes = [
+        f"  {resume['quiz_id']} : {resume['modifies']}/{resume['total']} soumission(s) modifiée(s), "
+        f"{resume['hausses']} en hausse, {resume['baisses']} en baisse "
+        f"(total des points : {resume['delta']:+d})",
+    ]
+    for code, avant, apres in resume["exemples"]:
+        lignes.append(f"    {code} : {avant} → {apres}")
+    return "\n".join(lignes)
+
+
+# ---------------------------------------------------------------------------
+# Recorrection en arrière-plan (tableau de bord)
+# ---------------------------------------------------------------------------
+
+def chemin_etats():
+    return os.path.join(db.DATA_DIR, "recorrections")
+
+
+def _maintenant():
+    return datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def ecrire_etat(quiz_id, etat):
+    """Remplace atomiquement l'état de la recorrection d'un quiz."""
+    dossier = chemin_etats()
+    os.makedirs(dossier, exist_ok=True)
+    fd, temporaire = tempfile.mkstemp(dir=dossier, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(etat, f, ensure_ascii=False)
+    os.replace(temporaire, os.path.join(dossier, f"{quiz_id}.json"))
+
+
+def _vivant(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def lire_etats():
+    """{quiz_id: état de sa dernière recorrection}.
+
+    Une recorrection dont le processus a disparu sans finir est marquée
+    interrompue.
+    """
+    dossier = chemin_etats()
+    etats = {}
+    if not os.path.isdir(dossier):
+        return etats
+    for fichier in sorted(os.listdir(dossier)):
+        if not fichier.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(dossier, fichier), encoding="utf-8") as f:
+                etat = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if etat.get("etat") == "en cours" and not _vivant(etat.get("pid", 0)):
+            etat["etat"] = "interrompue"
+        etats[fichier[:-len(".json")]] = etat
+    return etats
+
+
+def lancer(quiz_id):
+    """Lance recorriger.py pour un quiz dans un processus séparé.
+
+    Retourne False si une recorrection de ce quiz est déjà en cours. Le
+    processus n'utilise pas de pool (les étudiants passent peut-être un
+    test) et valide lot par lot : il ne bloque ni un worker ni la base.
+    """
+    if lire_etats().get(quiz_id, {}).get("etat") == "en cours":
+        return False
+    # Le processus écrit lui-même son état ; s'il en trouve un autre déjà en
+    # cours (double clic), il s'arrête sans rien faire.
+    processus = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), quiz_id, "--processus", "0",
+         "--donnees", db.DATA_DIR],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # Attendu dans un fil : pas de processus zombie dans le worker.
+    threading.Thread(target=processus.wait, daemon=True).start()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("quiz", help="Identifiant du quiz (binaire, reseau, ...)")
+    parser.add_argument("-p", "--processus", type=int, default=0,
+                        help="Taille du pool de processus (par défaut 0 : pas de pool ; "
+                             "utile seulement avec plusieurs cœurs libres)")
+    parser.add_argument("--simulation", action="store_true",
+                        help="Afficher les différences sans rien écrire")
+    parser.add_argument("--reponses", action="store_true",
+                        help="Réécrire la table reponses de toutes les soumissions")
+    parser.add_argument("--donnees", metavar="DOSSIER",
+                        help="Répertoire data/ (par défaut : celui du dépôt)")
+    args = parser.parse_args()
+
+    if args.donnees:
+        db.DATA_DIR = args.donnees
+        db.DB_PATH = os.path.join(args.donnees, "resultats.db")
+        db.CONFIG_VERSION_PATH = os.path.join(args.donnees, "quiz_config.version")
+    if not os.path.exists(db.DB_PATH):
+        print(f"Base introuvable : {db.DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        importlib.import_module(f"quizzes.{args.quiz}.logic")
+    except ImportError:
+        print(f"Quiz inconnu : {args.quiz}", file=sys.stderr)
+        sys.exit(1)
+    init_db()
+
+    if args.simulation:
+        print(formater_resume(recorriger_quiz(args.quiz, args.processus, True, args.reponses)))
+        print("  (simulation : aucune écriture)")
+        return
+
+    # Deux recorrections simultanées d'un quiz retireraient deux fois les
+    # anciens scores des résumés : une seule à la fois, verrou tenu jusqu'à
+    # la sortie du processus.
+    os.makedirs(chemin_etats(), exist_ok=True)
+    verrou = open(os.path.join(chemin_etats(), f"{args.quiz}.verrou"), "w")
+    try:
+        fcntl.flock(verrou, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print(f"Recorrection de {args.quiz} déjà en cours", file=sys.stderr)
+        sys.exit(1)
+
+    etat = {"etat": "en cours", "pid": os.getpid(), "debut": _maintenant()}
+    ecrire_etat(args.quiz, etat)
+    try:
+        resume = recorriger_quiz(args.quiz, args.processus, False, args.reponses)
+    except BaseException as e:
+        ecrire_etat(args.quiz, dict(etat, etat="erreur", fin=_maintenant(), resume=repr(e)))
+        raise
+    ecrire_etat(args.quiz, dict(etat, etat="terminée", fin=_maintenant(),
+                                resume=formater_resume(resume)))
+    print(formater_resume(resume))
+
+
+if __name__ == "__main__":
+    main()
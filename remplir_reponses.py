@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Remplir la table reponses pour les soumissions enregistrées avant sa création.
+
+Les résumés du tableau de bord (resumes_*) n'ont pas besoin de ce script :
+init_db les construit à la migration, au démarrage de l'application.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+
+from analyse import invalider as invalider_analyse
+from db import DB_PATH, connecter, init_db
+
+LOT = 1000
+
+
+def remplir(conn, lot=LOT):
+    """Détaille toutes les soumissions sans réponses normalisées. Retourne {quiz_id: n}."""
+    modules = {}
+    compte = {}
+    dernier = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, quiz_id, donnees FROM resultats r WHERE id > ? AND NOT EXISTS "
+            "(SELECT 1 FROM reponses p WHERE p.resultat_id = r.id) ORDER BY id LIMIT ?",
+            (dernier, lot),
+        ).fetchall()
+        if not rows:
+            return compte
+
+        lignes = []
+        for row in rows:
+            quiz_id = row["quiz_id"]
+            if quiz_id not in modules:
+                try:
+                    modules[quiz_id] = importlib.import_module(f"quizzes.{quiz_id}.logic")
+                except ImportError:
+                    modules[quiz_id] = None
+            logic = modules[quiz_id]
+            if logic is None:
+                continue
+            detail = logic.detailler_donnees(json.loads(row["donnees"]))
+            lignes.extend((row["id"], *d) for d in detail)
+            compte[quiz_id] = compte.get(quiz_id, 0) + 1
+
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO reponses (resultat_id, champ, valeur, attendu, correct) "
+                "VALUES (?, ?, ?, ?, ?)",
+                lignes,
+            )
+            # L'analyse des items a pu passer ces soumissions sans leurs réponses.
+            for quiz_id in {row["quiz_id"] for row in rows} & set(compte):
+                invalider_analyse(conn, quiz_id)
+        dernier = rows[-1]["id"]
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    if not os.path.exists(DB_PATH):
+        print(f"Base introuvable : {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+
+    init_db()
+    conn = connecter()
+    compte = remplir(conn)
+    conn.fermer()
+
+    if not compte:
+        print("  Aucune soumission à compléter.")
+    for quiz_id, n in sorted(compte.items()):
+        print(f"  {quiz_id:<8} {n} soumission(s) détaillée(s)")
+
+
+if __name__ == "__main__":
+    main()
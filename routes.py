@@ -1,8 +1,27 @@
-from flask import Blueprint, render_template, request, session, redirect, url_for
+import os
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from flask import (
+    Blueprint, Response, abort, jsonify, render_template, request, session, redirect, url_for,
+    flash, send_from_directory,
+)
+from werkzeug.http import is_resource_modified
 
 import config
-from db import get_db
+from analyse import SEUIL_DISCRIMINATION, TRIS as TRIS_ANALYSE, statistiques
+from cache_http import page_versionnee
+from db import (
+    get_db, lire_configs, signaler_changement_config, derniere_modification, lire_resume,
+    CONFIG_DEFAUT,
+)
+from export import FORMATS as FORMATS_EXPORT, generer_export
+from metriques import exposer as exposer_metriques
+from profilage import NOM_PROFIL, chemin_profils, detailler, lister_profils, resumer_routes
 from quizzes import QUIZ_REGISTRY
+from recorriger import lancer as lancer_recorrection, lire_etats as lire_recorrections
+from sessions import regenerer
 
 main_bp = Blueprint("main", __name__)
 admin_bp = Blueprint("admin", __name__, template_folder="templates/admin")
@@ -13,22 +32,21 @@ admin_bp = Blueprint("admin", __name__, template_folder="templates/admin")
 # ---------------------------------------------------------------------------
 
 @main_bp.route("/")
+@page_versionnee
 def index():
-    conn = get_db()
-    configs = {}
-    for row in conn.execute("SELECT quiz_id, mode, ouvert FROM quiz_config").fetchall():
-        configs[row["quiz_id"]] = {"mode": row["mode"], "ouvert": row["ouvert"]}
-    conn.close()
+    configs = lire_configs()
 
     quizzes = []
     for quiz_id, meta in QUIZ_REGISTRY.items():
-        cfg = configs.get(quiz_id, {"mode": "entrainement", "ouvert": 0})
+        cfg = configs.get(quiz_id, CONFIG_DEFAUT)
         quizzes.append({
             "id": quiz_id,
             "titre": meta["titre"],
             "description": meta["description"],
             "mode": cfg["mode"],
             "ouvert": cfg["ouvert"],
+            # Pas de url_for : le quiz n'est peut-être pas encore chargé.
+            "url": f"{request.script_root}/{quiz_id}/",
         })
     return render_template("index.html", quizzes=quizzes)
 
@@ -41,6 +59,7 @@ def index():
 def login():
     if request.method == "POST":
         if request.form.get("password") == config.ADMIN_PASSWORD:
+            regenerer()
             session["admin"] = True
             return redirect(url_for("admin.dashboard"))
         return render_template("login.html", error="Mot de passe incorrect")
@@ -50,23 +69,29 @@ def login():
 @admin_bp.route("/logout")
 def logout():
     session.pop("admin", None)
+    regenerer()
     return redirect(url_for("main.index"))
 
 
+def lire_resumes():
+    """{quiz_id: {"jour": résumé du jour, "total": résumé global}} (tables resumes_*)."""
+    jour = datetime.now(ZoneInfo("Europe/Paris")).strftime("%Y-%m-%d")
+    return {
+        quiz_id: {"jour": lire_resume(quiz_id, jour), "total": lire_resume(quiz_id)}
+        for quiz_id in QUIZ_REGISTRY
+    }
+
+
 @admin_bp.route("/")
 def dashboard():
     if not session.get("admin"):
         return redirect(url_for("admin.login"))
 
-    conn = get_db()
-    configs = {}
-    for row in conn.execute("SELECT quiz_id, mode, ouvert FROM quiz_config").fetchall():
-        configs[row["quiz_id"]] = {"mode": row["mode"], "ouvert": row["ouvert"]}
-    conn.close()
+    configs = lire_configs()
 
     quizzes = []
     for quiz_id, meta in QUIZ_REGISTRY.items():
-        cfg = configs.get(quiz_id, {"mode": "entrainement", "ouvert": 0})
+        cfg = configs.get(quiz_id, CONFIG_DEFAUT)
         quizzes.append({
             "id": quiz_id,
             "titre": meta["titre"],
@@ -74,7 +99,10 @@ def dashboard():
             "mode": cfg["mode"],
             "ouvert": cfg["ouvert"],
         })
-    return render_template("dashboard.html", quizzes=quizzes)
+    return render_template(
+        "dashboard.html", quizzes=quizzes, resumes=lire_resumes(),
+        recorrections=lire_recorrections(),
+    )
 
 
 @admin_bp.route("/toggle/<quiz_id>/<action>", methods=["POST"])
@@ -104,4 +132,123 @@ def toggle(quiz_id, action):
             )
     conn.commit()
     conn.close()
+    signaler_changement_config()
+    return redirect(url_for("admin.dashboard"))
+
+
+@admin_bp.route("/resumes")
+def resumes():
+    """Résumés des scores en JSON, relus périodiquement par le tableau de bord."""
+    if not session.get("admin"):
+        return jsonify(ok=False, redirection=url_for("admin.login")), 401
+    reponse = jsonify(lire_resumes())
+    reponse.headers["Cache-Control"] = "no-store"
+    return reponse
+
+
+@admin_bp.route("/metrics")
+def metrics():
+    """Métriques de tous les workers au format Prometheus.
+
+    Accès par la session admin, ou par « Authorization: Bearer » avec
+    METRIQUES_JETON pour un collecteur.
+    """
+    jeton = config.METRIQUES_JETON
+    autorise = session.get("admin") or (
+        jeton and request.headers.get("Authorization") == f"Bearer {jeton}"
+    )
+    if not autorise:
+        return Response("Accès réservé\n", status=401, mimetype="text/plain")
+    if not config.METRIQUES:
+        abort(404)
+    return Response(exposer_metriques(), mimetype="text/plain; version=0.0.4")
+
+
+@admin_bp.route("/profils")
+def profils():
+    """Profils de requêtes de data/profiles/, les plus lents d'abord."""
+    if not session.get("admin"):
+        return redirect(url_for("admin.login"))
+    tous = lister_profils()
+    return render_template(
+        "profils.html", actif=config.PROFILAGE, echantillon=config.PROFILAGE_ECHANTILLON,
+        seuil=config.PROFILAGE_SEUIL, routes=resumer_routes(tous), profils=tous[:50],
+        total=len(tous),
+    )
+
+
+@admin_bp.route("/profils/<nom>")
+def profil(nom):
+    """Résumé texte d'un profil ; ?fichier=1 télécharge le fichier brut."""
+    if not session.get("admin"):
+        return redirect(url_for("admin.login"))
+    if not NOM_PROFIL.match(nom) or not os.path.exists(os.path.join(chemin_profils(), nom)):
+        abort(404)
+    if request.args.get("fichier"):
+        return send_from_directory(chemin_profils(), nom, as_attachment=True)
+    return Response(detailler(nom), mimetype="text/plain")
+
+
+@admin_bp.route("/recorriger/<quiz_id>", methods=["POST"])
+def recorriger(quiz_id):
+    if not session.get("admin"):
+        return redirect(url_for("admin.login"))
+
+    if quiz_id in QUIZ_REGISTRY:
+        if lancer_recorrection(quiz_id):
+            flash(f"Recorrection de {quiz_id} lancée : le résultat s'affichera ici une fois terminée.")
+        else:
+            flash(f"Recorrection de {quiz_id} déjà en cours.")
     return redirect(url_for("admin.dashboard"))
+
+
+@admin_bp.route("/analyse/<quiz_id>")
+def analyse(quiz_id):
+    """Difficulté et discrimination de chaque champ (seules les nouvelles soumissions sont lues)."""
+    if not session.get("admin"):
+        return redirect(url_for("admin.login"))
+    if quiz_id not in QUIZ_REGISTRY:
+        abort(404)
+    tri = request.args.get("tri", "champ")
+    if tri not in TRIS_ANALYSE:
+        abort(400)
+
+    champs, total = statistiques(quiz_id, tri)
+    return render_template(
+        "analyse.html", quiz_id=quiz_id, titre_quiz=QUIZ_REGISTRY[quiz_id]["titre"],
+        champs=champs, total=total, tri=tri, seuil=SEUIL_DISCRIMINATION,
+    )
+
+
+@admin_bp.route("/export/<quiz_id>")
+def export(quiz_id):
+    """Export CSV (?format=csv) ou NDJSON (?format=ndjson), envoyé par blocs.
+
+    Last-Modified suit la dernière écriture des soumissions du quiz : une
+    synchronisation périodique avec If-Modified-Since reçoit 304 sans que
+    la base soit parcourue.
+    """
+    if not session.get("admin"):
+        return redirect(url_for("admin.login"))
+    if quiz_id not in QUIZ_REGISTRY:
+        abort(404)
+    format_ = request.args.get("format", "csv")
+    if format_ not in FORMATS_EXPORT:
+        abort(400)
+
+    modifie = derniere_modification(quiz_id)
+    derniere = None
+    # Dates HTTP à la seconde : une modification dans la seconde en cours
+    # pourrait être suivie d'une autre, invisible à If-Modified-Since.
+    if modifie is not None and int(modifie) < int(time.time()):
+        derniere = datetime.fromtimestamp(int(modifie), timezone.utc)
+        if not is_resource_modified(request.environ, last_modified=derniere):
+            reponse = Response(status=304)
+            reponse.last_modified = derniere
+            return reponse
+
+    reponse = Response(generer_export(quiz_id, format_), mimetype=FORMATS_EXPORT[format_])
+    reponse.headers["Content-Disposition"] = f'attachment; filename="{quiz_id}.{format_}"'
+    reponse.headers["Cache-Control"] = "private, no-cache"
+    reponse.last_modified = derniere
+    return reponse
@@ -0,0 +1,166 @@
+"""Sessions côté serveur : le cookie ne contient plus qu'un identifiant signé.
+
+Les réponses en cours (et les données générées du quiz binaire) grossissent
+à chaque exercice ; dans un cookie, elles sont renvoyées et revérifiées à
+chaque requête, y compris chaque poll de la salle d'attente. Ici elles sont
+stockées dans data/sessions.db et le cookie ne transporte qu'un identifiant
+opaque, signé avec SECRET_KEY.
+
+La ligne n'est réécrite que si la session a été modifiée ; les sessions
+expirées sont supprimées au fil des écritures.
+"""
+
+import os
+import random
+import secrets
+import time
+
+from flask import session as session_courante
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+import config
+import db
+
+# Probabilité de purger les sessions expirées lors d'une écriture.
+PURGE_PROBABILITE = 0.01
+
+
+def chemin_sessions():
+    return os.path.join(db.DATA_DIR, "sessions.db")
+
+
+def init_sessions():
+    conn = db.connecter(chemin_sessions())
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        donnees TEXT NOT NULL,
+        expire REAL NOT NULL
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expire ON sessions(expire)")
+    conn.commit()
+    conn.fermer()
+
+
+def purger_sessions():
+    """Supprime les sessions expirées. Retourne le nombre supprimé."""
+    conn = db.prendre_connexion(chemin_sessions())
+    try:
+        with conn:
+            return conn.execute("DELETE FROM sessions WHERE expire < ?", (time.time(),)).rowcount
+    finally:
+        conn.close()
+
+
+def _supprimer(sid):
+    conn = db.prendre_connexion(chemin_sessions())
+    try:
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id=?", (sid,))
+    finally:
+        conn.close()
+
+
+def regenerer():
+    """Change l'identifiant de la session courante (connexion, déconnexion admin).
+
+    Un identifiant lu ou imposé avant la connexion (poste partagé de la
+    salle) ne donne pas accès à la session admin : l'ancienne ligne est
+    supprimée et save_session en écrit une nouvelle, avec un nouveau cookie.
+    Sans effet avec les sessions dans le cookie (SESSIONS_SERVEUR=0).
+    """
+    if not isinstance(session_courante._get_current_object(), SessionServeur):
+        return
+    if session_courante.sid is not None:
+        _supprimer(session_courante.sid)
+        session_courante.sid = None
+    session_courante.modified = True
+
+
+class SessionServeur(CallbackDict, SessionMixin):
+    """Session dont le contenu vit en base ; sid est None tant qu'elle n'est pas écrite."""
+
+    def __init__(self, donnees=None, sid=None):
+        def modifiee(self):
+            self.modified = True
+
+        super().__init__(donnees, modifiee)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+
+
+class InterfaceSessionServeur(SessionInterface):
+
+    def _signeur(self, app):
+        return Signer(app.secret_key, salt="session-serveur")
+
+    def open_session(self, app, request):
+        valeur = request.cookies.get(self.get_cookie_name(app))
+        if not valeur:
+            return SessionServeur()
+        try:
+            sid = self._signeur(app).unsign(valeur).decode()
+        except BadSignature:
+            return SessionServeur()
+
+        conn = db.prendre_connexion(chemin_sessions())
+        try:
+            row = conn.execute(
+                "SELECT donnees FROM sessions WHERE id=? AND expire > ?", (sid, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return SessionServeur()
+        return SessionServeur(session_json_serializer.loads(row["donnees"]), sid)
+
+    def save_session(self, app, session, response):
+        nom = self.get_cookie_name(app)
+        domaine = self.get_cookie_domain(app)
+        chemin = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified:
+                if session.sid is not None:
+                    _supprimer(session.sid)
+                response.delete_cookie(nom, domain=domaine, path=chemin)
+            return
+
+        if not session.modified:
+            return
+
+        nouvelle = session.sid is None
+        if nouvelle:
+            session.sid = secrets.token_urlsafe(24)
+        conn = db.prendre_connexion(chemin_sessions())
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, donnees, expire) VALUES (?, ?, ?)",
+                    (session.sid, session_json_serializer.dumps(dict(session)),
+                     time.time() + config.SESSIONS_DUREE),
+                )
+        finally:
+            conn.close()
+        if random.random() < PURGE_PROBABILITE:
+            purger_sessions()
+
+        # Le cookie n'est envoyé qu'à la création de l'identifiant (nouvelle
+        # session, ou regenerer()).
+        if nouvelle:
+            response.set_cookie(
+                nom,
+                self._signeur(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domaine,
+                path=chemin,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
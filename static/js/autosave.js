@@ -0,0 +1,110 @@
+// Sauvegarde automatique des réponses d'un exercice.
+//
+// Seuls les champs modifiés sont envoyés, en JSON, DELAI ms après la dernière
+// saisie. Une fois tout sauvegardé, « Suivant » / « Précédent » / « Valider »
+// deviennent de simples GET. Sans JavaScript, ou si la sauvegarde échoue
+// (réseau coupé), le formulaire est posté en entier comme avant.
+(function() {
+    var form = document.querySelector("form[data-sauvegarde]");
+    if (!form || !window.fetch) {
+        return;
+    }
+
+    var DELAI = 800;
+    var url = form.dataset.sauvegarde;
+    var modifies = {};
+    var timer = null;
+    var envoi = Promise.resolve();
+
+    function valeur(champ) {
+        if (champ.type === "checkbox") {
+            return champ.checked ? "on" : "";
+        }
+        return champ.value;
+    }
+
+    function vide(objet) {
+        return Object.keys(objet).length === 0;
+    }
+
+    function noter(e) {
+        var champ = e.target;
+        if (!champ.name || champ.name === "direction") {
+            return;
+        }
+        modifies[champ.name] = valeur(champ);
+        clearTimeout(timer);
+        timer = setTimeout(envoyer, DELAI);
+    }
+
+    function envoyer() {
+        clearTimeout(timer);
+        timer = null;
+        // Les envois sont chaînés : une valeur ancienne n'écrase jamais une récente.
+        envoi = envoi.then(function() {
+            var lot = modifies;
+            modifies = {};
+            if (vide(lot)) {
+                return null;
+            }
+            return fetch(url, {
+                method: "POST",
+                headers: {"Content-Type": "application/json"},
+                body: JSON.stringify(lot),
+                credentials: "same-origin",
+                keepalive: true
+            }).then(function(r) {
+                if (r.status === 409) {
+                    return r.json().then(function(data) {
+                        window.location.href = data.redirection;
+                    });
+                }
+                if (!r.ok) {
+                    throw new Error(r.status);
+                }
+            }).catch(function() {
+                // Rendre les champs non sauvegardés, sauf s'ils ont été ressaisis.
+                for (var nom in lot) {
+                    if (!(nom in modifies)) {
+                        modifies[nom] = lot[nom];
+                    }
+                }
+            });
+        });
+        return envoi;
+    }
+
+    form.addEventListener("input", noter);
+    form.addEventListener("change", noter);
+    window.addEventListener("online", envoyer);
+    document.addEventListener("visibilitychange", function() {
+        if (document.visibilityState === "hidden") {
+            envoyer();
+        }
+    });
+
+    form.addEventListener("submit", function(e) {
+        var bouton = e.submitter;
+        var precedent = bouton && bouton.name === "direction" && bouton.value === "prev";
+        var cible = precedent ? form.dataset.precedent : form.dataset.suivant;
+        if (!cible) {
+            return;
+        }
+        e.preventDefault();
+        envoyer().then(function() {
+            if (vide(modifies)) {
+                window.location.href = cible;
+                return;
+            }
+            // Repli : POST complet du formulaire, qui fusionne toutes les réponses.
+            if (precedent) {
+                var direction = document.createElement("input");
+                direction.type = "hidden";
+                direction.name = "direction";
+                direction.value = "prev";
+                form.appendChild(direction);
+            }
+            form.submit();
+        });
+    });
+})();
@@ -0,0 +1,68 @@
+// Rafraîchissement des scores du tableau de bord.
+//
+// Toutes les DELAI ms, /admin/resumes renvoie les résumés matérialisés
+// (quelques lignes par quiz, sans parcourir les soumissions) ; seules les
+// cellules marquées data-champ sont réécrites. Onglet masqué : pas de requête.
+(function() {
+    var table = document.getElementById("resumes");
+    if (!table || !window.fetch) {
+        return;
+    }
+
+    var DELAI = 10000;
+
+    function nombre(x) {
+        return x === null ? "—" : String(x).replace(".", ",");
+    }
+
+    function exercices(parExercice) {
+        var textes = Object.keys(parExercice).map(function(nom) {
+            var score = parExercice[nom];
+            return nom + " : " + nombre(score.moyenne) + "/" + nombre(score.total);
+        });
+        return textes.length ? textes.join(" · ") : "—";
+    }
+
+    function afficher(resumes) {
+        table.querySelectorAll("tr[data-quiz]").forEach(function(ligne) {
+            var resume = resumes[ligne.dataset.quiz];
+            if (!resume) {
+                return;
+            }
+            ligne.querySelectorAll("[data-champ]").forEach(function(cellule) {
+                var chemin = cellule.dataset.champ.split(".");
+                var valeur = resume[chemin[0]][chemin[1]];
+                if (chemin[1] === "exercices") {
+                    cellule.textContent = exercices(valeur);
+                } else if (chemin[1] === "nombre") {
+                    cellule.textContent = valeur;
+                } else {
+                    cellule.textContent = nombre(valeur);
+                }
+            });
+        });
+    }
+
+    function rafraichir() {
+        if (document.hidden) {
+            return;
+        }
+        fetch(table.dataset.url, {credentials: "same-origin"})
+            .then(function(reponse) {
+                if (reponse.status === 401) {
+                    clearInterval(minuterie);
+                    return null;
+                }
+                return reponse.ok ? reponse.json() : null;
+            })
+            .then(function(resumes) {
+                if (resumes) {
+                    afficher(resumes);
+                }
+            })
+            .catch(function() {});
+    }
+
+    var minuterie = setInterval(rafraichir, DELAI);
+    document.addEventListener("visibilitychange", rafraichir);
+})();